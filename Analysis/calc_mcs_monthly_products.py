@@ -0,0 +1,555 @@
+"""
+Calculate multiple MCS precipitation products in a single pass over the pixel-level files.
+Each pixel file is read once and passed to all requested product reducers:
+    rainmap: monthly total, MCS precipitation amount and frequency (same as calc_tbpf_mcs_monthly_rainmap.py)
+    rainhov: monthly total and MCS precipitation Hovmoller diagram (same as calc_tbpf_mcs_monthly_rainhov.py)
+    rainpdf: rain rate PDF by different types of convection for land & ocean (same as calc_mcs_rainrate_hist_byregion.py)
+
+>python calc_mcs_monthly_products.py -c config.yml -s 2010-06 -e 2010-10 --products rainmap rainhov
+Optional arguments:
+--extent domain extent lonmin lonmax latmin latmax (for rainhov and rainpdf)
+--region region name (for rainhov and rainpdf output filenames)
+-l landfrac_range -o oceanfrac_range (required for rainpdf)
+-p parallel option (0: serial, 1: local cluster)
+-n number of workers
+
+Zhe Feng, PNNL
+contact: Zhe.Feng@pnnl.gov
+"""
+import numpy as np
+import glob, sys, os
+import xarray as xr
+import pandas as pd
+import time, datetime, calendar, pytz
+import argparse
+import dask
+from dask.distributed import Client, LocalCluster
+from pyflextrkr.ft_utilities import load_config
+
+#-----------------------------------------------------------------------
+def parse_cmd_args():
+    # Define and retrieve the command-line arguments...
+    parser = argparse.ArgumentParser(
+        description="Calculate multiple MCS precipitation products in a single pass over pixel files."
+    )
+    parser.add_argument("-c", "--config", help="yaml config file for tracking", required=True)
+    parser.add_argument("-s", "--start", help="first month to process, format=YYYY-mm", required=True)
+    parser.add_argument("-e", "--end", help="last month to process, format=YYYY-mm", required=True)
+    parser.add_argument("--products", nargs='+', help="products to calculate (rainmap rainhov rainpdf)",
+                        default=['rainmap'])
+    parser.add_argument("--extent", nargs='+', help="domain extent (lonmin lonmax latmin latmax)", type=float, default=None)
+    parser.add_argument("--region", help="region name", default="fulldomain")
+    parser.add_argument("-l", "--land", nargs='+', help="land fraction range (min max)", type=float, default=None)
+    parser.add_argument("-o", "--ocean", nargs='+', help="ocean fraction range (min max)", type=float, default=None)
+    parser.add_argument("-p", "--parallel", help="flag to run in parallel (0:serial, 1:local cluster)", type=int, default=0)
+    parser.add_argument("-n", "--nprocesses", help="number of processes to use in parallel", type=int, default=1)
+    args = parser.parse_args()
+
+    # Put arguments in a dictionary
+    args_dict = {
+        'config_file': args.config,
+        'start_month': args.start,
+        'end_month': args.end,
+        'products': args.products,
+        'extent': args.extent,
+        'region': args.region,
+        'land': args.land,
+        'ocean': args.ocean,
+        'run_parallel': args.parallel,
+        'n_workers': args.nprocesses,
+    }
+
+    return args_dict
+
+#-----------------------------------------------------------------------
+def get_month_epoch(month_str):
+    """
+    Get Epoch Time for the first day of a month.
+
+    Args:
+        month_str: string
+            Month string (yyyymm).
+
+    Returns:
+        months: np.array
+            Epoch Time (1 element) for the month.
+    """
+    months = np.zeros(1, dtype=int)
+    months[0] = calendar.timegm(datetime.datetime(int(month_str[0:4]), int(month_str[4:6]), 1, 0, 0, 0,
+                                                  tzinfo=pytz.UTC).timetuple())
+    return months
+
+#-----------------------------------------------------------------------
+# Monthly rain map reducer
+def rainmap_period(file_datestr, options):
+    return file_datestr[0:6]
+
+def rainmap_init(ds, options):
+    ny, nx = ds.sizes['lat'], ds.sizes['lon']
+    state = {
+        'precipitation': np.zeros((ny, nx)),
+        'mcs_precipitation': np.zeros((ny, nx)),
+        'mcs_precipitation_count': np.zeros((ny, nx)),
+        'ntimes': 0,
+        'longitude': ds['longitude'].squeeze(),
+        'latitude': ds['latitude'].squeeze(),
+        'lat': ds['lat'].data,
+        'lon': ds['lon'].data,
+    }
+    return state
+
+def rainmap_update(state, ds, options):
+    pcp = ds['precipitation'].isel(time=0).data
+    # Sum total precipitation over time
+    state['precipitation'] += np.nan_to_num(pcp)
+    # Sum MCS precipitation over time, use cloudtracknumber > 0 as mask
+    state['mcs_precipitation'] += np.nan_to_num(np.where(ds['cloudtracknumber'].isel(time=0).data > 0, pcp, np.nan))
+    # Sum MCS PF counts overtime to get number of hours
+    state['mcs_precipitation_count'] += (ds['pcptracknumber'].isel(time=0).data > 0)
+    state['ntimes'] += 1
+    return state
+
+def rainmap_merge(state1, state2):
+    for key in ['precipitation', 'mcs_precipitation', 'mcs_precipitation_count', 'ntimes']:
+        state1[key] = state1[key] + state2[key]
+    return state1
+
+def rainmap_write(state, period, options):
+    output_filename = f"{options['output_monthly_dir']}mcs_rainmap_{period}.nc"
+    longitude = state['longitude']
+    latitude = state['latitude']
+    var_dict = {
+        'longitude': (['lat', 'lon'], longitude.data, longitude.attrs),
+        'latitude': (['lat', 'lon'], latitude.data, latitude.attrs),
+        'precipitation': (['time', 'lat', 'lon'], np.expand_dims(state['precipitation'], 0)),
+        'mcs_precipitation': (['time', 'lat', 'lon'], np.expand_dims(state['mcs_precipitation'], 0)),
+        'mcs_precipitation_count': (['time', 'lat', 'lon'], np.expand_dims(state['mcs_precipitation_count'], 0)),
+        'ntimes': (['time'], np.array([state['ntimes']])),
+    }
+    coord_dict = {
+        'time': (['time'], get_month_epoch(period)),
+        'lat': (['lat'], state['lat']),
+        'lon': (['lon'], state['lon']),
+    }
+    gattr_dict = {
+        'title': 'MCS precipitation accumulation',
+        'contact':'Zhe Feng, zhe.feng@pnnl.gov',
+        'created_on':time.ctime(time.time()),
+    }
+    dsout = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict)
+    dsout.time.attrs['long_name'] = 'Epoch Time (since 1970-01-01T00:00:00)'
+    dsout.time.attrs['units'] = 'Seconds since 1970-1-1 0:00:00 0:00'
+    dsout.lon.attrs['long_name'] = 'Longitude'
+    dsout.lon.attrs['units'] = 'degree'
+    dsout.lat.attrs['long_name'] = 'Latitude'
+    dsout.lat.attrs['units'] = 'degree'
+    dsout.ntimes.attrs['long_name'] = 'Number of times in the month'
+    dsout.ntimes.attrs['units'] = 'count'
+    dsout.precipitation.attrs['long_name'] = 'Total precipitation'
+    dsout.precipitation.attrs['units'] = 'mm'
+    dsout.mcs_precipitation.attrs['long_name'] = 'MCS precipitation'
+    dsout.mcs_precipitation.attrs['units'] = 'mm'
+    dsout.mcs_precipitation_count.attrs['long_name'] = 'Number of hours MCS precipitation is recorded'
+    dsout.mcs_precipitation_count.attrs['units'] = 'hour'
+
+    fillvalue = np.nan
+    # Set encoding/compression for all variables
+    comp = dict(zlib=True, _FillValue=fillvalue, dtype='float32')
+    encoding = {var: comp for var in dsout.data_vars}
+
+    dsout.to_netcdf(path=output_filename, mode='w', format='NETCDF4', unlimited_dims='time', encoding=encoding)
+    print(f'Output saved: {output_filename}')
+    return output_filename
+
+#-----------------------------------------------------------------------
+# Monthly rain Hovmoller reducer
+def rainhov_period(file_datestr, options):
+    return file_datestr[0:6]
+
+def rainhov_init(ds, options):
+    startlon, endlon = options['startlon'], options['endlon']
+    state = {
+        'basetime': [],
+        'precipitation': [],
+        'mcs_precipitation': [],
+        'lon': ds['lon'].sel(lon=slice(startlon, endlon)).data,
+    }
+    return state
+
+def rainhov_update(state, ds, options):
+    pcpvarname = options['hov_pcpvarname']
+    startlat, endlat = options['startlat'], options['endlat']
+    startlon, endlon = options['startlon'], options['endlon']
+    # Mask out non-MCS precipitation as 0 for averaging Hovmoller purpose
+    mcspcp = ds[pcpvarname].where(ds['pcptracknumber'] > 0, other=0)
+    # Select a latitude band
+    mcspreciphov = mcspcp.sel(lat=slice(startlat, endlat), lon=slice(startlon, endlon)).mean(dim='lat')
+    totpreciphov = ds[pcpvarname].sel(lat=slice(startlat, endlat), lon=slice(startlon, endlon)).mean(dim='lat')
+    # Convert xarray decoded time back to Epoch Time in seconds
+    state['basetime'].extend([tt.tolist()/1e9 for tt in ds.time.values])
+    state['precipitation'].append(totpreciphov.data)
+    state['mcs_precipitation'].append(mcspreciphov.data)
+    return state
+
+def rainhov_merge(state1, state2):
+    for key in ['basetime', 'precipitation', 'mcs_precipitation']:
+        state1[key] = state1[key] + state2[key]
+    return state1
+
+def rainhov_write(state, period, options):
+    region = options['region']
+    output_filename = f"{options['output_monthly_dir']}mcs_rainhov_{region}_{period}.nc"
+    # Sort by time
+    basetime = np.array(state['basetime'])
+    order = np.argsort(basetime, kind='stable')
+    totpreciphov = np.concatenate(state['precipitation'], axis=0)[order]
+    mcspreciphov = np.concatenate(state['mcs_precipitation'], axis=0)[order]
+
+    var_dict = {
+        'precipitation': (['time', 'lon'], totpreciphov),
+        'mcs_precipitation': (['time', 'lon'], mcspreciphov),
+    }
+    coord_dict = {
+        'lon': (['lon'], state['lon']),
+        'time': (['time'], basetime[order]),
+    }
+    gattr_dict = {
+        'title': 'MCS precipitation Hovmoller',
+        'startlat': options['startlat'],
+        'endlat': options['endlat'],
+        'startlon': options['startlon'],
+        'endlon': options['endlon'],
+        'contact': 'Zhe Feng, zhe.feng@pnnl.gov',
+        'created_on': time.ctime(time.time()),
+    }
+    dsout = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict)
+    dsout.lon.attrs['long_name'] = 'Longitude'
+    dsout.lon.attrs['units'] = 'degree'
+    dsout.time.attrs['long_name'] = 'Epoch Time (since 1970-01-01T00:00:00)'
+    dsout.time.attrs['units'] = 'seconds since 1970-01-01T00:00:00'
+    dsout.precipitation.attrs['long_name'] = 'Total precipitation'
+    dsout.precipitation.attrs['units'] = 'mm/h'
+    dsout.mcs_precipitation.attrs['long_name'] = 'MCS precipitation'
+    dsout.mcs_precipitation.attrs['units'] = 'mm/h'
+
+    fillvalue = np.nan
+    # Set encoding/compression for all variables
+    comp = dict(zlib=True, _FillValue=fillvalue, dtype='float32')
+    encoding = {var: comp for var in dsout.data_vars}
+
+    dsout.to_netcdf(path=output_filename, mode='w', format='NETCDF4', unlimited_dims='time', encoding=encoding)
+    print(f'Output saved: {output_filename}')
+    return output_filename
+
+#-----------------------------------------------------------------------
+# Rain rate PDF reducer
+rainpdf_types = ['total_land', 'mcs_land', 'idc_land', 'congestus_land',
+                 'total_ocean', 'mcs_ocean', 'idc_ocean', 'congestus_ocean']
+
+def rainpdf_period(file_datestr, options):
+    # One PDF for the entire period
+    return 'all'
+
+def rainpdf_init(ds, options):
+    nbins = len(options['rrbins']) - 1
+    state = {key: np.zeros(nbins, dtype=np.int64) for key in rainpdf_types}
+    return state
+
+def rainpdf_update(state, ds, options):
+    # Congestus Tb and rainrate thresholds
+    tb_thresh_congestus = 310.0     # K
+    rr_thresh_congestus = 0.5       # mm/h
+
+    rrbins = options['rrbins']
+    rr_range = (np.min(rrbins), np.max(rrbins))
+    pcp = ds['precipitation'].isel(time=0).data
+    cloudnumber = ds['cloudnumber'].isel(time=0).data
+    cloudtracknumber = ds['cloudtracknumber'].isel(time=0).data
+    tb = ds['tb'].isel(time=0).data
+
+    # Precipitation type masks
+    type_masks = {
+        # All precipitation
+        'total': np.ones(pcp.shape, dtype=bool),
+        # MCS precipitation
+        'mcs': cloudtracknumber > 0,
+        # Non-MCS deep convection (cloudnumber > 0: CCS & cloudtracknumber == NaN: non-MCS)
+        'idc': (cloudnumber > 0) & np.isnan(cloudtracknumber),
+        # Congestus (Tb between CCS and tb_thresh_congestus, rain rate > rr_thresh_congestus)
+        'congestus': np.isnan(cloudnumber) & (tb < tb_thresh_congestus) & (pcp > rr_thresh_congestus),
+    }
+    for sfc_name, sfc_mask in [('land', options['land_mask']), ('ocean', options['ocean_mask'])]:
+        for type_name, type_mask in type_masks.items():
+            ipdf, bins = np.histogram(pcp[sfc_mask & type_mask], bins=rrbins, range=rr_range, density=False)
+            state[f'{type_name}_{sfc_name}'] += ipdf
+    return state
+
+def rainpdf_merge(state1, state2):
+    for key in rainpdf_types:
+        state1[key] = state1[key] + state2[key]
+    return state1
+
+def rainpdf_write(state, period, options):
+    outfile = f"{options['stats_dir']}mcs_rainrate_hist_{options['start_date']}_{options['end_date']}_{options['region']}.nc"
+    rrbins = options['rrbins']
+
+    # Define xarray output dataset
+    print('Writing output to netCDF file ...')
+    var_dict = {key: (['bins'], state[key]) for key in rainpdf_types}
+    coord_dict = {'bins': (['bins'], rrbins[:-1])}
+    gattr_dict = {
+        'title': 'Precipitation PDF by types',
+        'lon_bounds': options['lon_bounds'],
+        'lat_bounds': options['lat_bounds'],
+        'landfrac_range': options['land_range'],
+        'oceanfrac_range': options['ocean_range'],
+        'contact': 'Zhe Feng, zhe.feng@pnnl.gov',
+        'created_on': time.ctime(time.time()),
+    }
+    dsout = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict)
+
+    dsout.bins.attrs['long_name'] = 'Rain rate bins'
+    dsout.bins.attrs['units'] = 'mm/h'
+    dsout.total_land.attrs['long_name'] = 'Land total precipitation'
+    dsout.mcs_land.attrs['long_name'] = 'Land MCS precipitation'
+    dsout.idc_land.attrs['long_name'] = 'Land isolated deep convection precipitation'
+    dsout.congestus_land.attrs['long_name'] = 'Land congestus precipitation'
+    dsout.total_ocean.attrs['long_name'] = 'Ocean total precipitation'
+    dsout.mcs_ocean.attrs['long_name'] = 'Ocean MCS precipitation'
+    dsout.idc_ocean.attrs['long_name'] = 'Ocean isolated deep convection precipitation'
+    dsout.congestus_ocean.attrs['long_name'] = 'Ocean congestus precipitation'
+    for key in rainpdf_types:
+        dsout[key].attrs['units'] = 'count'
+
+    # Set encoding/compression for all variables
+    comp = dict(zlib=True, dtype='float')
+    encoding = {var: comp for var in dsout.data_vars}
+    # Write to file
+    dsout.to_netcdf(path=outfile, mode='w', format='NETCDF4', encoding=encoding)
+    print('Output saved as: ', outfile)
+    return outfile
+
+#-----------------------------------------------------------------------
+# Available product reducers
+# To add a product, define period/init/update/merge/write functions and add them here
+reducer_dict = {
+    'rainmap': {
+        'period': rainmap_period, 'init': rainmap_init, 'update': rainmap_update,
+        'merge': rainmap_merge, 'write': rainmap_write,
+    },
+    'rainhov': {
+        'period': rainhov_period, 'init': rainhov_init, 'update': rainhov_update,
+        'merge': rainhov_merge, 'write': rainhov_write,
+    },
+    'rainpdf': {
+        'period': rainpdf_period, 'init': rainpdf_init, 'update': rainpdf_update,
+        'merge': rainpdf_merge, 'write': rainpdf_write,
+    },
+}
+
+#-----------------------------------------------------------------------
+def calc_products_block(datafiles, products, options):
+    """
+    Read a block of pixel files once and update all product reducers.
+
+    Args:
+        datafiles: list
+            List of (pixel filename, file date string) sorted in time.
+        products: list
+            Product names.
+        options: dictionary
+            Dictionary containing product options.
+
+    Returns:
+        partial: dictionary
+            Partial results {(product, period): state}.
+    """
+    partial = {}
+    for filename, file_datestr in datafiles:
+        ds = xr.open_dataset(filename)
+        for product in products:
+            reducer = reducer_dict[product]
+            period = reducer['period'](file_datestr, options)
+            key = (product, period)
+            if key not in partial:
+                partial[key] = reducer['init'](ds, options)
+            partial[key] = reducer['update'](partial[key], ds, options)
+        ds.close()
+    return partial
+
+#-----------------------------------------------------------------------
+def merge_products(partial1, partial2):
+    """
+    Merge two partial results.
+
+    Args:
+        partial1: dictionary
+            Partial results {(product, period): state}, earlier in time.
+        partial2: dictionary
+            Partial results {(product, period): state}, later in time.
+
+    Returns:
+        partial: dictionary
+            Merged partial results.
+    """
+    partial = dict(partial1)
+    for key, state in partial2.items():
+        if key in partial:
+            partial[key] = reducer_dict[key[0]]['merge'](partial[key], state)
+        else:
+            partial[key] = state
+    return partial
+
+#-----------------------------------------------------------------------
+def get_pdf_masks(datafile, config, lon_bounds, lat_bounds, land_range, ocean_range):
+    """
+    Make land & ocean masks within a region for rain rate PDF.
+
+    Args:
+        datafile: string
+            A pixel filename to get the latitude/longitude arrays.
+        config: dictionary
+            Dictionary containing config parameters.
+        lon_bounds: list
+            Longitude bounds [min, max].
+        lat_bounds: list
+            Latitude bounds [min, max].
+        land_range: list
+            Land fraction range [min, max].
+        ocean_range: list
+            Ocean fraction range [min, max].
+
+    Returns:
+        land_mask: np.array
+            Land mask within the region.
+        ocean_mask: np.array
+            Ocean mask within the region.
+    """
+    ds = xr.open_dataset(datafile)
+    longitude = ds['longitude'].squeeze().load()
+    latitude = ds['latitude'].squeeze().load()
+    ds.close()
+
+    # Read landmask
+    dslm = xr.open_dataset(config['landmask_filename'])
+    landmask = dslm[config['landmask_varname']].squeeze().load()
+
+    # Create a mask for the region
+    region_mask = (longitude >= min(lon_bounds)) & (longitude <= max(lon_bounds)) & \
+                  (latitude >= min(lat_bounds)) & (latitude <= max(lat_bounds))
+    # Create mask for land & ocean
+    l_mask = (landmask >= min(land_range)) & (landmask <= max(land_range))
+    o_mask = (landmask >= min(ocean_range)) & (landmask <= max(ocean_range))
+    # Combine region and land/ocean masks
+    land_mask = (region_mask.data == True) & (l_mask.data == True)
+    ocean_mask = (region_mask.data == True) & (o_mask.data == True)
+    return land_mask, ocean_mask
+
+
+if __name__ == "__main__":
+
+    # Get the command-line arguments...
+    args_dict = parse_cmd_args()
+    config_file = args_dict.get('config_file')
+    products = args_dict.get('products')
+    extent = args_dict.get('extent')
+    run_parallel = args_dict.get('run_parallel')
+    n_workers = args_dict.get('n_workers')
+
+    for product in products:
+        if product not in reducer_dict:
+            sys.exit(f'Unknown product: {product}, valid products: {list(reducer_dict.keys())}')
+
+    # Get inputs from configuration file
+    config = load_config(config_file)
+    pixel_dir = config['pixeltracking_outpath']
+    pixel_filebase = config.get('pixeltracking_filebase', 'mcstrack_')
+    output_monthly_dir = config['stats_outpath'] + 'monthly/'
+    os.makedirs(output_monthly_dir, exist_ok=True)
+
+    # Find all pixel files in the months
+    month_list = pd.date_range(start=args_dict.get('start_month'), end=args_dict.get('end_month'), freq='MS')
+    datafiles = []
+    for imonth in month_list.strftime('%Y%m'):
+        mcsfiles = sorted(glob.glob(f'{pixel_dir}/{pixel_filebase}{imonth}*_*.nc'))
+        print(f'{imonth} number of files: {len(mcsfiles)}')
+        for ifile in mcsfiles:
+            datafiles.append((ifile, os.path.basename(ifile)[len(pixel_filebase):len(pixel_filebase)+8]))
+    nfiles = len(datafiles)
+    print(f'Number of files: {nfiles}')
+    if nfiles == 0:
+        sys.exit('No files found. Code exits.')
+
+    # If extent is not specified, use geolimit from config
+    if extent is None:
+        geolimits = config['geolimits']
+        # geolimits: [lat_min, lon_min, lat_max, lon_max]
+        lat_bounds = [geolimits[0], geolimits[2]]
+        lon_bounds = [geolimits[1], geolimits[3]]
+    else:
+        # extent: [lonmin, lonmax, latmin, latmax]
+        lon_bounds = [extent[0], extent[1]]
+        lat_bounds = [extent[2], extent[3]]
+
+    # Product options
+    options = {
+        'output_monthly_dir': output_monthly_dir,
+        'stats_dir': config['stats_outpath'],
+        'region': args_dict.get('region'),
+        'start_date': month_list[0].strftime('%Y%m%d'),
+        'end_date': (month_list[-1] + pd.offsets.MonthEnd(0)).strftime('%Y%m%d'),
+        'lon_bounds': lon_bounds,
+        'lat_bounds': lat_bounds,
+        'startlat': lat_bounds[0],
+        'endlat': lat_bounds[1],
+        'startlon': lon_bounds[0],
+        'endlon': lon_bounds[1],
+        'hov_pcpvarname': config.get('track_field_for_speed', 'precipitation'),
+    }
+    if 'rainpdf' in products:
+        land_range = args_dict.get('land')
+        ocean_range = args_dict.get('ocean')
+        if (land_range is None) | (ocean_range is None):
+            sys.exit('Land/ocean fraction ranges (-l, -o) are required for rainpdf.')
+        land_mask, ocean_mask = get_pdf_masks(datafiles[0][0], config, lon_bounds, lat_bounds,
+                                              land_range, ocean_range)
+        options.update({
+            # Set up the rain rate bins (linear)
+            'rrbins': np.arange(1, 201, 1),
+            'land_range': land_range,
+            'ocean_range': ocean_range,
+            'land_mask': land_mask,
+            'ocean_mask': ocean_mask,
+        })
+
+    # Split files into contiguous blocks
+    nblocks = n_workers if (run_parallel >= 1) else 1
+    nblocks = max(1, min(nblocks, nfiles))
+    block_bounds = np.linspace(0, nfiles, nblocks + 1).astype(int)
+    file_blocks = [datafiles[block_bounds[ii]:block_bounds[ii+1]] for ii in range(nblocks)]
+
+    if run_parallel == 0:
+        # Serial
+        partial = calc_products_block(file_blocks[0], products, options)
+    elif run_parallel == 1:
+        # Parallel: each worker reads a block of files, then partial results are tree-reduced
+        dask_tmp_dir = config.get('dask_tmp_dir', './')
+        dask.config.set({'temporary-directory': dask_tmp_dir})
+        cluster = LocalCluster(n_workers=n_workers, threads_per_worker=1)
+        client = Client(cluster)
+        partials = [dask.delayed(calc_products_block)(iblock, products, options) for iblock in file_blocks]
+        while len(partials) > 1:
+            partials = [
+                dask.delayed(merge_products)(partials[ii], partials[ii+1]) if (ii + 1 < len(partials))
+                else partials[ii]
+                for ii in range(0, len(partials), 2)
+            ]
+        partial = dask.compute(partials[0])[0]
+        client.close()
+        cluster.close()
+    else:
+        sys.exit('Valid parallelization flag not provided')
+
+    # Write outputs
+    for (product, period), state in sorted(partial.items()):
+        reducer_dict[product]['write'](state, period, options)
@@ -6,6 +6,8 @@ import numpy as np
 import pandas as pd
 import xarray as xr
 from netCDF4 import Dataset
+import dask
+from dask.distributed import Client, LocalCluster
 import sys, os
 import time, datetime, calendar, pytz
 from pyflextrkr.ft_utilities import load_config
@@ -62,6 +64,236 @@ def map_datetime2pixelfile(pixel_dir, mcs_pixelfilebase):
     }    
     return pixel_files, date_path_map
 
+def get_file_frames(date_path_map, base_time, tracks, frame_vars):
+    """
+    Group MCS track times by pixel file.
+
+    Args:
+        date_path_map: dictionary
+            Dictionary key by datetimes and value by pixel filenames.
+        base_time: np.array
+            Base time for each MCS and time step [nmcs, ntimes].
+        tracks: np.array
+            Track indices for each MCS [nmcs].
+        frame_vars: dictionary
+            Dictionary of stats variables for each MCS and time step [nmcs, ntimes].
+
+    Return:
+        file_frames: dictionary
+            Dictionary key by pixel filenames and value by a dictionary containing
+            MCS indices, track numbers, time indices and stats values in that file.
+    """
+    nmcs, ntimes = base_time.shape
+    file_pairs = {}
+    for imcs in range(nmcs):
+        for it in range(ntimes):
+            ibasetime = base_time[imcs, it]
+            if np.isnan(ibasetime):
+                continue
+            # Round off base_time to minute, then convert to Pandas Timestamp
+            iTimestamp = pd.to_datetime(ibasetime.astype('datetime64[m]'))
+            pixfname = date_path_map.get(iTimestamp, None)
+            # Check to make sure the basetime key exist in the dictionary before proceeding
+            if (pixfname is not None):
+                file_pairs.setdefault(pixfname, []).append((imcs, it))
+            else:
+                print(f'No pixel-file found: {iTimestamp}')
+
+    file_frames = {}
+    for pixfname, pairs in file_pairs.items():
+        imcs, it = np.array(pairs).T
+        frame = {
+            'imcs': imcs,
+            'it': it,
+            # Track numbers are offset by 1
+            'tracknumber': tracks[imcs] + 1,
+        }
+        for key, values in frame_vars.items():
+            frame[key] = values[imcs, it]
+        file_frames[pixfname] = frame
+    return file_frames
+
+
+def calc_statsmap_block(file_frames, ny, nx, nmcs, speed_exist):
+    """
+    Accumulate MCS statistics maps for a block of pixel files.
+
+    Each pixel file is read once, and the statistics of all MCS in that file
+    are mapped to their masks using track number lookup tables.
+
+    Args:
+        file_frames: list
+            List of (pixel filename, frame dictionary) from get_file_frames.
+        ny: int
+            Number of grids in y dimension.
+        nx: int
+            Number of grids in x dimension.
+        nmcs: int
+            Number of MCS.
+        speed_exist: bool
+            True if speed variables exist.
+
+    Return:
+        partial: dictionary
+            Dictionary containing partial sums, counts and MCS footprints.
+    """
+    sum_keys = ['ccsarea', 'pfarea', 'totalrain', 'totalrainheavy', 'rainrateheavy', 'rainratemax',
+                'pfspeed', 'uspeed', 'vspeed', 'pfspeed_mcs', 'uspeed_mcs', 'vspeed_mcs',
+                'nhour_ccs', 'nhour_pf', 'nhour_speedmcs', 'init_ccs']
+    partial = {key: np.zeros(ny * nx) for key in sum_keys}
+    footprint_ccs = []
+    footprint_pf = []
+    nframes = 0
+
+    for pixfname, frame in file_frames:
+        # Read pixel data
+        ds = Dataset(pixfname)
+        cloudtracknumber = np.ma.filled(ds.variables['cloudtracknumber'][0,:,:], 0).ravel()
+        pcptracknumber = np.ma.filled(ds.variables['pcptracknumber'][0,:,:], 0).ravel()
+        ds.close()
+
+        tracknumber = frame['tracknumber']
+        # A track would only appear once in a file, but process repeated tracks separately just in case
+        occurrence = np.zeros(len(tracknumber), dtype=int)
+        for ii in range(1, len(tracknumber)):
+            occurrence[ii] = np.count_nonzero(tracknumber[:ii] == tracknumber[ii])
+        for iocc in range(occurrence.max() + 1):
+            ipairs = np.nonzero(occurrence == iocc)[0]
+            # Lookup table from track number to frame pair index
+            lut = np.full(tracknumber.max() + 2, -1, dtype=int)
+            lut[tracknumber[ipairs]] = ipairs
+            idx_c = lookup_pair(cloudtracknumber, lut)
+            idx_p = lookup_pair(pcptracknumber, lut)
+            pix_c = np.nonzero(idx_c >= 0)[0]
+            pix_p = np.nonzero(idx_p >= 0)[0]
+            pair_c = idx_c[pix_c]
+            pair_p = idx_p[pix_p]
+
+            # Add stats values onto the map, missing values are not counted in the sums (same as nansum)
+            partial['ccsarea'][pix_c] += np.nan_to_num(frame['ccs_area'][pair_c])
+            partial['pfarea'][pix_p] += np.nan_to_num(frame['pf_area'][pair_p])
+            # Assign single PF value to the entire PF mask
+            partial['totalrain'][pix_p] += np.nan_to_num(frame['total_rain'][pair_p])
+            partial['totalrainheavy'][pix_p] += np.nan_to_num(frame['total_heavyrain'][pair_p])
+            partial['rainrateheavy'][pix_p] += np.nan_to_num(frame['rainrate_heavyrain'][pair_p])
+            partial['rainratemax'][pix_p] += np.nan_to_num(frame['maxrainrate'][pair_p])
+            if speed_exist:
+                partial['pfspeed'][pix_p] += np.nan_to_num(frame['speed'][pair_p])
+                partial['uspeed'][pix_p] += np.nan_to_num(frame['uspeed'][pair_p])
+                partial['vspeed'][pix_p] += np.nan_to_num(frame['vspeed'][pair_p])
+                # Keep speed if MCS status is met
+                is_mcs = frame['mcs_status'][pair_p] == 1
+                partial['pfspeed_mcs'][pix_p[is_mcs]] += np.nan_to_num(frame['speed'][pair_p[is_mcs]])
+                partial['uspeed_mcs'][pix_p[is_mcs]] += np.nan_to_num(frame['uspeed'][pair_p[is_mcs]])
+                partial['vspeed_mcs'][pix_p[is_mcs]] += np.nan_to_num(frame['vspeed'][pair_p[is_mcs]])
+                partial['nhour_speedmcs'][pix_p[is_mcs]] += 1
+            # If MCS start status is not a split and time step is == 0 (initiation)
+            partial['init_ccs'][pix_c[frame['initiation'][pair_c]]] += 1
+            partial['nhour_ccs'][pix_c] += 1
+            partial['nhour_pf'][pix_p] += 1
+
+            # Record MCS footprints as (pixel, MCS) codes
+            footprint_ccs.append(np.unique(pix_c * nmcs + frame['imcs'][pair_c]))
+            footprint_pf.append(np.unique(pix_p * nmcs + frame['imcs'][pair_p]))
+        nframes += len(tracknumber)
+
+    partial['footprint_ccs'] = np.unique(np.concatenate(footprint_ccs)) if len(footprint_ccs) > 0 \
+        else np.zeros(0, dtype=int)
+    partial['footprint_pf'] = np.unique(np.concatenate(footprint_pf)) if len(footprint_pf) > 0 \
+        else np.zeros(0, dtype=int)
+    partial['nframes'] = nframes
+    return partial
+
+
+def lookup_pair(tracknumber_map, lut):
+    """
+    Look up frame pair indices for a track number map.
+
+    Args:
+        tracknumber_map: np.array
+            Flattened track number map.
+        lut: np.array
+            Lookup table from track number to frame pair index (-1 for no MCS).
+
+    Return:
+        pair_index: np.array
+            Frame pair index for each pixel (-1 for no MCS).
+    """
+    valid = np.isfinite(tracknumber_map) & (tracknumber_map >= 1) & (tracknumber_map < len(lut))
+    pair_index = np.full(tracknumber_map.shape, -1, dtype=int)
+    pair_index[valid] = lut[tracknumber_map[valid].astype(int)]
+    return pair_index
+
+
+def merge_statsmap(partial1, partial2):
+    """
+    Merge two partial MCS statistics maps.
+
+    Args:
+        partial1: dictionary
+            Partial maps from calc_statsmap_block or merge_statsmap.
+        partial2: dictionary
+            Partial maps from calc_statsmap_block or merge_statsmap.
+
+    Return:
+        partial: dictionary
+            Merged partial maps.
+    """
+    partial = {}
+    for key in partial1.keys():
+        if key.startswith('footprint'):
+            partial[key] = np.union1d(partial1[key], partial2[key])
+        else:
+            partial[key] = partial1[key] + partial2[key]
+    return partial
+
+
+def grouped_nanpercentile(groups, values, percentiles, ngroups):
+    """
+    Calculate percentiles of values for each group (same as np.nanpercentile with linear interpolation).
+
+    Args:
+        groups: np.array
+            Group index for each value.
+        values: np.array
+            Values.
+        percentiles: list
+            Percentiles to calculate.
+        ngroups: int
+            Number of groups.
+
+    Return:
+        out: np.array
+            Percentiles for each group [npercentiles, ngroups], NaN for groups without values.
+    """
+    valid = ~np.isnan(values)
+    groups = groups[valid]
+    values = values[valid]
+    order = np.lexsort((values, groups))
+    values = values[order]
+    counts = np.bincount(groups, minlength=ngroups)
+    starts = np.cumsum(counts) - counts
+    has_value = counts > 0
+    counts = counts[has_value]
+    starts = starts[has_value]
+
+    out = np.full((len(percentiles), ngroups), np.nan)
+    for ip, pct in enumerate(percentiles):
+        quantile = pct / 100
+        # Virtual index and linear interpolation following numpy's default 'linear' method
+        virtual_index = (counts - 1) * quantile
+        previous_index = np.floor(virtual_index).astype(int)
+        next_index = np.minimum(previous_index + 1, counts - 1)
+        gamma = virtual_index - previous_index
+        lower = values[starts + previous_index]
+        upper = values[starts + next_index]
+        diff = upper - lower
+        result = lower + diff * gamma
+        result = np.where(gamma >= 0.5, upper - diff * (1 - gamma), result)
+        out[ip, has_value] = result
+    return out
+
+
 if __name__ == "__main__":
 
     # Get inputs from command line
@@ -152,180 +384,90 @@ if __name__ == "__main__":
     base_times = np.array([datetime_to_timestamp(t) for t in base_time.data.ravel()])
     base_times = np.reshape(base_times, base_time.shape)
 
-    # Create variables for maps
-    nt_uniq = len(np.unique(base_times))
-    map_lifetime_all = np.zeros((nmcs, ny, nx))*np.NAN
-    map_ccsarea = np.zeros((ny, nx))
-    map_pfarea = np.zeros((ny, nx))
-    map_rainrateheavy = np.zeros((ny, nx))
-    map_rainratemax = np.zeros((ny, nx))
-    map_totalrainheavy = np.zeros((ny, nx))
-    map_totalrain = np.zeros((ny, nx))
-    map_nhour_ccs = np.zeros((ny, nx))
-    map_nhour_pf = np.zeros((ny, nx))
-    map_nmcs_ccs = np.zeros((ny, nx))
-    map_nmcs_pf = np.zeros((ny, nx))
-    map_init_ccs = np.zeros((ny, nx))
-    map_pfspeed = np.zeros((ny, nx))
-    map_uspeed = np.zeros((ny, nx))
-    map_vspeed = np.zeros((ny, nx))
-    map_pfspeed_mcs = np.zeros((ny, nx))
-    map_uspeed_mcs = np.zeros((ny, nx))
-    map_vspeed_mcs = np.zeros((ny, nx))
-    map_nhour_speedmcs = np.zeros((ny, nx))
-
-    nframes = 0
-
-    # Loop over each MCS track
-    for imcs in range(nmcs):
-        # Track numbers are offset by 1
-        itrack = tracks.values[imcs] + 1
-        iduration = stats['track_duration'].data[imcs]
-        ilifetime = lifetime.values[imcs]
-        istartstatus = start_status.values[imcs]
-        istart_splitcloudnumber = start_split_cloudnumber[imcs]
-        print(f'Track number: {itrack}')
-        
-        temp_track = np.zeros((ny, nx))*np.nan
-        temp_nmcs_ccs = np.zeros((ny, nx))
-        temp_nmcs_pf = np.zeros((ny, nx))
-        
-        # Loop over each time up to the track duration
-        for it in range(iduration):
-            imcsstatus = mcs_status.values[imcs,it]
-            ibasetime = base_time.data[imcs, it]
-
-            # Round off base_time to minute, then convert to Pandas Timestamp
-            iTimestamp = pd.to_datetime(ibasetime.astype('datetime64[m]'))
-            
-            if np.isnan(ibasetime):
-                continue
-            else:
-                pixfname = date_path_map.get(iTimestamp, None)
-
-            # Check to make sure the basetime key exist in the dictionary before proceeding
-            if (pixfname is not None):
-                # print(pixfname)
-                
-                # Read pixel data
-                ds = Dataset(pixfname)
-                cloudtracknumber = ds.variables['cloudtracknumber'][0,:,:]
-                pcptracknumber = ds.variables['pcptracknumber'][0,:,:]
-                # Find cloudnumber matching the current one
-                idx_c = cloudtracknumber == itrack
-                idx_p = pcptracknumber == itrack
-                npix_c = np.count_nonzero(idx_c)
-                npix_p = np.count_nonzero(idx_p)
-                
-                # Set each frame with a number
-                # This is suitable for variables that change with time. e.g. PF area
-                # Get values from stats variables
-                iccsarea = ccs_area.values[imcs, it]
-                ipfarea = pf_area.values[imcs, it]
-                itotalrain = total_rain.values[imcs, it]
-                iheavyrain = total_heavyrain.values[imcs, it]
-                irainrateheavy = rainrate_heavyrain.values[imcs, it]
-                # Get max rain rate from all PFs
-                imaxrainrate = np.nanmax(pf_maxrainrate.values[imcs, it, :])
-
-                # Put stats value onto the map
-                temp_c = np.full((ny, nx), np.NAN)
-                temp_p = np.full((ny, nx), np.NAN)
-                temp_totalrain = np.full((ny, nx), np.NAN)
-                temp_totalrainheavy = np.full((ny, nx), np.NAN)
-                temp_rainrateheavy = np.full((ny, nx), np.NAN)
-                temp_rainratemax = np.full((ny, nx), np.NAN)
-                temp_pfspeed = np.full((ny, nx), np.NAN)
-                temp_uspeed = np.full((ny, nx), np.NAN)
-                temp_vspeed = np.full((ny, nx), np.NAN)
-
-                temp_c[idx_c] = iccsarea
-                temp_p[idx_p] = ipfarea
-                
-                # Assign single PF value to the entire PF mask
-                # This is to increase area for certain extreme statistics (e.g. max rain rate)
-                # to make results less noisy. Absolute location wise this is just an approximation.
-                temp_totalrain[idx_p] = itotalrain
-                temp_totalrainheavy[idx_p] = iheavyrain
-                temp_rainrateheavy[idx_p] = irainrateheavy
-                temp_rainratemax[idx_p] = imaxrainrate
-                # The following gives more precise location mapping
-                # Use PF mask as proxy location to map core values
-                if speed_exist:
-                    ispeed = speed.values[imcs, it]
-                    iuspeed = uspeed.values[imcs, it]
-                    ivspeed = vspeed.values[imcs, it]
-                    temp_pfspeed[idx_p] = ispeed
-                    temp_uspeed[idx_p] = iuspeed
-                    temp_vspeed[idx_p] = ivspeed
-                
-                # If MCS start status is not a split, check for initiation/genesis
-                if (np.isnan(istart_splitcloudnumber)):
-                    # If time step is == 0 (initiation)
-                    if (it == 0):
-                        map_init_ccs[idx_c] += 1
-
-                # Keep speed if MCS status is met
-                if (speed_exist == True) & (imcsstatus == 1):
-                    temp_map_pfspeed_mcs = np.copy(map_pfspeed_mcs)
-                    temp_map_uspeed_mcs = np.copy(map_uspeed_mcs)
-                    temp_map_vspeed_mcs = np.copy(map_vspeed_mcs)
-                    map_pfspeed_mcs[:,:] = np.nansum(np.dstack((temp_map_pfspeed_mcs, temp_pfspeed)), axis=2)
-                    map_uspeed_mcs[:,:] = np.nansum(np.dstack((temp_map_uspeed_mcs, temp_uspeed)), axis=2)
-                    map_vspeed_mcs[:,:] = np.nansum(np.dstack((temp_map_vspeed_mcs, temp_vspeed)), axis=2)
-                    map_nhour_speedmcs[idx_p] += 1
-                        
-                # Make a temporary copy of the output array
-                temp_map_ccsarea = np.copy(map_ccsarea)
-                temp_map_pfarea = np.copy(map_pfarea)
-                temp_map_totalrain = np.copy(map_totalrain)
-                temp_map_totalrainheavy = np.copy(map_totalrainheavy)
-                temp_map_rainrateheavy = np.copy(map_rainrateheavy)
-                temp_map_rainratemax = np.copy(map_rainratemax)
-
-                # Stack two arrays and use nansum, then save it back to output array
-                map_ccsarea[:,:] = np.nansum(np.dstack((temp_map_ccsarea, temp_c)), axis=2)
-                map_pfarea[:,:] = np.nansum(np.dstack((temp_map_pfarea, temp_p)), axis=2)
-
-                map_totalrain[:,:] = np.nansum(np.dstack((temp_map_totalrain, temp_totalrain)), axis=2)
-                map_totalrainheavy[:,:] = np.nansum(np.dstack((temp_map_totalrainheavy, temp_totalrainheavy)), axis=2)
-                map_rainrateheavy[:,:] = np.nansum(np.dstack((temp_map_rainrateheavy, temp_rainrateheavy)), axis=2)
-                map_rainratemax[:,:] = np.nansum(np.dstack((temp_map_rainratemax, temp_rainratemax)), axis=2)
-                
-                if speed_exist:
-                    temp_map_pfspeed = np.copy(map_pfspeed)
-                    temp_map_uspeed = np.copy(map_uspeed)
-                    temp_map_vspeed = np.copy(map_vspeed)
-                    map_pfspeed[:,:] = np.nansum(np.dstack((temp_map_pfspeed, temp_pfspeed)), axis=2)
-                    map_uspeed[:,:] = np.nansum(np.dstack((temp_map_uspeed, temp_uspeed)), axis=2)
-                    map_vspeed[:,:] = np.nansum(np.dstack((temp_map_vspeed, temp_vspeed)), axis=2)
-
-                map_nhour_ccs[idx_c] += 1
-                map_nhour_pf[idx_p] += 1
-                
-                # Set all pixels to the track number, this is a mask for the entire duration of the MCS
-                temp_track[idx_c] = itrack
-                temp_nmcs_ccs[idx_c] = 1
-                temp_nmcs_pf[idx_p] = 1
-
-                nframes+=1
-                
-                ds.close()
-            else:
-                print(f'No pixel-file found: {base_times[imcs, it]}')
-
-        # Set the entire track map to a single value
-        # This is suitable for mapping single value variables such as lifetime
-        temp_track[np.where(temp_track == itrack)] = ilifetime
-        
-        # Save value to output map
-        map_lifetime_all[imcs,:,:] = temp_track[:,:]
-        # Add the count for the number of MCS 
-        map_nmcs_ccs[:,:] += temp_nmcs_ccs[:,:]
-        map_nmcs_pf[:,:] += temp_nmcs_pf[:,:]
-
+    # Stats variables for each MCS and time step
+    frame_vars = {
+        'ccs_area': ccs_area.values,
+        'pf_area': pf_area.values,
+        'total_rain': total_rain.values,
+        'total_heavyrain': total_heavyrain.values,
+        'rainrate_heavyrain': rainrate_heavyrain.values,
+        # Get max rain rate from all PFs
+        'maxrainrate': np.nanmax(pf_maxrainrate.values, axis=2),
+        'mcs_status': mcs_status.values,
+        # If MCS start status is not a split, time step == 0 is initiation/genesis
+        'initiation': np.isnan(start_split_cloudnumber.values)[:, None] & (np.arange(ntimes) == 0)[None, :],
+    }
+    if speed_exist:
+        frame_vars['speed'] = speed.values
+        frame_vars['uspeed'] = uspeed.values
+        frame_vars['vspeed'] = vspeed.values
+
+    # Group MCS times by pixel file, so that each pixel file is read only once
+    file_frames = get_file_frames(date_path_map, base_time.data, tracks.values, frame_vars)
+    file_frames = sorted(file_frames.items())
+    print(f'Number of pixel files with MCS: {len(file_frames)}')
+
+    # Split pixel files into blocks
+    run_parallel = config.get('run_parallel', 0)
+    n_workers = config.get('nprocesses', 1)
+    nblocks = n_workers if (run_parallel >= 1) else 1
+    nblocks = max(1, min(nblocks, len(file_frames)))
+    block_bounds = np.linspace(0, len(file_frames), nblocks + 1).astype(int)
+    file_blocks = [file_frames[block_bounds[ii]:block_bounds[ii+1]] for ii in range(nblocks)]
+
+    if run_parallel == 0:
+        # Serial
+        partial = calc_statsmap_block(file_blocks[0], ny, nx, nmcs, speed_exist)
+    elif run_parallel == 1:
+        # Parallel: accumulate each block, then tree-reduce the partial maps
+        dask_tmp_dir = config.get('dask_tmp_dir', './')
+        dask.config.set({'temporary-directory': dask_tmp_dir})
+        cluster = LocalCluster(n_workers=n_workers, threads_per_worker=1)
+        client = Client(cluster)
+        partials = [
+            dask.delayed(calc_statsmap_block)(iblock, ny, nx, nmcs, speed_exist) for iblock in file_blocks
+        ]
+        while len(partials) > 1:
+            partials = [
+                dask.delayed(merge_statsmap)(partials[ii], partials[ii+1]) if (ii + 1 < len(partials))
+                else partials[ii]
+                for ii in range(0, len(partials), 2)
+            ]
+        partial = dask.compute(partials[0])[0]
+        client.close()
+        cluster.close()
+    else:
+        sys.exit('Valid parallelization flag not provided')
+
+    nframes = partial['nframes']
+    map_ccsarea = partial['ccsarea'].reshape(ny, nx)
+    map_pfarea = partial['pfarea'].reshape(ny, nx)
+    map_rainrateheavy = partial['rainrateheavy'].reshape(ny, nx)
+    map_rainratemax = partial['rainratemax'].reshape(ny, nx)
+    map_totalrainheavy = partial['totalrainheavy'].reshape(ny, nx)
+    map_totalrain = partial['totalrain'].reshape(ny, nx)
+    map_nhour_ccs = partial['nhour_ccs'].reshape(ny, nx)
+    map_nhour_pf = partial['nhour_pf'].reshape(ny, nx)
+    map_init_ccs = partial['init_ccs'].reshape(ny, nx)
+    map_pfspeed = partial['pfspeed'].reshape(ny, nx)
+    map_uspeed = partial['uspeed'].reshape(ny, nx)
+    map_vspeed = partial['vspeed'].reshape(ny, nx)
+    map_pfspeed_mcs = partial['pfspeed_mcs'].reshape(ny, nx)
+    map_uspeed_mcs = partial['uspeed_mcs'].reshape(ny, nx)
+    map_vspeed_mcs = partial['vspeed_mcs'].reshape(ny, nx)
+    map_nhour_speedmcs = partial['nhour_speedmcs'].reshape(ny, nx)
+
+    # Count the number of MCS at each pixel from the MCS footprints
+    map_nmcs_ccs = np.bincount(partial['footprint_ccs'] // max(nmcs, 1), minlength=ny*nx).reshape(ny, nx).astype(float)
+    map_nmcs_pf = np.bincount(partial['footprint_pf'] // max(nmcs, 1), minlength=ny*nx).reshape(ny, nx).astype(float)
+
+    # Map lifetime to the entire footprint of each MCS
+    # This is suitable for mapping single value variables such as lifetime
+    footprint_pix = partial['footprint_ccs'] // max(nmcs, 1)
+    footprint_lifetime = lifetime.values[partial['footprint_ccs'] % max(nmcs, 1)]
     percentiles = [50,75,90,95]
-    map_lifetime_pts = np.nanpercentile(map_lifetime_all, percentiles, axis=0)
+    map_lifetime_pts = grouped_nanpercentile(footprint_pix, footprint_lifetime, percentiles, ny*nx)
+    map_lifetime_pts = map_lifetime_pts.reshape(len(percentiles), ny, nx)
 
     # Calculate conditional mean (divide sum by total number of hours at each pixel)
     map_ccsarea_avg = map_ccsarea / map_nhour_ccs
@@ -343,7 +485,10 @@ if __name__ == "__main__":
     map_vspeed_avg = map_vspeed / map_nhour_pf
     map_vspeed_mcs_avg = map_vspeed_mcs / map_nhour_speedmcs
 
-    map_lifetime_avg = np.nanmean(map_lifetime_all, axis=0)
+    valid_lifetime = ~np.isnan(footprint_lifetime)
+    map_lifetime_sum = np.bincount(footprint_pix[valid_lifetime], weights=footprint_lifetime[valid_lifetime], minlength=ny*nx)
+    map_lifetime_count = np.bincount(footprint_pix[valid_lifetime], minlength=ny*nx)
+    map_lifetime_avg = (map_lifetime_sum / map_lifetime_count).reshape(ny, nx)
 
 
     # Compute Epoch Time for the month
@@ -18,6 +18,7 @@ if __name__ == '__main__':
     times_dimname = config["times_dimname"]
     fillval = config["fillval"]
     fillval_f = np.nan
+    ntracks_per_block = config.get("dense_ntracks_per_block", 10000)
 
     # Get dimensions and indices variable names
     max_trackduration = int(max(duration_range))
@@ -43,6 +44,7 @@ if __name__ == '__main__':
         times_dimname,
         fillval,
         fillval_f,
+        ntracks_per_block=ntracks_per_block,
     )
     print(f"{trackstats_dense_file}")
 
@@ -0,0 +1,367 @@
+"""
+Generate synthetic storm input files for tracking benchmarks.
+
+Storms are moving, growing and decaying circular features with a prescribed lifetime.
+A fraction of the storms split from or merge into another storm. The same storm
+table always produces the same files for a given random seed.
+
+Output files (one file per time):
+    Tb + precipitation (MCS tracking): {basename}yyyymodd.hhmmss.nc
+        Variables: Tb [K], PR [mm/h] on (time, yc, xc) with 1D lon/lat coordinates.
+    3D reflectivity (cell tracking, optional): radar/{basename}yyyymodd.hhmmss.nc
+        Variables: reflectivity [dBZ] on (time, z, y, x) in the gridded radar format.
+    Storm table: storms_{basename}.csv
+
+Usage:
+    python make_synthetic_storms.py -o OUTPUT_DIR --nx 400 --ny 300 --ntimes 48 --nstorms 20
+"""
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+import xarray as xr
+from multiprocessing import Pool
+
+#-----------------------------------------------------------------------
+def parse_cmd_args():
+    # Define and retrieve the command-line arguments...
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic storm Tb/precipitation (and 3D reflectivity) files for tracking benchmarks."
+    )
+    parser.add_argument("-o", "--outdir", help="output directory", required=True)
+    parser.add_argument("--basename", help="output file basename", default="synthetic_")
+    parser.add_argument("--nx", help="number of grid points in x", type=int, default=400)
+    parser.add_argument("--ny", help="number of grid points in y", type=int, default=300)
+    parser.add_argument("--ntimes", help="number of time frames", type=int, default=48)
+    parser.add_argument("--nstorms", help="number of storms", type=int, default=20)
+    parser.add_argument("--dx", help="grid spacing [km]", type=float, default=10.0)
+    parser.add_argument("--dt", help="time interval [minute]", type=float, default=60.0)
+    parser.add_argument("--start", help="first time, format=YYYY-mm-ddTHH:MM", default="2020-01-01T00:00")
+    parser.add_argument("--speed", help="mean storm speed [m/s]", type=float, default=12.0)
+    parser.add_argument("--radius", help="min/max storm radius [km]", type=float, nargs=2, default=[100., 250.])
+    parser.add_argument("--lifetime", help="min/max storm lifetime [hour]", type=float, nargs=2, default=[6., 24.])
+    parser.add_argument("--mergesplit", help="fraction of storms that merge or split", type=float, default=0.3)
+    parser.add_argument("--reflectivity", help="also write 3D reflectivity files", action="store_true")
+    parser.add_argument("--nz", help="number of vertical levels for 3D reflectivity", type=int, default=30)
+    parser.add_argument("--dz", help="vertical grid spacing for 3D reflectivity [m]", type=float, default=500.)
+    parser.add_argument("--seed", help="random seed", type=int, default=0)
+    parser.add_argument("-n", "--nprocesses", help="number of processes to write files", type=int, default=1)
+    args = parser.parse_args()
+    return vars(args)
+
+#-----------------------------------------------------------------------
+def make_storm_table(params):
+    """
+    Make a table of storm tracks.
+
+    Args:
+        params: dictionary
+            Generator parameters (see parse_cmd_args).
+
+    Returns:
+        storms: pandas.DataFrame
+            Storm table with start/end time index, position at start time [grid point],
+            velocity [grid point/frame], maximum radius [grid point], minimum Tb [K],
+            maximum rain rate [mm/h], kind ('single', 'split', 'merge') and parent storm index.
+    """
+    rng = np.random.default_rng(params["seed"])
+    nx, ny, ntimes, nstorms = params["nx"], params["ny"], params["ntimes"], params["nstorms"]
+    dx_m = params["dx"] * 1000.
+    dt_s = params["dt"] * 60.
+    # Convert units to grid point and frame
+    speed = params["speed"] * dt_s / dx_m
+    rmin, rmax = np.array(params["radius"]) / params["dx"]
+    lmin = max(2, int(round(params["lifetime"][0] * 60. / params["dt"])))
+    lmax = max(lmin, int(round(params["lifetime"][1] * 60. / params["dt"])))
+
+    nmergesplit = int(round(params["mergesplit"] * nstorms))
+    nsingle = max(1, nstorms - nmergesplit)
+    nmergesplit = nstorms - nsingle
+
+    # Storms that are born and die on their own
+    lifetime = rng.integers(lmin, lmax + 1, size=nsingle)
+    t_start = rng.integers(0, max(1, ntimes - 1), size=nsingle)
+    # Mostly eastward motion with some spread in direction and speed
+    angle = rng.normal(0., np.deg2rad(30.), size=nsingle)
+    spd = speed * rng.uniform(0.5, 1.5, size=nsingle)
+    storms = {
+        "t_start": t_start,
+        "t_end": np.minimum(t_start + lifetime - 1, ntimes - 1),
+        "x0": rng.uniform(0, nx, size=nsingle),
+        "y0": rng.uniform(0, ny, size=nsingle),
+        "u": spd * np.cos(angle),
+        "v": spd * np.sin(angle),
+        "rmax": rng.uniform(rmin, rmax, size=nsingle),
+        "tbmin": rng.uniform(185., 200., size=nsingle),
+        "pmax": rng.uniform(20., 60., size=nsingle),
+        "kind": np.full(nsingle, "single", dtype=object),
+        "parent": np.full(nsingle, -1),
+    }
+    storms = {key: list(value) for key, value in storms.items()}
+
+    # Storms that split from or merge into a single storm (parent lasting at least 3 frames)
+    parents = np.nonzero((np.array(storms["t_end"]) - np.array(storms["t_start"])) >= 2)[0]
+    for ii in range(0, nmergesplit if len(parents) > 0 else 0):
+        ip = rng.choice(parents)
+        p_start, p_end = storms["t_start"][ip], storms["t_end"][ip]
+        p_u, p_v = storms["u"][ip], storms["v"][ip]
+        # Child moves away from (or toward) the parent in the cross-track direction
+        side = rng.choice([-1., 1.])
+        c_u = p_u - side * 0.7 * p_v
+        c_v = p_v + side * 0.7 * p_u
+        c_lifetime = int(rng.integers(lmin, lmax + 1))
+        # Event time: the child starts (split) or ends (merge) at the parent position
+        t_event = int(rng.integers(p_start + 1, p_end + 1))
+        xp = storms["x0"][ip] + p_u * (t_event - p_start)
+        yp = storms["y0"][ip] + p_v * (t_event - p_start)
+        if rng.uniform() < 0.5:
+            kind = "split"
+            c_start = t_event
+            c_end = min(t_event + c_lifetime - 1, ntimes - 1)
+            x0, y0 = xp, yp
+        else:
+            kind = "merge"
+            c_start = max(t_event - c_lifetime + 1, 0)
+            c_end = t_event
+            x0 = xp - c_u * (c_end - c_start)
+            y0 = yp - c_v * (c_end - c_start)
+        storms["t_start"].append(c_start)
+        storms["t_end"].append(c_end)
+        storms["x0"].append(x0)
+        storms["y0"].append(y0)
+        storms["u"].append(c_u)
+        storms["v"].append(c_v)
+        storms["rmax"].append(0.6 * storms["rmax"][ip])
+        storms["tbmin"].append(rng.uniform(185., 200.))
+        storms["pmax"].append(rng.uniform(20., 60.))
+        storms["kind"].append(kind)
+        storms["parent"].append(ip)
+
+    storms = pd.DataFrame(storms)
+    storms.index.name = "storm"
+    return storms
+
+#-----------------------------------------------------------------------
+def get_storm_windows(storms, itime, nx, ny):
+    """
+    Get the position, radius and grid window of the storms active at a time.
+
+    Args:
+        storms: pandas.DataFrame
+            Storm table from make_storm_table.
+        itime: int
+            Time index.
+        nx: int
+            Number of grid points in x.
+        ny: int
+            Number of grid points in y.
+
+    Returns:
+        windows: list
+            List of (storm row, xc, yc, radius, y slice, x slice) for each active storm.
+    """
+    windows = []
+    active = storms[(storms["t_start"] <= itime) & (storms["t_end"] >= itime)]
+    for row in active.itertuples():
+        nlife = row.t_end - row.t_start + 1
+        istep = itime - row.t_start
+        # Grow and decay over the lifetime
+        radius = row.rmax * np.sin(np.pi * (istep + 1) / (nlife + 1))
+        xc = row.x0 + row.u * istep
+        yc = row.y0 + row.v * istep
+        x0, x1 = max(int(np.floor(xc - radius)), 0), min(int(np.ceil(xc + radius)) + 1, nx)
+        y0, y1 = max(int(np.floor(yc - radius)), 0), min(int(np.ceil(yc + radius)) + 1, ny)
+        if (radius < 1) | (x0 >= x1) | (y0 >= y1):
+            continue
+        windows.append((row, xc, yc, radius, slice(y0, y1), slice(x0, x1)))
+    return windows
+
+#-----------------------------------------------------------------------
+def get_normalized_distance(xc, yc, radius, yslice, xslice):
+    """
+    Distance from the storm center normalized by the storm radius in a grid window.
+
+    Returns:
+        dist: np.ndarray
+            Normalized distance in the window.
+    """
+    yy = np.arange(yslice.start, yslice.stop, dtype=np.float32)[:, None]
+    xx = np.arange(xslice.start, xslice.stop, dtype=np.float32)[None, :]
+    return np.sqrt((xx - xc)**2 + (yy - yc)**2) / radius
+
+#-----------------------------------------------------------------------
+def make_tbpcp_frame(storms, itime, params):
+    """
+    Make Tb and precipitation fields for a time.
+
+    Args:
+        storms: pandas.DataFrame
+            Storm table from make_storm_table.
+        itime: int
+            Time index.
+        params: dictionary
+            Generator parameters.
+
+    Returns:
+        tb: np.ndarray
+            Brightness temperature [K].
+        pcp: np.ndarray
+            Precipitation rate [mm/h].
+    """
+    nx, ny = params["nx"], params["ny"]
+    rng = np.random.default_rng([params["seed"], itime])
+    # Clear-sky background with small noise
+    tb = (285. + rng.uniform(-1., 1., size=(ny, nx))).astype(np.float32)
+    pcp = np.zeros((ny, nx), dtype=np.float32)
+    for row, xc, yc, radius, yslice, xslice in get_storm_windows(storms, itime, nx, ny):
+        dist = get_normalized_distance(xc, yc, radius, yslice, xslice)
+        # Tb increases from the storm minimum at the center to the background at the edge
+        itb = row.tbmin + (285. - row.tbmin) * np.minimum(dist, 1.)**2
+        tb[yslice, xslice] = np.minimum(tb[yslice, xslice], itb)
+        # Rain is concentrated in the inner part of the storm
+        ipcp = np.where(dist < 1., row.pmax * np.exp(-(dist / 0.35)**2), 0.)
+        pcp[yslice, xslice] = np.maximum(pcp[yslice, xslice], ipcp)
+    return tb, pcp
+
+#-----------------------------------------------------------------------
+def make_reflectivity_frame(storms, itime, params):
+    """
+    Make a 3D reflectivity field for a time.
+
+    Args:
+        storms: pandas.DataFrame
+            Storm table from make_storm_table.
+        itime: int
+            Time index.
+        params: dictionary
+            Generator parameters.
+
+    Returns:
+        dbz: np.ndarray
+            Reflectivity [dBZ] (NaN for no echo).
+    """
+    nx, ny, nz = params["nx"], params["ny"], params["nz"]
+    height = (np.arange(nz, dtype=np.float32) * params["dz"] + params["dz"])[:, None, None]
+    dbz = np.full((nz, ny, nx), np.nan, dtype=np.float32)
+    for row, xc, yc, radius, yslice, xslice in get_storm_windows(storms, itime, nx, ny):
+        dist = get_normalized_distance(xc, yc, radius, yslice, xslice)
+        # Column maximum reflectivity and echo-top height peak at the storm center
+        dbz_max = 10. + (row.pmax - 10.) * np.exp(-(dist / 0.3)**2)
+        echotop = 2000. + 12000. * np.exp(-(dist / 0.4)**2)
+        # Reflectivity is constant in the lower half of the column and decreases to 0 at the echo top
+        frac = np.clip(2. * (1. - height / echotop), 0., 1.)
+        idbz = np.where((dist < 1.) & (height <= echotop), dbz_max * frac, np.nan)
+        dbz[:, yslice, xslice] = np.fmax(dbz[:, yslice, xslice], idbz)
+    return dbz
+
+#-----------------------------------------------------------------------
+def write_frame(task):
+    """
+    Write the synthetic files for a time.
+
+    Args:
+        task: tuple
+            (time index, time, storm table, generator parameters)
+
+    Returns:
+        outfile: string
+            Tb/precipitation output filename.
+    """
+    itime, time, storms, params = task
+    nx, ny = params["nx"], params["ny"]
+    dx = params["dx"]
+    timestring = time.strftime("%Y%m%d.%H%M%S")
+    # Regular lat/lon grid centered at the equator
+    lon = ((np.arange(nx) - nx / 2) * dx / 111.32).astype(np.float32)
+    lat = ((np.arange(ny) - ny / 2) * dx / 111.32).astype(np.float32)
+    comp = dict(zlib=True, dtype="float32")
+
+    # Tb + precipitation file
+    tb, pcp = make_tbpcp_frame(storms, itime, params)
+    dsout = xr.Dataset(
+        {
+            "Tb": (["time", "yc", "xc"], tb[None, :, :], {"long_name": "Brightness temperature", "units": "K"}),
+            "PR": (["time", "yc", "xc"], pcp[None, :, :], {"long_name": "Precipitation rate", "units": "mm/h"}),
+        },
+        coords={
+            "time": (["time"], [np.datetime64(time, "ns")]),
+            "lon": (["xc"], lon, {"long_name": "Longitude", "units": "degrees_east"}),
+            "lat": (["yc"], lat, {"long_name": "Latitude", "units": "degrees_north"}),
+        },
+        attrs={"title": "Synthetic storms for tracking benchmarks", "seed": params["seed"]},
+    )
+    outfile = f"{params['outdir']}/{params['basename']}{timestring}.nc"
+    dsout.to_netcdf(path=outfile, mode="w", format="NETCDF4", unlimited_dims="time",
+                    encoding={var: comp for var in dsout.data_vars})
+
+    # 3D reflectivity file in the gridded radar format
+    if params["reflectivity"]:
+        dbz = make_reflectivity_frame(storms, itime, params)
+        x = (np.arange(nx) - nx / 2) * dx * 1000.
+        y = (np.arange(ny) - ny / 2) * dx * 1000.
+        z = np.arange(params["nz"]) * params["dz"] + params["dz"]
+        lon2d, lat2d = np.meshgrid(lon, lat)
+        dsout = xr.Dataset(
+            {
+                "reflectivity": (["time", "z", "y", "x"], dbz[None, :, :, :],
+                                 {"long_name": "Reflectivity", "units": "dBZ"}),
+                "point_longitude": (["y", "x"], lon2d, {"units": "degrees_east"}),
+                "point_latitude": (["y", "x"], lat2d, {"units": "degrees_north"}),
+                "origin_longitude": ([], 0., {"units": "degrees_east"}),
+                "origin_latitude": ([], 0., {"units": "degrees_north"}),
+                "alt": ([], 0., {"units": "m"}),
+            },
+            coords={
+                "time": (["time"], [np.datetime64(time, "ns")]),
+                "z": (["z"], z, {"units": "m"}),
+                "y": (["y"], y, {"units": "m"}),
+                "x": (["x"], x, {"units": "m"}),
+            },
+        )
+        radar_outfile = f"{params['outdir']}/radar/{params['basename']}{timestring}.nc"
+        dsout.to_netcdf(path=radar_outfile, mode="w", format="NETCDF4", unlimited_dims="time",
+                        encoding={"reflectivity": comp})
+    return outfile
+
+#-----------------------------------------------------------------------
+def make_synthetic_storms(params):
+    """
+    Generate the storm table and write all synthetic files.
+
+    Args:
+        params: dictionary
+            Generator parameters (see parse_cmd_args).
+
+    Returns:
+        times: pandas.DatetimeIndex
+            Times of the output files.
+    """
+    os.makedirs(params["outdir"], exist_ok=True)
+    if params["reflectivity"]:
+        os.makedirs(f"{params['outdir']}/radar", exist_ok=True)
+    times = pd.date_range(start=params["start"], periods=params["ntimes"], freq=f"{params['dt']}min")
+    storms = make_storm_table(params)
+    storms.to_csv(f"{params['outdir']}/storms_{params['basename'].rstrip('_')}.csv")
+    print(f"Number of storms: {len(storms)} (split: {np.sum(storms['kind'] == 'split')}, "
+          f"merge: {np.sum(storms['kind'] == 'merge')})")
+
+    tasks = [(itime, times[itime], storms, params) for itime in range(0, params["ntimes"])]
+    if params["nprocesses"] > 1:
+        pool = Pool(params["nprocesses"])
+        for outfile in pool.imap_unordered(write_frame, tasks):
+            pass
+        pool.close()
+        pool.join()
+    else:
+        for task in tasks:
+            write_frame(task)
+    print(f"Output files: {params['ntimes']} in {params['outdir']}")
+    return times
+
+
+if __name__ == "__main__":
+    params = parse_cmd_args()
+    if params["ntimes"] < 2:
+        sys.exit("At least 2 time frames are needed.")
+    make_synthetic_storms(params)
@@ -0,0 +1,287 @@
+"""
+Run end-to-end tracking benchmarks on synthetic storms.
+
+Generates synthetic input files (make_synthetic_storms.py), creates a config from the
+example configs, runs the tracking runscript with profiling enabled, and writes the
+per-step wall time and peak memory to benchmark_{workflow}.json in the output directory.
+Results can be compared with a previous benchmark file to catch performance regressions.
+
+Workflows:
+    mcs_tbpf: MCS tracking with Tb + precipitation (runscripts/run_mcs_tbpf.py)
+    cell: Convective cell tracking with 3D reflectivity (runscripts/run_celltracking.py)
+
+Usage:
+    python run_benchmark.py -w mcs_tbpf -o BENCHMARK_DIR -n 4
+    python run_benchmark.py -w mcs_tbpf -o BENCHMARK_DIR -n 4 --nx 2000 --ny 1500 --nstorms 200
+    python run_benchmark.py -w cell -o BENCHMARK_DIR --baseline OLD_DIR/benchmark_cell.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import platform
+import yaml
+from make_synthetic_storms import make_synthetic_storms
+
+# Repository root directory
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default generator parameters, runscript and example config for each workflow
+workflows = {
+    "mcs_tbpf": {
+        "runscript": "runscripts/run_mcs_tbpf.py",
+        "config": "config/config_mcs_idealized.yml",
+        "generator": {
+            "nx": 400, "ny": 300, "ntimes": 48, "nstorms": 20, "dx": 10.0, "dt": 60.0,
+            "speed": 12.0, "radius": [100., 250.], "lifetime": [6., 24.], "mergesplit": 0.3,
+            "reflectivity": False,
+        },
+    },
+    "cell": {
+        "runscript": "runscripts/run_celltracking.py",
+        "config": "config/config_nexrad500m_example.yml",
+        "generator": {
+            "nx": 200, "ny": 200, "ntimes": 36, "nstorms": 30, "dx": 1.0, "dt": 5.0,
+            "speed": 10.0, "radius": [4., 15.], "lifetime": [0.5, 2.], "mergesplit": 0.3,
+            "reflectivity": True,
+        },
+    },
+}
+
+#-----------------------------------------------------------------------
+def parse_cmd_args():
+    # Define and retrieve the command-line arguments...
+    parser = argparse.ArgumentParser(
+        description="Run end-to-end tracking benchmarks on synthetic storms."
+    )
+    parser.add_argument("-w", "--workflow", help="benchmark workflow", choices=list(workflows.keys()),
+                        default="mcs_tbpf")
+    parser.add_argument("-o", "--outdir", help="benchmark output directory", required=True)
+    parser.add_argument("-n", "--nprocesses", help="number of processes (1: serial)", type=int, default=1)
+    parser.add_argument("--executor", help="task executor ('serial', 'processes', 'dask')", default=None)
+    parser.add_argument("--baseline", help="previous benchmark json file to compare with", default=None)
+    parser.add_argument("--tolerance", help="allowed wall time increase fraction before a step is flagged",
+                        type=float, default=0.2)
+    parser.add_argument("--min_time", help="steps faster than this [s] are not flagged", type=float, default=1.0)
+    parser.add_argument("--skip_generate", help="reuse existing synthetic input files", action="store_true")
+    # Generator parameters (default values depend on the workflow)
+    parser.add_argument("--nx", type=int, default=None)
+    parser.add_argument("--ny", type=int, default=None)
+    parser.add_argument("--ntimes", type=int, default=None)
+    parser.add_argument("--nstorms", type=int, default=None)
+    parser.add_argument("--dx", help="grid spacing [km]", type=float, default=None)
+    parser.add_argument("--dt", help="time interval [minute]", type=float, default=None)
+    parser.add_argument("--speed", help="mean storm speed [m/s]", type=float, default=None)
+    parser.add_argument("--radius", help="min/max storm radius [km]", type=float, nargs=2, default=None)
+    parser.add_argument("--lifetime", help="min/max storm lifetime [hour]", type=float, nargs=2, default=None)
+    parser.add_argument("--mergesplit", help="fraction of storms that merge or split", type=float, default=None)
+    parser.add_argument("--seed", help="random seed", type=int, default=0)
+    args = parser.parse_args()
+    return vars(args)
+
+#-----------------------------------------------------------------------
+def get_generator_params(args):
+    """
+    Get synthetic storm generator parameters from the workflow defaults and command-line arguments.
+
+    Args:
+        args: dictionary
+            Command-line arguments.
+
+    Returns:
+        params: dictionary
+            Generator parameters.
+    """
+    params = dict(workflows[args["workflow"]]["generator"])
+    for key in params.keys():
+        if args.get(key) is not None:
+            params[key] = args[key]
+    params.update({
+        "outdir": os.path.join(args["outdir"], "input"),
+        "basename": "synthetic_",
+        "start": "2020-01-01T00:00",
+        "nz": 30,
+        "dz": 500.,
+        "seed": args["seed"],
+        "nprocesses": args["nprocesses"],
+    })
+    return params
+
+#-----------------------------------------------------------------------
+def make_benchmark_config(args, params, times):
+    """
+    Make a tracking config file for the synthetic data from the workflow example config.
+
+    Args:
+        args: dictionary
+            Command-line arguments.
+        params: dictionary
+            Generator parameters.
+        times: pandas.DatetimeIndex
+            Times of the synthetic files.
+
+    Returns:
+        config_file: string
+            Benchmark config filename.
+        config: dictionary
+            Benchmark config parameters.
+    """
+    workflow = args["workflow"]
+    stream = open(os.path.join(repo_dir, workflows[workflow]["config"]), "r")
+    config = yaml.full_load(stream)
+    stream.close()
+
+    # Domain bounds from the generator lat/lon grid (degrees)
+    dx_deg = params["dx"] / 111.32
+    geolimits = [
+        -params["ny"] / 2 * dx_deg - 1, -params["nx"] / 2 * dx_deg - 1,
+        params["ny"] / 2 * dx_deg + 1, params["nx"] / 2 * dx_deg + 1,
+    ]
+    track_dir = os.path.join(os.path.abspath(args["outdir"]), "tracking")
+    input_dir = os.path.abspath(params["outdir"])
+    config.update({
+        "clouddata_path": f"{input_dir}/",
+        "root_path": f"{track_dir}/",
+        "databasename": params["basename"],
+        "time_format": "yyyymodd.hhmmss",
+        "startdate": times[0].strftime("%Y%m%d.%H%M"),
+        "enddate": times[-1].strftime("%Y%m%d.%H%M"),
+        "datatimeresolution": params["dt"] / 60.,
+        "pixel_radius": params["dx"],
+        "geolimits": geolimits,
+        "run_parallel": 1 if args["nprocesses"] > 1 else 0,
+        "nprocesses": args["nprocesses"],
+        "dask_tmp_dir": track_dir,
+        "profiling": True,
+        "maxnclouds": max(config.get("maxnclouds", 0), 10 * params["nstorms"]),
+    })
+    if args["executor"] is not None:
+        config["executor"] = args["executor"]
+    if workflow == "cell":
+        config.update({
+            "clouddata_path": f"{input_dir}/radar/",
+            "terrain_file": None,
+            "input_source": "radar",
+            "dx": params["dx"] * 1000.,
+            "dy": params["dx"] * 1000.,
+        })
+    os.makedirs(track_dir, exist_ok=True)
+    config_file = os.path.join(os.path.abspath(args["outdir"]), f"config_benchmark_{workflow}.yml")
+    with open(config_file, "w") as f:
+        yaml.dump(config, f, sort_keys=False)
+    return config_file, config
+
+#-----------------------------------------------------------------------
+def compare_baseline(results, baseline_file, tolerance, min_time):
+    """
+    Compare benchmark step wall times with a previous benchmark.
+
+    Args:
+        results: dictionary
+            Benchmark results.
+        baseline_file: string
+            Previous benchmark json filename.
+        tolerance: float
+            Allowed wall time increase fraction.
+        min_time: float
+            Steps faster than this [s] in both benchmarks are not flagged.
+
+    Returns:
+        regressions: list
+            Names of the steps slower than the baseline.
+    """
+    with open(baseline_file, "r") as f:
+        baseline = json.load(f)
+    base_stages = {stage["stage"]: stage for stage in baseline["stages"]}
+    regressions = []
+    print(f"Comparison with baseline: {baseline_file}")
+    for stage in results["stages"] + [{"stage": "total", "wall_time": results["run_time"]}]:
+        if stage["stage"] == "total":
+            base_time = baseline["run_time"]
+        elif stage["stage"] in base_stages:
+            base_time = base_stages[stage["stage"]]["wall_time"]
+        else:
+            continue
+        ratio = stage["wall_time"] / max(base_time, 1e-9)
+        flag = (ratio > 1 + tolerance) & (max(stage["wall_time"], base_time) >= min_time)
+        if flag:
+            regressions.append(stage["stage"])
+        print(f"  {stage['stage']:<24s} {base_time:10.1f} s -> {stage['wall_time']:10.1f} s "
+              f"({ratio:5.2f} x){'  SLOWER' if flag else ''}")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parse_cmd_args()
+    workflow = args["workflow"]
+    params = get_generator_params(args)
+
+    # Generate synthetic input files
+    start_time = time.time()
+    if args["skip_generate"]:
+        import pandas as pd
+        times = pd.date_range(start=params["start"], periods=params["ntimes"], freq=f"{params['dt']}min")
+    else:
+        times = make_synthetic_storms(params)
+    generate_time = time.time() - start_time
+
+    # Run the tracking workflow with profiling
+    config_file, config = make_benchmark_config(args, params, times)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = repo_dir + os.pathsep + env.get("PYTHONPATH", "")
+    start_time = time.time()
+    status = subprocess.run(
+        [sys.executable, os.path.join(repo_dir, workflows[workflow]["runscript"]), config_file],
+        env=env,
+    )
+    run_time = time.time() - start_time
+    if status.returncode != 0:
+        sys.exit(f"Tracking failed with return code {status.returncode}")
+
+    # Read the profiling report written by the runscript
+    stats_outpath = config["root_path"] + "/" + config["stats_path_name"] + "/"
+    report_file = f"{stats_outpath}profiling_{config['startdate']}_{config['enddate']}.json"
+    with open(report_file, "r") as f:
+        report = json.load(f)
+    stages = [
+        {
+            "stage": stage["stage"],
+            "wall_time": stage["wall_time"],
+            "cpu_time": stage["cpu_time"] + stage["task_cpu_time"],
+            "peak_rss_mb": max(stage["peak_rss_mb"], stage["task_peak_rss_mb"]),
+            "ntasks": stage["ntasks"],
+        }
+        for stage in report["stages"]
+    ]
+    results = {
+        "workflow": workflow,
+        "created_on": time.ctime(time.time()),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "nprocesses": args["nprocesses"],
+        "executor": config.get("executor", None),
+        "generator": {key: value for key, value in params.items() if key not in ["outdir", "nprocesses"]},
+        "generate_time": generate_time,
+        "run_time": run_time,
+        "stages": stages,
+        "profiling_report": report_file,
+    }
+    results_file = os.path.join(args["outdir"], f"benchmark_{workflow}.json")
+    with open(results_file, "w") as f:
+        json.dump(results, f, indent=1)
+
+    print(f"Benchmark: {workflow}, grid: {params['nx']} x {params['ny']}, times: {params['ntimes']}, "
+          f"storms: {params['nstorms']}, processes: {args['nprocesses']}")
+    print(f"  {'generate input':<24s} {generate_time:10.1f} s")
+    for stage in stages:
+        print(f"  {stage['stage']:<24s} {stage['wall_time']:10.1f} s, peak RSS: {stage['peak_rss_mb']:8.1f} MB")
+    print(f"  {'total tracking':<24s} {run_time:10.1f} s")
+    print(f"Results: {results_file}")
+
+    # Compare with a previous benchmark
+    if args["baseline"] is not None:
+        regressions = compare_baseline(results, args["baseline"], args["tolerance"], args["min_time"])
+        if len(regressions) > 0:
+            sys.exit(f"Steps slower than baseline: {regressions}")
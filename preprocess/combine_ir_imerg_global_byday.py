@@ -6,21 +6,61 @@ __date__ = "19-Mar-2024"
 
 import numpy as np
 import xarray as xr
+import pandas as pd
 import os, sys, glob
-
-def combine_ir_imerg(imergfiles, irfile, outfile):
-
+from multiprocessing import Pool
+
+def combine_ir_imerg(imergfiles, irfile, outfile, tb_varname='Tb', pcp_varname='precipitation', lat_bounds=[-60., 60.]):
+    """
+    Combine an hourly IR file with the matching IMERG half-hourly files and write to netCDF.
+
+    IMERG files are read one at a time and only the latitude band is kept,
+    so at most one IMERG frame and the running sum are in memory.
+
+    Args:
+        imergfiles: list
+            IMERG half-hourly filenames within the hour.
+        irfile: string
+            IR filename.
+        outfile: string
+            Output filename.
+        tb_varname: string, optional, default='Tb'
+            Tb variable name.
+        pcp_varname: string, optional, default='precipitation'
+            Precipitation variable name.
+        lat_bounds: list, optional, default=[-60., 60.]
+            Subset latitude bounds.
+
+    Returns:
+        outfile: string
+            Output filename.
+    """
     # Read the IR file
     dsir = xr.open_dataset(irfile, decode_times=False)
-
-    # Read the IMERG files
-    ds = xr.open_mfdataset(imergfiles, concat_dim='time', combine='nested').load()
-    # Average the precipitation in time
-    precipitation = ds[pcp_varname].mean(dim='time', keep_attrs=True)
-    # Reorder the DataArray dimensions
-    precipitation = precipitation.transpose('time', 'lat', 'lon', missing_dims='ignore')
+    # Subset region (IMERG is on the same grid as IR)
+    ilat = np.where((dsir.lat.data >= min(lat_bounds)) & (dsir.lat.data <= max(lat_bounds)))[0]
+    dsir = dsir.isel({'lat':ilat})
+
+    # Average the precipitation in time, one IMERG file at a time (ignore missing values)
+    pcp_sum = None
+    for ifile in imergfiles:
+        ds = xr.open_dataset(ifile)
+        # Reorder the DataArray dimensions, subset region
+        ipcp = ds[pcp_varname].transpose('time', 'lat', 'lon', missing_dims='ignore').isel({'lat':ilat})
+        pcp_attrs = ipcp.attrs
+        ipcp = ipcp.data.astype(np.float64)
+        ds.close()
+        if pcp_sum is None:
+            pcp_sum = np.zeros(ipcp.shape[-2:], dtype=np.float64)
+            pcp_count = np.zeros(ipcp.shape[-2:], dtype=np.int32)
+        pcp_sum += np.nansum(ipcp, axis=0)
+        pcp_count += np.sum(np.isfinite(ipcp), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        precipitation = np.where(pcp_count > 0, pcp_sum / pcp_count, np.nan).astype(np.float32)
     # Expand time dimension
-    precipitation = precipitation.expand_dims(dim={'time':dsir.time})
+    precipitation = xr.DataArray(
+        np.expand_dims(precipitation, axis=0), dims=('time', 'lat', 'lon'), attrs=pcp_attrs,
+    )
 
     # Define output var list
     var_dict = {
@@ -47,9 +87,6 @@ def combine_ir_imerg(imergfiles, irfile, outfile):
     dsout[pcp_varname].attrs['long_name'] = pcp_varname
     # dsout[pcp_varname].attrs['units'] = 'mm/hr'
 
-    # Subset region
-    dsout = dsout.sel({'lat':slice(min(lat_bounds), max(lat_bounds))})
-
     fillvalue = np.nan
     # Set encoding/compression for all variables
     comp = dict(zlib=True, _FillValue=fillvalue, dtype='float32')
@@ -57,7 +94,24 @@ def combine_ir_imerg(imergfiles, irfile, outfile):
 
     # Write to netCDF file
     dsout.to_netcdf(path=outfile, mode='w', format='NETCDF4', unlimited_dims='time', encoding=encoding)
+    dsir.close()
     print(f'Output saved: {outfile}')
+    return outfile
+
+
+def combine_ir_imerg_task(task):
+    """
+    Unpack a task tuple for Pool.imap_unordered.
+
+    Args:
+        task: tuple
+            (imergfiles, irfile, outfile, tb_varname, pcp_varname, lat_bounds)
+
+    Returns:
+        outfile: string
+            Output filename.
+    """
+    return combine_ir_imerg(*task)
 
 
 if __name__ == "__main__":
@@ -65,9 +119,9 @@ if __name__ == "__main__":
     date = sys.argv[1]
     # Get the Phase ('Summer' or 'Winter')
     Phase = sys.argv[2]
-
-    # Get year from the filename
-    year = date[0:4]
+    # Optional: last date to process (format: '20130131'), and number of processes
+    end_date = sys.argv[3] if len(sys.argv) > 3 else date
+    nprocesses = int(sys.argv[4]) if len(sys.argv) > 4 else 1
 
     # irdir = f'/pscratch/sd/f/feng045/waccem/MERGIR_Global/Regrid/{year}/'
     # imergdir = f'/pscratch/sd/f/feng045/waccem/IMERG_Global_V06B/{year}/'
@@ -95,47 +149,59 @@ if __name__ == "__main__":
     # Make output directory
     os.makedirs(outdir, exist_ok=True)
 
-    # Find all IMERG files for the date
-    inputfiles = sorted(glob.glob(f'{imergdir}{imerg_basename}{date}*nc4'))
-    nfiles = len(inputfiles)
-    print(f'Number of IR files: {nfiles}')
-
-    # Get all hours from the filenames
-    filehours = []
-    for ih in range(0, nfiles):
-        # Find string position after the date + 2
-        # Example filename format is: 3B-HHR.MS.MRG.3IMERG.20000601-S000000-E002959.0000.V06B.HDF5.nc4
-        # Example filename format is: 3B-HHR.MS.MRG.3IMERG.20160801-S000000-E002959.0000.V07B.HDF5.nc4
-        strpos = inputfiles[ih].find(date)+len(date)+2
-        # Append the hours to the list
-        filehours.append(inputfiles[ih][strpos:strpos+2])
-        
-    # Find the unique hours
-    filehours_unique = np.unique(filehours)
-    nhours = len(filehours_unique)
-
-
-    # Loop over each unique hour
-    for ih in range(0, nhours):
-        
-        # Find indices that match the unique hour
-        idx = np.where(np.array(filehours) == filehours_unique[ih])[0]
-        # Get the IMERG filenames
-        imergfiles = np.array(inputfiles)[idx]
-        
-        # IR filename
-        irfile = f'{irdir}{ir_basename}{date}{filehours_unique[ih]}{in_suffix}'
-
-        # Output filename
-        outfile = f'{outdir}{out_basename}{date}{filehours_unique[ih]}{out_suffix}'
-        
-        # Check if IR file exist
-        if os.path.isfile(irfile) == True:
-
+    # Make a task for each hour of each date
+    tasks = []
+    date_list = pd.date_range(start=date, end=end_date, freq='1D').strftime('%Y%m%d')
+    for idate in date_list:
+        # Find all IMERG files for the date
+        inputfiles = sorted(glob.glob(f'{imergdir}{imerg_basename}{idate}*nc4'))
+        nfiles = len(inputfiles)
+        print(f'{idate} number of IMERG files: {nfiles}')
+
+        # Get all hours from the filenames
+        filehours = []
+        for ih in range(0, nfiles):
+            # Find string position after the date + 2
+            # Example filename format is: 3B-HHR.MS.MRG.3IMERG.20000601-S000000-E002959.0000.V06B.HDF5.nc4
+            # Example filename format is: 3B-HHR.MS.MRG.3IMERG.20160801-S000000-E002959.0000.V07B.HDF5.nc4
+            strpos = inputfiles[ih].find(idate)+len(idate)+2
+            # Append the hours to the list
+            filehours.append(inputfiles[ih][strpos:strpos+2])
+
+        # Find the unique hours
+        filehours_unique = np.unique(filehours)
+        nhours = len(filehours_unique)
+
+        # Loop over each unique hour
+        for ih in range(0, nhours):
+
+            # Find indices that match the unique hour
+            idx = np.where(np.array(filehours) == filehours_unique[ih])[0]
+            # Get the IMERG filenames
+            imergfiles = list(np.array(inputfiles)[idx])
+
+            # IR filename
+            irfile = f'{irdir}{ir_basename}{idate}{filehours_unique[ih]}{in_suffix}'
+
+            # Output filename
+            outfile = f'{outdir}{out_basename}{idate}{filehours_unique[ih]}{out_suffix}'
+
+            # Check if IR file exist
+            if os.path.isfile(irfile) == True:
+                tasks.append((imergfiles, irfile, outfile, tb_varname, pcp_varname, lat_bounds))
+            else:
+                print(f'Warning, IR file is missing: {irfile}')
+                print('No output is created for this time.')
+    print(f'Number of hours to process: {len(tasks)}')
+
+    if nprocesses > 1:
+        # Each output hour is written as soon as a worker finishes it
+        pool = Pool(nprocesses)
+        for outfile in pool.imap_unordered(combine_ir_imerg_task, tasks):
+            pass
+        pool.close()
+        pool.join()
+    else:
+        for task in tasks:
             # Call function to combine two files
-            combine_ir_imerg(imergfiles, irfile, outfile)
-
-        else:
-            print(f'Warning, IR file is missing: {irfile}')
-            print('No output is created for this time.')
-
+            combine_ir_imerg_task(task)
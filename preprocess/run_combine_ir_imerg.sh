@@ -7,5 +7,7 @@
 source activate /global/common/software/m1867/python/py310
 
 # $1 is a date string (e.g., 20180601), $2 is phase (e.g., 'Summer' or 'Winter')
+# A date range can be processed in one call with a worker pool by adding the end date and number of processes:
+# python combine_ir_imerg_global_byday.py 20160801 Summer 20160910 32
 python /pscratch/sd/f/feng045/codes/dyamond/preprocess/combine_ir_imerg_global_byday.py $1 $2
 # python /global/homes/f/feng045/program/PyFLEXTRKR-dev/preprocess/combine_ir_imerg_global_byday.py $1
\ No newline at end of file
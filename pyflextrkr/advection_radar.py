@@ -1,4 +1,3 @@
-import sys
 import numpy as np
 import xarray as xr
 from netCDF4 import Dataset
@@ -6,7 +5,7 @@ from scipy.signal import medfilt
 from skimage.registration import phase_cross_correlation
 from scipy import ndimage as ndi
 import logging
-import dask
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
 
 
@@ -205,7 +204,6 @@ def calc_mean_advection(config):
     MED_FILT_LEN = config["MED_FILT_LEN"]
     MAX_MOVEMENT_MPS = config["MAX_MOVEMENT_MPS"]
     datatimeresolution = config["datatimeresolution"]
-    run_parallel = config["run_parallel"]
 
     output_filename = (
         config["stats_outpath"] +
@@ -231,41 +229,18 @@ def calc_mean_advection(config):
     # Convert data time resolution from [hour] to [second]
     TIME_RES_SECOND = datatimeresolution * 3600
 
-    # Run advection calculation
-    if run_parallel == 0:
-        # Serial version
-        final_results = []
-        for ii in zip(filelist[:-1], filelist[1:]):
-            x_y = movement_of_storm_fft_l(
-                ii,
-                dx=dx,
-                dy=dy,
-                config=config,
-                DBZ_THRESHOLD=DBZ_THRESHOLD,
-                TIME_RES_SECOND=TIME_RES_SECOND,
-                MAX_MOVEMENT_MPS=MAX_MOVEMENT_MPS,
-            )
-            final_results.append(x_y)
-
-    elif run_parallel >= 1:
-        # Parallel version
-        results = []
-        for ii in zip(filelist[:-1], filelist[1:]):
-            x_y = dask.delayed(movement_of_storm_fft_l)(
-                ii,
-                dx=dx,
-                dy=dy,
-                config=config,
-                DBZ_THRESHOLD=DBZ_THRESHOLD,
-                TIME_RES_SECOND=TIME_RES_SECOND,
-                MAX_MOVEMENT_MPS=MAX_MOVEMENT_MPS,
-            )
-            results.append(x_y)
-        final_results = dask.compute(*results)
-        dask.distributed.wait(final_results)
-
-    else:
-        sys.exit('Valid parallelization flag not provided')
+    # Run advection calculation for each pair of files
+    # with the executor set in config (serial/processes/dask)
+    task_args = [(ii,) for ii in zip(filelist[:-1], filelist[1:])]
+    static_kwargs = {
+        "dx": dx,
+        "dy": dy,
+        "config": config,
+        "DBZ_THRESHOLD": DBZ_THRESHOLD,
+        "TIME_RES_SECOND": TIME_RES_SECOND,
+        "MAX_MOVEMENT_MPS": MAX_MOVEMENT_MPS,
+    }
+    final_results = run_tasks(movement_of_storm_fft_l, task_args, config, static_kwargs=static_kwargs)
 
     # Zip the (x, y) and convert them into numpy array
     x_and_y = np.array(tuple(zip(*final_results)))
@@ -6,8 +6,9 @@ from scipy.signal import medfilt
 from skimage.registration import phase_cross_correlation
 from scipy import ndimage as ndi
 import logging
-import dask
 from pyflextrkr.ft_utilities import subset_files_timerange
+from pyflextrkr.ft_executor import run_tasks
+from pyflextrkr.tiling_func import map_tiles
 
 
 def offset_to_speed(x, y, time_lag, dx, dy):
@@ -94,9 +95,104 @@ def movement_of_storm_fft(
         x_lag: int
             Advection in y-direction [number of grids]
     """
+    ref_varname = config['ref_varname']
+    field_1 = np.squeeze(dset_1[ref_varname].values)
+    field_2 = np.squeeze(dset_2[ref_varname].values)
+    y_lag, x_lag = movement_of_storm_fields(
+        field_1, field_2, dx, dy, config, plot_subplots=plot_subplots,
+    )
+    return y_lag, x_lag
+
+
+def get_advection_tile_windows(shape, tiles, buffer):
+    """
+    Get the window of each advection tile (tile interior excluding the edge buffer).
+
+    Args:
+        shape: tuple
+            Field shape (ny, nx).
+        tiles: list
+            Number of tiles [y, x].
+        buffer: int
+            Number of grid points around the edge of each tile to exclude.
+
+    Returns:
+        windows: list
+            List of (row, col, y slice, x slice) for each tile.
+    """
+    tiles_y, tiles_x = tiles[0], tiles[1]
+    row_skip = int(shape[0] / tiles_y)
+    col_skip = int(shape[1] / tiles_x)
+    windows = []
+    for col in range(0, tiles_x):
+        for row in range(0, tiles_y):
+            windows.append((
+                row, col,
+                slice(buffer + row * row_skip, (row + 1) * row_skip - buffer),
+                slice(buffer + col * col_skip, (col + 1) * col_skip - buffer),
+            ))
+    return windows
+
+
+def movement_of_tile(tile_fields):
+    """
+    Calculate movement in a tile window with masked phase correlation.
+
+    Masked pixels do not contribute to the masked correlation, so correlating the
+    tile window gives the same correlation peak as correlating the full domain with
+    the tile masks, for a fraction of the FFT size. The movement differs only when
+    the masked correlation has no positive value in the tile. Every zero lag is then
+    a maximum and the movement is the mean of those lags, which depends on the
+    correlation array size.
+
+    Args:
+        tile_fields: tuple
+            (field_1, field_2, mask_1, mask_2) in the tile window.
+
+    Returns:
+        y: float
+            Movement in y-direction [number of grids].
+        x: float
+            Movement in x-direction [number of grids].
+    """
+    field_1, field_2, mask_1, mask_2 = tile_fields
+    y, x = -1 * phase_cross_correlation(
+        field_1, field_2, reference_mask=mask_1, moving_mask=mask_2, overlap_ratio=0.7
+    )[0]
+    return y, x
+
+
+def movement_of_storm_fields(
+        field_1,
+        field_2,
+        dx,
+        dy,
+        config,
+        plot_subplots=False,
+):
+    """
+    Calculate movement of storms between two fields in each advection tile.
+
+    Args:
+        field_1: np.array
+            Field at current time (t=0)
+        field_2: np.array
+            Field at next time (t=1)
+        dx: float
+            Grid spacing in x-direction [km]
+        dy: float
+            Grid spacing in y-direction [km]
+        config: dictionary
+            Dictionary containing config parameters
+
+    Returns:
+        y_lag: np.array
+            Advection in y-direction [number of grids]
+        x_lag: np.array
+            Advection in x-direction [number of grids]
+    """
     logger = logging.getLogger(__name__)
 
-    ref_varname = config['ref_varname']
     field_threshold = config['advection_field_threshold']
     datatimeresolution = config["datatimeresolution"]
     advection_mask_method = config.get('advection_mask_method', 'greater')
@@ -104,17 +200,16 @@ def movement_of_storm_fft(
     size_threshold = config.get('advection_size_threshold', 10)
     tiles = config.get('advection_tiles', [1,1])
     advection_max_movement_mps = config.get('advection_max_movement_mps', 60)
+    # Number of threads to process tiles
+    nworkers = config.get('advection_tile_nworkers', 1)
 
     # Convert data time resolution from [hour] to [second]
     TIME_RES_SECOND = datatimeresolution * 3600
 
-    field_1 = np.squeeze(dset_1[ref_varname].values)
-    field_2 = np.squeeze(dset_2[ref_varname].values)
-
     # Make arrays for advection
     tiles_y, tiles_x = tiles[0], tiles[1]
-    y_lag = np.zeros((tiles_y, tiles_x), dtype=np.float32)
-    x_lag = np.zeros((tiles_y, tiles_x), dtype=np.float32)
+    y_lag = np.full((tiles_y, tiles_x), np.nan, dtype=np.float32)
+    x_lag = np.full((tiles_y, tiles_x), np.nan, dtype=np.float32)
 
     # Mask data by thresholds
     if advection_mask_method == 'greater':
@@ -128,66 +223,49 @@ def movement_of_storm_fft(
         logger.error("Tracking will now exit.")
         sys.exit()
 
-    dimensions = field_1.shape
-    row_skip = int(dimensions[0] / tiles_y)
-    col_skip = int(dimensions[1] / tiles_x)
-
-    # Mask each region into a cut
-    for col in range(0, tiles_x):
-        for row in range(0, tiles_y):
-            # Buffer the edge
-            mask = np.zeros(field_1.shape)
-            mask[
-                buffer + row * row_skip : (row + 1) * row_skip - buffer,
-                buffer + col * col_skip : (col + 1) * col_skip - buffer,
-            ] = 1
-            # Separate mask by tiles
-            mask_1t = mask * mask_1
-            mask_2t = mask * mask_2
-            # Set mask to 0 for areas not used
-            if advection_mask_method == 'greater':
-                mask_1t[field_1 < field_threshold] = 0
-                mask_2t[field_2 < field_threshold] = 0
-            elif advection_mask_method == 'smaller':
-                mask_1t[field_1 > field_threshold] = 0
-                mask_2t[field_2 > field_threshold] = 0
-            # mask[field_1 < -100] = 0
-            # mask_2[field_2 < -100] = 0
-
-            num_points = np.sum(mask > 0)
-            # Updated to use phase_cross_correlation to replace masked_register_translation
-            y, x = -1 * phase_cross_correlation(
-                field_1, field_2, reference_mask=mask_1t, moving_mask=mask_2t, overlap_ratio=0.7
-            )[0]
-
-            # plot_subplots = True
-            if plot_subplots:
-                import matplotlib.pyplot as plt
-                plt.figure(figsize=(10, 5))
-                plt.subplot(1, 2, 1)
-                plt.pcolormesh(field_1 * mask_1t, vmin=0, vmax=50, cmap="gist_ncar")
-                plt.colorbar()
-                plt.arrow(100, 100, x, y, head_width=5)
-                plt.subplot(1, 2, 2)
-                plt.pcolormesh(field_2 * mask_2t, vmin=0, vmax=50, cmap="gist_ncar")
-                plt.colorbar()
-
-                plt.figure(figsize=(10, 10))
-                plt.pcolormesh(field_2 * mask_2t, vmin=0, vmax=50, cmap="gist_ncar")
-                plt.colorbar()
-                shifted_field_1 = ndi.shift(mask_1t, [int(y), int(x)])
-                plt.contour(shifted_field_1, vmin=-1, vmax=1, cmap="seismic", levels=3)
-                plt.contour(-1 * mask_1t, vmin=-1, vmax=1, cmap="seismic", levels=3)
-                plt.arrow(100, 100, x, y, head_width=15)
-                plt.show()
-
-            if num_points < size_threshold:
-                x_lag[row, col] = np.nan
-                y_lag[row, col] = np.nan
-                continue
-            # Save movement values
-            y_lag[row, col] = y
-            x_lag[row, col] = x
+    # Crop each tile window (buffer the edge), skip tiles with too few points
+    windows = []
+    tile_fields = []
+    for row, col, yslice, xslice in get_advection_tile_windows(field_1.shape, tiles, buffer):
+        num_points = field_1[yslice, xslice].size
+        if num_points < size_threshold:
+            continue
+        windows.append((row, col, yslice, xslice))
+        tile_fields.append((
+            field_1[yslice, xslice], field_2[yslice, xslice],
+            mask_1[yslice, xslice], mask_2[yslice, xslice],
+        ))
+
+    # Calculate movement in each tile
+    tile_results = map_tiles(movement_of_tile, tile_fields, nworkers)
+    for (row, col, yslice, xslice), (y, x) in zip(windows, tile_results):
+        # Save movement values
+        y_lag[row, col] = y
+        x_lag[row, col] = x
+
+        # plot_subplots = True
+        if plot_subplots:
+            import matplotlib.pyplot as plt
+            field_1t = np.where(mask_1[yslice, xslice], field_1[yslice, xslice], 0)
+            field_2t = np.where(mask_2[yslice, xslice], field_2[yslice, xslice], 0)
+            plt.figure(figsize=(10, 5))
+            plt.subplot(1, 2, 1)
+            plt.pcolormesh(field_1t, vmin=0, vmax=50, cmap="gist_ncar")
+            plt.colorbar()
+            plt.arrow(100, 100, x, y, head_width=5)
+            plt.subplot(1, 2, 2)
+            plt.pcolormesh(field_2t, vmin=0, vmax=50, cmap="gist_ncar")
+            plt.colorbar()
+
+            plt.figure(figsize=(10, 10))
+            plt.pcolormesh(field_2t, vmin=0, vmax=50, cmap="gist_ncar")
+            plt.colorbar()
+            mask_1t = mask_1[yslice, xslice].astype(float)
+            shifted_field_1 = ndi.shift(mask_1t, [int(y), int(x)])
+            plt.contour(shifted_field_1, vmin=-1, vmax=1, cmap="seismic", levels=3)
+            plt.contour(-1 * mask_1t, vmin=-1, vmax=1, cmap="seismic", levels=3)
+            plt.arrow(100, 100, x, y, head_width=15)
+            plt.show()
 
     # Calculate movement speed
     mag_movement, mag_dir, mag_movement_mps = offset_to_speed(
@@ -201,23 +279,40 @@ def movement_of_storm_fft(
     y_lag[np.isnan(y_lag)] = np.nanmedian(0)
 
     return y_lag, x_lag
-    # return y_lag[0, 0], x_lag[0, 0]
 
-def movement_of_storm_fft_l(
+
+def movement_of_storm_block(
     filenames, dx, dy, config,
 ):
-    """This just exists to make parallelism easier"""
-    dset_1 = xr.open_dataset(filenames[0])
-    dset_2 = xr.open_dataset(filenames[1])
+    """
+    Calculate movement between each pair of adjacent files in a contiguous block of files.
 
-    y1, x1 = movement_of_storm_fft(
-        dset_1,
-        dset_2,
-        dx=dx,
-        dy=dy,
-        config=config,
-    )
-    return y1, x1
+    Each file is read once and reused for the two pairs it belongs to.
+
+    Args:
+        filenames: list
+            Cloudid file names, sorted in time.
+        dx: float
+            Grid spacing in x-direction [km]
+        dy: float
+            Grid spacing in y-direction [km]
+        config: dictionary
+            Dictionary containing config parameters
+
+    Returns:
+        results: list
+            List of (y_lag, x_lag) for each adjacent pair.
+    """
+    ref_varname = config['ref_varname']
+    results = []
+    field_1 = None
+    for filename in filenames:
+        with xr.open_dataset(filename) as ds:
+            field_2 = np.squeeze(ds[ref_varname].values)
+        if field_1 is not None:
+            results.append(movement_of_storm_fields(field_1, field_2, dx, dy, config))
+        field_1 = field_2
+    return results
 
 
 def calc_mean_advection(config):
@@ -243,6 +338,8 @@ def calc_mean_advection(config):
     advection_max_movement_mps = config["advection_max_movement_mps"]
     datatimeresolution = config["datatimeresolution"]
     run_parallel = config["run_parallel"]
+    # Number of contiguous file blocks (default to the number of processors)
+    nblocks = config.get("advection_nblocks", config.get("nprocesses", 1))
 
     output_filename = (
         config["stats_outpath"] +
@@ -269,35 +366,20 @@ def calc_mean_advection(config):
     # Number of tiles in y, x direction
     tiles_y, tiles_x = advection_tiles[0], advection_tiles[1]
 
-    # Run advection calculation
+    # Split adjacent file pairs into contiguous blocks (each file is read once per block)
+    npairs = len(filelist) - 1
     if run_parallel == 0:
-        # Serial version
-        final_results = []
-        for ii in zip(filelist[:-1], filelist[1:]):
-            x_y = movement_of_storm_fft_l(
-                ii,
-                dx=dx,
-                dy=dy,
-                config=config,
-            )
-            final_results.append(x_y)
-
-    elif run_parallel >= 1:
-        # Parallel version
-        results = []
-        for ii in zip(filelist[:-1], filelist[1:]):
-            x_y = dask.delayed(movement_of_storm_fft_l)(
-                ii,
-                dx=dx,
-                dy=dy,
-                config=config,
-            )
-            results.append(x_y)
-        final_results = dask.compute(*results)
-        dask.distributed.wait(final_results)
+        nblocks = 1
+    nblocks = max(1, min(nblocks, npairs))
+    pair_blocks = np.array_split(np.arange(npairs), nblocks)
+    task_args = [(filelist[iblock[0]:iblock[-1] + 2],) for iblock in pair_blocks if len(iblock) > 0]
 
-    else:
-        sys.exit('Valid parallelization flag not provided')
+    # Run advection calculation
+    block_results = run_tasks(
+        movement_of_storm_block, task_args, config,
+        static_kwargs={"dx": dx, "dy": dy, "config": config},
+    )
+    final_results = [x_y for results in block_results for x_y in results]
 
     # Zip the (x, y) and convert them into numpy array
     x_and_y = np.array(tuple(zip(*final_results)))
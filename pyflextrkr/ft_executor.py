@@ -0,0 +1,247 @@
+import sys
+import logging
+from multiprocessing import Pool
+from pyflextrkr.ft_profiling import get_profiling_enabled, profile_task, add_task_records
+
+# Static arguments set once in each process pool worker
+worker_static_kwargs = {}
+
+def run_tasks(
+        func,
+        task_args,
+        config,
+        task_kwargs=None,
+        static_kwargs=None,
+        result_callback=None,
+):
+    """
+    Run a function for a list of tasks with the executor set in config.
+
+    Each task calls func(*task_args[i], **task_kwargs[i], **static_kwargs).
+    Tasks are grouped into batches (one batch per worker call), static arguments
+    (e.g., config, static fields) are sent to the workers once, and only a limited number
+    of batches are submitted at a time. Results are collected as the batches finish.
+    If profiling is enabled in config, resource usage of each task is recorded to the current stage.
+
+    Executor options in config:
+        executor: 'serial', 'processes' (multiprocessing Pool), or 'dask'
+            (the current Dask client, e.g., LocalCluster or Dask-MPI set up by the runscripts;
+            a LocalCluster is started if there is no client).
+            Default: 'serial' if run_parallel = 0, 'dask' otherwise.
+        nprocesses: number of workers for 'processes' (and a new LocalCluster).
+        tasks_per_batch: number of tasks in each batch (default: 1).
+        max_batches_inflight: maximum number of batches submitted at a time
+            (default: 2 x number of workers).
+
+    Args:
+        func: function
+            Function to run for each task.
+        task_args: list
+            List of positional arguments (tuple) for each task.
+        config: dictionary
+            Dictionary containing config parameters.
+        task_kwargs: list, optional, default=None
+            List of keyword arguments (dictionary) for each task.
+        static_kwargs: dictionary, optional, default=None
+            Keyword arguments that are the same for all tasks.
+        result_callback: function, optional, default=None
+            Function called with (task index, result) as each task result is received.
+
+    Returns:
+        results: list
+            Results in the same order as task_args.
+    """
+    logger = logging.getLogger(__name__)
+    executor = get_executor_name(config)
+    ntasks = len(task_args)
+    if task_kwargs is None:
+        task_kwargs = [{}] * ntasks
+    if static_kwargs is None:
+        static_kwargs = {}
+    tasks_per_batch = max(1, int(config.get("tasks_per_batch", 1)))
+    profiling = get_profiling_enabled(config)
+
+    # Group tasks into batches
+    batches = []
+    for istart in range(0, ntasks, tasks_per_batch):
+        iend = min(istart + tasks_per_batch, ntasks)
+        batches.append((istart, task_args[istart:iend], task_kwargs[istart:iend]))
+    logger.debug(f"Executor: {executor}, tasks: {ntasks}, batches: {len(batches)}")
+
+    results = [None] * ntasks
+
+    def collect_batch(istart, batch_output):
+        batch_results, batch_records = batch_output
+        add_task_records(batch_records)
+        for ii, result in enumerate(batch_results):
+            results[istart + ii] = result
+            if result_callback is not None:
+                result_callback(istart + ii, result)
+
+    if executor == "serial":
+        for istart, bargs, bkwargs in batches:
+            collect_batch(istart, run_task_batch(func, bargs, bkwargs, static_kwargs, profiling))
+    elif executor == "processes":
+        nprocesses = config.get("nprocesses", 1)
+        with Pool(nprocesses, initializer=set_worker_static_kwargs, initargs=(static_kwargs,)) as pool:
+            batch_iter = ((func, istart, bargs, bkwargs, profiling) for istart, bargs, bkwargs in batches)
+            for istart, batch_output in pool.imap_unordered(run_indexed_batch, batch_iter):
+                collect_batch(istart, batch_output)
+    elif executor == "dask":
+        run_tasks_dask(func, batches, static_kwargs, config, collect_batch, profiling)
+    else:
+        logger.critical(f"ERROR: Unknown executor: {executor}")
+        sys.exit('Valid parallelization flag not provided.')
+    return results
+
+
+def get_executor_name(config):
+    """
+    Get the executor name from config.
+
+    Args:
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        executor: string
+            Executor name.
+    """
+    run_parallel = config.get("run_parallel", 0)
+    if run_parallel == 0:
+        default_executor = "serial"
+    elif run_parallel >= 1:
+        default_executor = "dask"
+    else:
+        sys.exit('Valid parallelization flag not provided.')
+    return config.get("executor", default_executor)
+
+
+def run_tasks_dask(func, batches, static_kwargs, config, collect_batch, profiling=False):
+    """
+    Run task batches with Dask futures, keeping a limited number of batches in flight.
+
+    Args:
+        func: function
+            Function to run for each task.
+        batches: list
+            List of (first task index, task args, task kwargs) for each batch.
+        static_kwargs: dictionary
+            Keyword arguments that are the same for all tasks.
+        config: dictionary
+            Dictionary containing config parameters.
+        collect_batch: function
+            Function called with (first task index, batch output) as each batch finishes.
+        profiling: bool, optional, default=False
+            If True, record resource usage of each task.
+
+    Returns:
+        None.
+    """
+    from dask.distributed import Client, LocalCluster, as_completed, get_client
+
+    # Use the current client, start a LocalCluster if there is none
+    new_client = None
+    try:
+        client = get_client()
+    except ValueError:
+        cluster = LocalCluster(n_workers=config.get("nprocesses", 1), threads_per_worker=1)
+        new_client = Client(cluster)
+        client = new_client
+
+    nworkers = max(1, sum(client.nthreads().values()))
+    max_inflight = max(1, int(config.get("max_batches_inflight", 2 * nworkers)))
+
+    # Send static arguments to all workers once
+    static_futures = {key: client.scatter([value], broadcast=True, hash=False)[0]
+                      for key, value in static_kwargs.items()}
+
+    batch_iter = iter(batches)
+    futures_start = {}
+    pending = as_completed()
+
+    def submit_next():
+        batch = next(batch_iter, None)
+        if batch is not None:
+            istart, bargs, bkwargs = batch
+            future = client.submit(run_task_batch, func, bargs, bkwargs, static_futures, profiling, pure=False)
+            futures_start[future.key] = istart
+            pending.add(future)
+
+    for ii in range(0, max_inflight):
+        submit_next()
+    for future in pending:
+        collect_batch(futures_start.pop(future.key), future.result())
+        future.release()
+        submit_next()
+
+    if new_client is not None:
+        new_client.close()
+        cluster.close()
+    return
+
+
+def run_task_batch(func, batch_args, batch_kwargs, static_kwargs, profiling=False):
+    """
+    Run a function for a batch of tasks.
+
+    Args:
+        func: function
+            Function to run for each task.
+        batch_args: list
+            List of positional arguments (tuple) for each task.
+        batch_kwargs: list
+            List of keyword arguments (dictionary) for each task.
+        static_kwargs: dictionary
+            Keyword arguments that are the same for all tasks.
+        profiling: bool, optional, default=False
+            If True, record resource usage of each task.
+
+    Returns:
+        results: list
+            Results for each task.
+        records: list
+            Resource usage records for each task (empty if profiling is False).
+    """
+    results = []
+    records = []
+    for args, kwargs in zip(batch_args, batch_kwargs):
+        if profiling:
+            result, record = profile_task(func, args, kwargs, static_kwargs)
+            records.append(record)
+        else:
+            result = func(*args, **kwargs, **static_kwargs)
+        results.append(result)
+    return results, records
+
+
+def run_indexed_batch(batch):
+    """
+    Run a batch of tasks in a process pool worker with the worker static arguments.
+
+    Args:
+        batch: tuple
+            (func, first task index, task args, task kwargs, profiling)
+
+    Returns:
+        istart: int
+            First task index of the batch.
+        batch_output: tuple
+            Results and resource usage records for each task.
+    """
+    func, istart, batch_args, batch_kwargs, profiling = batch
+    return istart, run_task_batch(func, batch_args, batch_kwargs, worker_static_kwargs, profiling)
+
+
+def set_worker_static_kwargs(static_kwargs):
+    """
+    Set the static arguments in a process pool worker (Pool initializer).
+
+    Args:
+        static_kwargs: dictionary
+            Keyword arguments that are the same for all tasks.
+
+    Returns:
+        None.
+    """
+    worker_static_kwargs.update(static_kwargs)
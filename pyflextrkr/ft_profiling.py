@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import resource
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Profiling records collected in the main process
+profiling_records = {"stages": [], "tasks": []}
+# Name of the pipeline stage currently running (tasks are assigned to it)
+current_stage = {"name": None}
+
+def get_profiling_enabled(config):
+    """
+    Check if profiling is enabled in config.
+
+    Args:
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        profiling: bool
+            True if profiling is enabled.
+    """
+    return bool(config.get("profiling", False))
+
+
+def get_process_usage():
+    """
+    Get resource usage of the current process.
+
+    Returns:
+        usage: dictionary
+            Wall clock time, CPU time [s], peak RSS [MB], bytes read and written.
+            Bytes read/written are None if psutil is not available.
+    """
+    rusage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_scale = 1. / 1024**2 if sys.platform == "darwin" else 1. / 1024
+    read_bytes = None
+    write_bytes = None
+    if psutil is not None:
+        try:
+            io = psutil.Process().io_counters()
+            # Use bytes passed to read/write calls if available (includes the page cache)
+            read_bytes = getattr(io, "read_chars", io.read_bytes)
+            write_bytes = getattr(io, "write_chars", io.write_bytes)
+        except (AttributeError, psutil.Error):
+            pass
+    usage = {
+        "wall_time": time.time(),
+        "cpu_time": rusage.ru_utime + rusage.ru_stime,
+        "peak_rss_mb": rusage.ru_maxrss * rss_scale,
+        "read_bytes": read_bytes,
+        "write_bytes": write_bytes,
+    }
+    return usage
+
+
+def get_usage_difference(start, end):
+    """
+    Get resource usage between two get_process_usage calls.
+
+    Args:
+        start: dictionary
+            Usage at the start.
+        end: dictionary
+            Usage at the end.
+
+    Returns:
+        record: dictionary
+            Wall and CPU time [s], peak RSS [MB] at the end, bytes read and written.
+    """
+    record = {
+        "wall_time": end["wall_time"] - start["wall_time"],
+        "cpu_time": end["cpu_time"] - start["cpu_time"],
+        "peak_rss_mb": end["peak_rss_mb"],
+    }
+    for key in ["read_bytes", "write_bytes"]:
+        if (start[key] is None) or (end[key] is None):
+            record[key] = None
+        else:
+            record[key] = end[key] - start[key]
+    return record
+
+
+def get_task_label(args):
+    """
+    Get a label for a task from its first argument (usually the input filename).
+
+    Args:
+        args: tuple
+            Positional arguments of the task.
+
+    Returns:
+        label: string
+            Task label.
+    """
+    if len(args) == 0:
+        return ""
+    label = args[0]
+    # Use the first file of a file pair
+    if isinstance(label, (list, tuple)) and (len(label) > 0):
+        label = label[0]
+    if isinstance(label, str):
+        return os.path.basename(label)
+    return str(label)
+
+
+def profile_task(func, args, kwargs, static_kwargs):
+    """
+    Run a task and record its resource usage.
+
+    Peak RSS is the high-water mark of the worker process at the end of the task.
+
+    Args:
+        func: function
+            Function to run.
+        args: tuple
+            Positional arguments of the task.
+        kwargs: dictionary
+            Keyword arguments of the task.
+        static_kwargs: dictionary
+            Keyword arguments that are the same for all tasks.
+
+    Returns:
+        result: any
+            Result of the task.
+        record: dictionary
+            Resource usage of the task.
+    """
+    start = get_process_usage()
+    result = func(*args, **kwargs, **static_kwargs)
+    end = get_process_usage()
+    record = {
+        "function": func.__name__,
+        "task": get_task_label(args),
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+        **get_usage_difference(start, end),
+    }
+    return result, record
+
+
+def add_task_records(records):
+    """
+    Add task records from the workers to the current stage.
+
+    Args:
+        records: list
+            List of task records from profile_task.
+
+    Returns:
+        None.
+    """
+    for record in records:
+        record["stage"] = current_stage["name"]
+        profiling_records["tasks"].append(record)
+
+
+def sum_values(values):
+    """
+    Sum values that may be None (not available).
+
+    Args:
+        values: list
+            Values to sum.
+
+    Returns:
+        total: float
+            Sum of the values, None if any value is not available.
+    """
+    if any(value is None for value in values):
+        return None
+    return sum(values)
+
+
+@contextmanager
+def profile_stage(stage_name, config):
+    """
+    Record resource usage of a pipeline stage and the tasks it runs.
+
+    Usage:
+        with profile_stage("idfeature", config):
+            idfeature_driver(config)
+
+    Args:
+        stage_name: string
+            Name of the stage.
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        None.
+    """
+    if not get_profiling_enabled(config):
+        yield
+        return
+    logger = logging.getLogger(__name__)
+    ntasks_start = len(profiling_records["tasks"])
+    current_stage["name"] = stage_name
+    start = get_process_usage()
+    try:
+        yield
+    finally:
+        end = get_process_usage()
+        current_stage["name"] = None
+        tasks = profiling_records["tasks"][ntasks_start:]
+        record = {
+            "stage": stage_name,
+            **get_usage_difference(start, end),
+            "ntasks": len(tasks),
+            "nworker_processes": len(set((task["host"], task["pid"]) for task in tasks)),
+            "task_wall_time": sum(task["wall_time"] for task in tasks),
+            "task_cpu_time": sum(task["cpu_time"] for task in tasks),
+            "task_peak_rss_mb": max([task["peak_rss_mb"] for task in tasks], default=0.),
+            "task_read_bytes": sum_values([task["read_bytes"] for task in tasks]),
+            "task_write_bytes": sum_values([task["write_bytes"] for task in tasks]),
+        }
+        profiling_records["stages"].append(record)
+        logger.info(
+            f"Profiling {stage_name}: wall time {record['wall_time']:.1f} s, "
+            f"tasks: {record['ntasks']}, task CPU time: {record['task_cpu_time']:.1f} s"
+        )
+
+
+def write_profiling_report(config):
+    """
+    Write the profiling report of a run: a JSON file with all stage and task records,
+    a CSV file with the task records, and a text summary ranking the slowest stages
+    and outlier tasks (tasks slower than profiling_outlier_factor x the stage median).
+
+    Args:
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        report_filename: string
+            JSON report filename, None if profiling is not enabled.
+    """
+    if not get_profiling_enabled(config):
+        return None
+    logger = logging.getLogger(__name__)
+    outpath = config.get("profiling_outpath", config["stats_outpath"])
+    report_filebase = config.get("profiling_filebase", "profiling_")
+    outlier_factor = config.get("profiling_outlier_factor", 3.0)
+    ntop = config.get("profiling_ntop", 10)
+    os.makedirs(outpath, exist_ok=True)
+    report_basename = f"{outpath}{report_filebase}{config['startdate']}_{config['enddate']}"
+    report_filename = f"{report_basename}.json"
+    tasks_filename = f"{report_basename}_tasks.csv"
+    summary_filename = f"{report_basename}_summary.txt"
+
+    # Machine-readable report
+    report = {
+        "created_on": time.ctime(time.time()),
+        "startdate": config["startdate"],
+        "enddate": config["enddate"],
+        "run_parallel": config.get("run_parallel", 0),
+        "nprocesses": config.get("nprocesses", 1),
+        "stages": profiling_records["stages"],
+        "tasks": profiling_records["tasks"],
+    }
+    with open(report_filename, "w") as f:
+        json.dump(report, f, indent=1)
+    task_columns = ["stage", "function", "task", "host", "pid", "wall_time", "cpu_time",
+                    "peak_rss_mb", "read_bytes", "write_bytes"]
+    df_tasks = pd.DataFrame(profiling_records["tasks"], columns=task_columns)
+    df_tasks.to_csv(tasks_filename, index=False)
+
+    # Human-readable summary
+    lines = ["Stages ranked by wall time:"]
+    stages = sorted(profiling_records["stages"], key=lambda x: x["wall_time"], reverse=True)
+    total_wall_time = max(sum(stage["wall_time"] for stage in stages), 1e-9)
+    for stage in stages:
+        read_gb = "n/a" if stage["task_read_bytes"] is None else f"{stage['task_read_bytes'] / 1e9:.2f}"
+        write_gb = "n/a" if stage["task_write_bytes"] is None else f"{stage['task_write_bytes'] / 1e9:.2f}"
+        lines.append(
+            f"  {stage['stage']:<24s} wall: {stage['wall_time']:10.1f} s "
+            f"({100 * stage['wall_time'] / total_wall_time:5.1f}%), "
+            f"tasks: {stage['ntasks']:6d}, task CPU: {stage['task_cpu_time']:10.1f} s, "
+            f"peak RSS: {max(stage['peak_rss_mb'], stage['task_peak_rss_mb']):8.1f} MB, "
+            f"task read/write: {read_gb}/{write_gb} GB"
+        )
+    lines.append(f"Outlier tasks (wall time > {outlier_factor} x stage median):")
+    noutliers = 0
+    if len(df_tasks) > 0:
+        stage_median = df_tasks.groupby("stage", dropna=False)["wall_time"].transform("median")
+        df_tasks["median_ratio"] = df_tasks["wall_time"] / np.maximum(stage_median, 1e-9)
+        df_outliers = df_tasks[(df_tasks["median_ratio"] > outlier_factor)]
+        df_outliers = df_outliers.sort_values("wall_time", ascending=False).head(ntop)
+        noutliers = len(df_outliers)
+        for row in df_outliers.itertuples():
+            lines.append(
+                f"  {row.stage}: {row.task} wall: {row.wall_time:.1f} s "
+                f"({row.median_ratio:.1f} x median), peak RSS: {row.peak_rss_mb:.1f} MB"
+            )
+    if noutliers == 0:
+        lines.append("  None")
+    summary = "\n".join(lines)
+    with open(summary_filename, "w") as f:
+        f.write(summary + "\n")
+    logger.info(f"Profiling summary:\n{summary}")
+    logger.info(f"Profiling report: {report_filename}")
+    return report_filename
@@ -105,6 +105,50 @@ def make_weight_file(gridfile_src, config):
 
     return weight_filename
 
+#-------------------------------------------------------------------------------------
+# Regridders built from weight files in this process, reused across files
+regridder_cache = {}
+
+def get_regridder(gridfile_src, config):
+    """
+    Get xESMF Regridder from the weight file, built once per worker process and reused.
+
+    The source grid is only read the first time a Regridder is built with the same
+    weight file, regrid method and destination grid. All files regridded with a
+    weight file are assumed to be on the same source grid.
+
+    Args:
+        gridfile_src: string
+            Filename for the source grid.
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        regridder: xESMF Regridder
+            Regridder object.
+        grid_dst: dictionary
+            Dictionary containing destination grid data.
+    """
+    weight_filename = config.get('weight_filename')
+    regrid_method = config.get('regrid_method', 'conservative')
+
+    # Rebuild the Regridder if the weight file has changed
+    regridder_key = (
+        weight_filename,
+        os.path.getmtime(weight_filename),
+        regrid_method,
+        config.get('gridfile_dst'),
+        config.get('x_coordname_dst'),
+        config.get('y_coordname_dst'),
+    )
+    if regridder_key not in regridder_cache:
+        # Make source & destination grid data for regridder
+        grid_src, grid_dst = make_grid4regridder(gridfile_src, config)
+        # Retrieve Regridder
+        regridder = xe.Regridder(grid_src, grid_dst, method=regrid_method, weights=weight_filename)
+        regridder_cache[regridder_key] = (regridder, grid_dst)
+    return regridder_cache[regridder_key]
+
 #-------------------------------------------------------------------------------------
 def get_latlon_bounds_2d(latin, lonin):
     """
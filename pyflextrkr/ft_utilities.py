@@ -6,6 +6,9 @@ import yaml
 import xarray as xr
 import pandas as pd
 import logging
+import dask
+import dask.array as da
+from collections.abc import MutableMapping
 from scipy.sparse import csr_matrix
 
 def setup_logging():
@@ -352,6 +355,63 @@ def get_timestamp_from_filename_single(
         file_timestamp = np.NaN
     return file_timestamp
 
+# Cache of geolimits index windows for 2D coordinate grids
+geolimit_window_cache = {}
+
+def get_geolimit_window(lat, lon, geolimits):
+    """
+    Get the index window of the grid points within the geolimits lat/lon boundary.
+
+    For 1D coordinates, the window is found from 1D comparisons on each coordinate (works with
+    ascending or descending coordinates). For 2D coordinates, the window is the bounding box of the
+    points within the boundary, which is cached for each grid so it is only computed once.
+
+    Args:
+        lat: np.ndarray or Xarray DataArray
+            Latitude coordinate (1D or 2D).
+        lon: np.ndarray or Xarray DataArray
+            Longitude coordinate (1D or 2D).
+        geolimits: list
+            4-element list [lat_min, lon_min, lat_max, lon_max].
+
+    Returns:
+        yslice: slice
+            Index window in the y dimension (empty if no grid point is within geolimits).
+        xslice: slice
+            Index window in the x dimension (empty if no grid point is within geolimits).
+    """
+    if (lat.ndim == 1) & (lon.ndim == 1):
+        lat = np.asarray(lat)
+        lon = np.asarray(lon)
+        indicesy = np.nonzero((lat >= geolimits[0]) & (lat <= geolimits[2]))[0]
+        indicesx = np.nonzero((lon >= geolimits[1]) & (lon <= geolimits[3]))[0]
+    elif (lat.ndim == 2) & (lon.ndim == 2):
+        # Identify the grid by its shape and corner values
+        corners = lambda x: tuple(np.asarray(x[[0, -1]][:, [0, -1]]).ravel().tolist())
+        key = (lat.shape, corners(lat), corners(lon), tuple(geolimits))
+        if key in geolimit_window_cache:
+            return geolimit_window_cache[key]
+        lat = np.asarray(lat)
+        lon = np.asarray(lon)
+        mask = (lat >= geolimits[0]) & (lat <= geolimits[2]) & (lon >= geolimits[1]) & (lon <= geolimits[3])
+        indicesy = np.nonzero(mask.any(axis=1))[0]
+        indicesx = np.nonzero(mask.any(axis=0))[0]
+    else:
+        logger = logging.getLogger(__name__)
+        logger.critical("ERROR in get_geolimit_window func: Unexpected input data x, y coordinate dimensions.")
+        logger.critical(f"lon dimension: {lon.ndim}")
+        logger.critical(f"lat dimension: {lat.ndim}")
+        logger.critical("Tracking will now exit.")
+        sys.exit()
+
+    if (len(indicesy) > 0) & (len(indicesx) > 0):
+        window = (slice(int(indicesy[0]), int(indicesy[-1]) + 1), slice(int(indicesx[0]), int(indicesx[-1]) + 1))
+    else:
+        window = (slice(0, 0), slice(0, 0))
+    if lat.ndim == 2:
+        geolimit_window_cache[key] = window
+    return window
+
 def subset_ds_geolimit(
         ds_in,
         config,
@@ -363,6 +423,8 @@ def subset_ds_geolimit(
     """
     Subset Xarray DataSet by lat/lon boundary.
 
+    The subset is lazy, only the data within the boundary is read when the variables are loaded.
+
     Args:
         ds_in: Xarray DataSet
             Input Xarray DataSet.
@@ -373,7 +435,6 @@ def subset_ds_geolimit(
         ds_out: Xarray DataSet
             Subsetted Xarray DataSset.
     """
-    logger = logging.getLogger(__name__)
     # Get coordinate, dimension names from config if not supplied
     if x_coordname is None: x_coordname = config.get('x_coordname')
     if y_coordname is None: y_coordname = config.get('y_coordname')
@@ -381,39 +442,14 @@ def subset_ds_geolimit(
     if y_dimname is None: y_dimname = config.get('y_dimname')
     geolimits = config.get('geolimits')
 
-    # Get coordinate variables
-    lat = ds_in[y_coordname].data.squeeze()
-    lon = ds_in[x_coordname].data.squeeze()
-    # Check coordinate dimensions
-    if (lat.ndim == 1) | (lon.ndim == 1):
-        # Mesh 1D coordinate into 2D
-        in_lon, in_lat = np.meshgrid(lon, lat)
-    elif (lat.ndim == 2) | (lon.ndim == 2):
-        in_lon = lon
-        in_lat = lat
-    else:
-        logger.critical("ERROR in subset_ds_geolimit func: Unexpected input data x, y coordinate dimensions.")
-        logger.critical(f"{x_coordname} dimension: {lon.ndim}")
-        logger.critical(f"{y_coordname} dimension: {lat.ndim}")
-        logger.critical("Tracking will now exit.")
-        sys.exit()
-
-    # Subset input dataset within geolimits
-    # Find indices within lat/lon range set by geolimits
-    indicesy, indicesx = np.array(
-        np.where(
-            (in_lat >= geolimits[0])
-            & (in_lat <= geolimits[2])
-            & (in_lon >= geolimits[1])
-            & (in_lon <= geolimits[3])
-        )
+    # Find the index window within lat/lon range set by geolimits
+    yslice, xslice = get_geolimit_window(
+        ds_in[y_coordname].squeeze(), ds_in[x_coordname].squeeze(), geolimits,
     )
-    ymin, ymax = np.nanmin(indicesy), np.nanmax(indicesy) + 1
-    xmin, xmax = np.nanmin(indicesx), np.nanmax(indicesx) + 1
     # Create a dictionary for dataset subset
     subset_dict = {
-        y_dimname: slice(ymin, ymax),
-        x_dimname: slice(xmin, xmax),
+        y_dimname: yslice,
+        x_dimname: xslice,
     }
     # Subset dataset
     ds_out = ds_in[subset_dict]
@@ -443,8 +479,10 @@ def match_drift_times(
             Matched drift file date time strings.
         xdrifts_match: numpy array
             Matched drift distance in the x-direction.
+            [ncloudidfiles] for domain mean drift, [ncloudidfiles, tile_y, tile_x] for drift in tiles.
         ydrifts_match: numpy array
             Matched drift distance in the y-direction.
+            [ncloudidfiles] for domain mean drift, [ncloudidfiles, tile_y, tile_x] for drift in tiles.
 
     """
     logger = logging.getLogger(__name__)
@@ -465,8 +503,16 @@ def match_drift_times(
         # Read the drift file
         ds_drift = xr.open_dataset(driftfile)
         bt_drift = ds_drift['time']
-        xdrifts = ds_drift['x'].values.squeeze()
-        ydrifts = ds_drift['y'].values.squeeze()
+        xdrifts = ds_drift['x'].values
+        ydrifts = ds_drift['y'].values
+        # Keep drift in each advection tile [time, tile_y, tile_x] if there are multiple tiles
+        tile_shape = xdrifts.shape[1:]
+        if np.prod(tile_shape) == 1:
+            tile_shape = ()
+        xdrifts = xdrifts.reshape((len(bt_drift),) + tile_shape)
+        ydrifts = ydrifts.reshape((len(bt_drift),) + tile_shape)
+        xdrifts_match = np.zeros((ncloudidfiles,) + tile_shape, dtype=int)
+        ydrifts_match = np.zeros((ncloudidfiles,) + tile_shape, dtype=int)
 
         # Convert dateime64 objects to string array
         datetime_drift = bt_drift.dt.strftime("%Y%m%d_%H%M%S").values
@@ -477,8 +523,8 @@ def match_drift_times(
             idx = np.where(datetime_drift == cloudid_datetime)[0]
             if (len(idx) == 1):
                 datetime_drift_match[itime] = datetime_drift[idx[0]]
-                xdrifts_match[itime] = xdrifts[idx]
-                ydrifts_match[itime] = ydrifts[idx]
+                xdrifts_match[itime] = xdrifts[idx[0]]
+                ydrifts_match[itime] = ydrifts[idx[0]]
     return (
         datetime_drift_match,
         xdrifts_match,
@@ -492,23 +538,40 @@ def load_sparse_trackstats(
         times_idx_varname,
         tracks_dimname,
         tracks_idx_varname,
+        var_list=None,
+        tracks_subset=None,
+        times_subset=None,
 ):
     """
     Load sparse trackstats file and convert to sparse arrays.
 
+    The CSR index structure is computed once and shared by all sparse variables.
+    Each sparse variable is read and converted on first access.
+
     Args:
-        max_trackduration:
-        statistics_file:
-        times_idx_varname:
-        tracks_dimname:
-        tracks_idx_varname:
+        max_trackduration: int
+            Maximum track duration.
+        statistics_file: string
+            Sparse trackstats filename.
+        times_idx_varname: string
+            Times indices variable name.
+        tracks_dimname: string
+            Tracks dimension name.
+        tracks_idx_varname: string
+            Tracks indices variable name.
+        var_list: list, optional, default=None
+            Sparse variable names to load. All sparse variables are loaded if None.
+        tracks_subset: np.array, optional, default=None
+            Track indices to keep (in output order). All tracks are kept if None.
+        times_subset: np.array, optional, default=None
+            Time indices to keep (in output order). All times are kept if None.
 
     Returns:
         ds_1d: Xarray Dataset
             Dataset containing 1D track stats variables.
         sparse_attrs_dict: dictionary
             Dictionary containing sparse array attributes.
-        sparse_dict: dictionary
+        sparse_dict: SparseTrackstatsDict
             Dictionary containing sparse array variables.
     """
     # xr.set_options(keep_attrs=True)
@@ -517,32 +580,101 @@ def load_sparse_trackstats(
                              decode_times=False)
     # Get sparse array info
     sparse_dimname = 'sparse_index'
-    nsparse_data = ds_all.sizes[sparse_dimname]
     ntracks = ds_all.sizes[tracks_dimname]
     # Sparse array indices
     tracks_idx = ds_all[tracks_idx_varname].values
     times_idx = ds_all[times_idx_varname].values
-    row_col_ind = (tracks_idx, times_idx)
     # Sparse array shapes
     shape_2d = (ntracks, max_trackduration)
-    # Convert sparse arrays and put in a dictionary
-    sparse_dict = {}
-    sparse_attrs_dict = {}
-    for ivar in ds_all.data_vars.keys():
-        # Check dimension name for sparse arrays
-        if ds_all[ivar].dims[0] == sparse_dimname:
-            # Convert to sparse array
-            sparse_dict[ivar] = csr_matrix(
-                (ds_all[ivar].values, row_col_ind), shape=shape_2d, dtype=ds_all[ivar].dtype,
-            )
-            # Collect variable attributes
-            sparse_attrs_dict[ivar] = ds_all[ivar].attrs
+
+    # Keep the sparse entries in the track/time subsets, renumber rows/columns to the subset order
+    keep = np.ones(len(tracks_idx), dtype=bool)
+    if tracks_subset is not None:
+        tracks_lookup = np.full(ntracks, -1, dtype=np.int64)
+        tracks_lookup[tracks_subset] = np.arange(0, len(tracks_subset))
+        tracks_idx = tracks_lookup[tracks_idx]
+        keep &= tracks_idx >= 0
+        shape_2d = (len(tracks_subset), shape_2d[1])
+    if times_subset is not None:
+        times_lookup = np.full(max(max_trackduration, np.max(times_idx, initial=-1) + 1), -1, dtype=np.int64)
+        times_lookup[times_subset] = np.arange(0, len(times_subset))
+        times_idx = times_lookup[times_idx]
+        keep &= times_idx >= 0
+        shape_2d = (shape_2d[0], len(times_subset))
+    entry_idx = np.nonzero(keep)[0]
+    # Sort entries by track, then time (same as the CSR canonical format)
+    order = np.lexsort((times_idx[entry_idx], tracks_idx[entry_idx]))
+    entry_idx = entry_idx[order]
+    idx_dtype = np.int32 if len(entry_idx) < np.iinfo(np.int32).max else np.int64
+    indices = times_idx[entry_idx].astype(idx_dtype)
+    indptr = np.zeros(shape_2d[0] + 1, dtype=idx_dtype)
+    np.cumsum(np.bincount(tracks_idx[entry_idx], minlength=shape_2d[0]), out=indptr[1:])
+
+    # Sparse variables to load
+    sparse_varnames = [ivar for ivar in ds_all.data_vars.keys()
+                       if (ds_all[ivar].dims[0] == sparse_dimname) &
+                       ((var_list is None) or (ivar in var_list))]
+    # Collect variable attributes
+    sparse_attrs_dict = {ivar: ds_all[ivar].attrs for ivar in sparse_varnames}
+
+    def load_sparse_var(varname):
+        # Convert to sparse array sharing the CSR indices
+        values = ds_all[varname].values[entry_idx]
+        return csr_matrix((values, indices, indptr), shape=shape_2d, dtype=values.dtype, copy=False)
+
+    sparse_dict = SparseTrackstatsDict(load_sparse_var, sparse_varnames)
     # Drop all sparse variables and dimension
     ds_1d = ds_all.drop_dims(sparse_dimname)
+    if tracks_subset is not None:
+        ds_1d = ds_1d.isel({tracks_dimname: tracks_subset})
     ds_all.close()
     return ds_1d, sparse_attrs_dict, sparse_dict
 
 
+class SparseTrackstatsDict(MutableMapping):
+    """
+    Dictionary of sparse trackstats arrays that are loaded on first access.
+    """
+    def __init__(self, load_func, varnames):
+        """
+        Args:
+            load_func: function
+                Function that takes a variable name and returns its sparse array.
+            varnames: list
+                Variable names that can be loaded.
+        """
+        self._load_func = load_func
+        self._varnames = list(varnames)
+        self._arrays = {}
+
+    def __getitem__(self, key):
+        if key not in self._arrays:
+            if key not in self._varnames:
+                raise KeyError(key)
+            self._arrays[key] = self._load_func(key)
+        return self._arrays[key]
+
+    def __setitem__(self, key, value):
+        if key not in self._varnames:
+            self._varnames.append(key)
+        self._arrays[key] = value
+
+    def __delitem__(self, key):
+        if key not in self._varnames:
+            raise KeyError(key)
+        self._varnames.remove(key)
+        self._arrays.pop(key, None)
+
+    def __iter__(self):
+        return iter(list(self._varnames))
+
+    def __len__(self):
+        return len(self._varnames)
+
+    def __contains__(self, key):
+        return key in self._varnames
+
+
 def convert_trackstats_sparse2dense(
         filename_sparse,
         filename_dense,
@@ -553,10 +685,13 @@ def convert_trackstats_sparse2dense(
         times_dimname,
         fillval,
         fillval_f,
+        ntracks_per_block=10000,
 ):
     """
     Convert sparse trackstats netCDF file to dense trackstats netCDF file.
 
+    The dense variables are written in blocks of tracks to limit memory usage.
+
     Args:
         filename_sparse: string
             Filename for sparse trackstats netCDF file.
@@ -576,6 +711,8 @@ def convert_trackstats_sparse2dense(
             Missing value for int type variables.
         fillval_f: float
             Missing value for float type variables.
+        ntracks_per_block: int, optional, default=10000
+            Number of tracks in each block written to the dense file.
 
     Returns:
         True.
@@ -588,42 +725,30 @@ def convert_trackstats_sparse2dense(
     )
     # Get sparse array info
     sparse_dimname = 'sparse_index'
-    nsparse_data = ds_all.sizes[sparse_dimname]
     ntracks = ds_all.sizes[tracks_dimname]
-    # Sparse array indices
-    tracks_idx = ds_all[tracks_idx_varname].values
-    times_idx = ds_all[times_idx_varname].values
-    row_col_ind = (tracks_idx, times_idx)
-    # Sparse array shapes
-    shape_2d = (ntracks, max_trackduration)
+    # Sparse arrays sharing one CSR index
+    _, _, sparse_dict = load_sparse_trackstats(max_trackduration, filename_sparse,
+                                               times_idx_varname, tracks_dimname,
+                                               tracks_idx_varname)
 
-    # Create a dense mask for no feature
-    mask = csr_matrix(
-        (ds_all['base_time'].data, row_col_ind),
-        shape=shape_2d,
-        dtype=ds_all['base_time'].dtype,
-    ).toarray() == 0
+    # Blocks of the base_time mask, shared by all variables
+    mask_blocks = get_mask_blocks(sparse_dict['base_time'], ntracks_per_block)
 
     # Create variable dictionary
     var_dict = {}
     for key, value in ds_all.data_vars.items():
         # Check dimension name for sparse arrays
         if ds_all[key].dims[0] == sparse_dimname:
-            # Convert to sparse array, then to dense array
-            var_dense = csr_matrix(
-                (ds_all[key].data, row_col_ind), shape=shape_2d, dtype=ds_all[key].dtype,
-            ).toarray()
-            # Replace missing values based on variable type
-            if isinstance(var_dense[0, 0], np.floating):
-                var_dense[mask] = fillval_f
-            else:
-                var_dense[mask] = fillval
+            # Skip the tracks/times indices variables
+            if key in [tracks_idx_varname, times_idx_varname]:
+                continue
+            # Dense array converted block by block when writing
+            var_dense = sparse2dense_blocks(
+                sparse_dict[key], mask_blocks, fillval, fillval_f, ntracks_per_block,
+            )
             var_dict[key] = ([tracks_dimname, times_dimname], var_dense, ds_all[key].attrs)
         else:
             var_dict[key] = ([tracks_dimname], value.data, ds_all[key].attrs)
-    # Remove the tracks/times indices variables
-    var_dict.pop(tracks_idx_varname, None)
-    var_dict.pop(times_idx_varname, None)
 
     # Define coordinate dictionary
     coord_dict = {
@@ -641,11 +766,129 @@ def convert_trackstats_sparse2dense(
     comp = dict(zlib=True)
     encoding = {var: comp for var in dsout.data_vars}
     # Write to netcdf file
-    dsout.to_netcdf(
-        path=filename_dense,
+    write_netcdf_blocks(dsout, filename_dense, tracks_dimname, encoding)
+    ds_all.close()
+    return True
+
+
+def get_mask_blocks(mask_sparse, ntracks_per_block):
+    """
+    Split a sparse mask array into blocks of tracks for sparse2dense_blocks.
+
+    Each block is sliced and wrapped as a dask delayed object once,
+    so that all variables converted with the same mask share the block in the task graph.
+
+    Args:
+        mask_sparse: scipy.sparse.csr_matrix
+            Sparse array where 0 indicates no feature (e.g., base_time).
+        ntracks_per_block: int
+            Number of tracks in each block.
+
+    Returns:
+        mask_blocks: list
+            List of dask delayed sparse mask blocks [tracks, times].
+    """
+    ntracks = mask_sparse.shape[0]
+    mask_blocks = []
+    for istart in range(0, ntracks, ntracks_per_block):
+        iend = min(istart + ntracks_per_block, ntracks)
+        mask_blocks.append(dask.delayed(mask_sparse[istart:iend, :]))
+    return mask_blocks
+
+
+def sparse2dense_blocks(
+        sparse_array,
+        mask_blocks,
+        fillval,
+        fillval_f,
+        ntracks_per_block,
+):
+    """
+    Convert a sparse trackstats array to a dask array made of dense blocks of tracks.
+
+    Each block is only converted to a dense array when the dask array is computed (e.g., written).
+
+    Args:
+        sparse_array: scipy.sparse.csr_matrix
+            Sparse array [tracks, times].
+        mask_blocks: list
+            Dask delayed sparse mask blocks from get_mask_blocks (same ntracks_per_block).
+        fillval: int
+            Missing value for int type variables.
+        fillval_f: float
+            Missing value for float type variables.
+        ntracks_per_block: int
+            Number of tracks in each block.
+
+    Returns:
+        dense_array: dask.array
+            Dense array [tracks, times].
+    """
+    ntracks, ntimes = sparse_array.shape
+    # Replace missing values based on variable type
+    if np.issubdtype(sparse_array.dtype, np.floating):
+        fill_value = fillval_f
+    else:
+        fill_value = fillval
+    blocks = []
+    for iblock, istart in enumerate(range(0, ntracks, ntracks_per_block)):
+        iend = min(istart + ntracks_per_block, ntracks)
+        block = dask.delayed(sparse2dense_block)(
+            sparse_array[istart:iend, :], mask_blocks[iblock], fill_value,
+        )
+        blocks.append(da.from_delayed(block, shape=(iend - istart, ntimes), dtype=sparse_array.dtype))
+    if len(blocks) == 0:
+        return np.zeros((0, ntimes), dtype=sparse_array.dtype)
+    dense_array = da.concatenate(blocks, axis=0)
+    return dense_array
+
+
+def sparse2dense_block(sparse_block, mask_block, fill_value):
+    """
+    Convert a block of tracks from sparse to dense array, replace no feature with missing value.
+
+    Args:
+        sparse_block: scipy.sparse.csr_matrix
+            Sparse array block [tracks, times].
+        mask_block: scipy.sparse.csr_matrix
+            Sparse array block where 0 indicates no feature.
+        fill_value: int or float
+            Missing value.
+
+    Returns:
+        dense_block: np.array
+            Dense array block [tracks, times].
+    """
+    dense_block = sparse_block.toarray()
+    dense_block[mask_block.toarray() == 0] = fill_value
+    return dense_block
+
+
+def write_netcdf_blocks(dsout, filename, unlimited_dimname, encoding):
+    """
+    Write a dataset with dask arrays to a netCDF file, one block at a time.
+
+    Args:
+        dsout: Xarray Dataset
+            Output dataset.
+        filename: string
+            Output netCDF filename.
+        unlimited_dimname: string
+            Unlimited dimension name.
+        encoding: dictionary
+            Encoding for the variables.
+
+    Returns:
+        None.
+    """
+    delayed_write = dsout.to_netcdf(
+        path=filename,
         mode='w',
         format='NETCDF4',
-        unlimited_dims=tracks_dimname,
-        encoding=encoding
+        unlimited_dims=unlimited_dimname,
+        encoding=encoding,
+        compute=False,
     )
-    return True
+    # Compute blocks sequentially in this process so that only one block is in memory
+    delayed_write.compute(scheduler='synchronous')
+    return
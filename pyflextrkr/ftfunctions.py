@@ -381,6 +381,77 @@ def olr_to_tb(OLR):
     tb = (-a + np.sqrt(a**2 + 4*b*tf))/(2*b)
     return tb
 
+def box_sum_1d(data, width, axis, max_direct=16):
+    """
+    Running box sum along one axis with edge-extended boundaries.
+
+    Args:
+        data: np.array
+            Input array.
+        width: int
+            Box width [pixel]. Even widths span width+1 pixels with half weights on the two end pixels
+            (same as astropy Box1DKernel 'linear_interp' mode).
+        axis: int
+            Axis to sum along.
+        max_direct: int, optional
+            Boxes up to this many pixels are summed directly, wider boxes use prefix sums (default 16).
+
+    Returns:
+        out: np.array
+            Box sums, same shape and dtype as data.
+    """
+    rad = int(width) // 2
+    npts = data.shape[axis]
+    span = 2 * rad + 1
+    axis = axis % data.ndim
+    def along(start, stop):
+        return (slice(None),) * axis + (slice(start, stop),)
+    # Extend the edge values
+    pad_width = [(0, 0)] * data.ndim
+    pad_width[axis] = (rad, rad)
+    padded = np.pad(data, pad_width, mode="edge")
+    # Narrow boxes: add the shifted arrays directly (faster than prefix sums for a few shifts)
+    if span <= max_direct:
+        out = padded[along(0, npts)].copy()
+        for ii in range(1, span):
+            out += padded[along(ii, ii + npts)]
+    # Wide boxes: take the difference of prefix sums (accumulated in float64 to avoid round-off)
+    else:
+        csum = np.zeros(padded.shape[:axis] + (padded.shape[axis] + 1,) + padded.shape[axis+1:], dtype=np.float64)
+        np.cumsum(padded, axis=axis, dtype=np.float64, out=csum[along(1, None)])
+        out = (csum[along(span, span + npts)] - csum[along(0, npts)]).astype(data.dtype)
+    if int(width) % 2 == 0:
+        # Half weights on the two end pixels
+        out -= 0.5 * (padded[along(0, npts)] + padded[along(span - 1, span - 1 + npts)])
+    return out
+
+def box_smooth(data, width):
+    """
+    Smooth a 2D field with a NaN-aware box filter using separable running sums.
+
+    Gives the same result as astropy.convolution.convolve with a Box2DKernel(width),
+    boundary="extend", nan_treatment="interpolate" and preserve_nan=True,
+    at O(1) cost per pixel regardless of the window size.
+
+    Args:
+        data: np.array
+            2D field to smooth, may contain NaN.
+        width: int
+            Width of the box filter [pixel].
+
+    Returns:
+        smooth_data: np.array(float32)
+            Smoothed field, NaN where data is NaN.
+    """
+    # Sum the finite values and their weights in a single pass
+    isfinite = np.isfinite(data)
+    sums = np.stack([np.where(isfinite, data, 0), isfinite]).astype(np.float32)
+    sums = box_sum_1d(box_sum_1d(sums, width, axis=-1), width, axis=-2)
+    # Normalize by the weights of the finite values
+    smooth_data = np.full(data.shape, np.nan, dtype=np.float32)
+    np.divide(sums[0], sums[1], out=smooth_data, where=isfinite & (sums[1] > 0))
+    return smooth_data
+
 def get_neighborhood(point, grid):
     """
     Given a grid of labeled points with 0=unlabeled, -1 to be processed, other # to be proccesed.
@@ -414,7 +485,7 @@ def get_neighborhood(point, grid):
     return next_points  # Would probably be faster to pass in deque and directly add rather than a sublist.
 
 
-def grow_cells(grid):
+def grow_cells(grid, seed_points=None):
     """
     Fast algorithm to grow and label areas based on nearest distance to the seeded regions.
 
@@ -422,16 +493,23 @@ def grow_cells(grid):
         grid: np.array
             Array containing labeled seeded regions (values > 0).
             Areas for growing = 0, areas excluded = -1.
+        seed_points: tuple, optional, default=None
+            Indices (as returned by np.where) of the points to start growing from.
+            Default uses the labeled seeded regions in grid.
 
     Returns:
         grid: np.array
             Array containing labels after growth.
     """
-    seed_points = np.where(grid > 0)
+    if seed_points is None:
+        seed_points = np.where(grid > 0)
+        nseeds = np.count_nonzero(seed_points[0])
+    else:
+        nseeds = len(seed_points[0])
     point_que = deque(
         [
             [seed_points[0][i], seed_points[1][i]]
-            for i in range(np.count_nonzero(seed_points[0]))
+            for i in range(nseeds)
         ]
     )
     while len(point_que) > 0:
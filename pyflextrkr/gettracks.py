@@ -5,12 +5,18 @@ import os
 from netCDF4 import Dataset
 import xarray as xr
 import logging
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
 
 def gettracknumbers(config):
     """
     Track features sequentially from the single track files.
 
+    Optionally the track files can be split into contiguous time chunks (gettracks_nchunks),
+    each chunk is tracked independently (in parallel with the executor set in config),
+    and tracks crossing chunk boundaries are stitched together afterwards.
+    The results are identical to tracking all files sequentially.
+
     Arguments:
         config: dictionary
             Dictionary containing config parameters.
@@ -29,10 +35,11 @@ def gettracknumbers(config):
     enddate = config["enddate"]
     timegap = config["timegap"]
     maxnclouds = config["maxnclouds"]
-    featuresize_varname = config.get("featuresize_varname", "npix_feature")
     start_basetime = config["start_basetime"]
     end_basetime = config["end_basetime"]
     fillval = config["fillval"]
+    # Number of time chunks to track independently (1: track all files sequentially)
+    nchunks = config.get("gettracks_nchunks", 1)
 
     logger = logging.getLogger(__name__)
     np.set_printoptions(threshold=np.inf)
@@ -49,19 +56,299 @@ def gettracknumbers(config):
                                               singletrack_filebase,
                                               start_basetime,
                                               end_basetime)
+    nfiles = len(files)
+    logger.info(f"Total number of files to process: {nfiles}")
+
+    ############################################################################
+    # Split files into contiguous time chunks
+    # Keep at least 10 files in each chunk
+    nchunks = max(1, min(nchunks, nfiles // 10))
+    file_chunks = [chunk.tolist() for chunk in np.array_split(np.array(files), nchunks)]
+    logger.info(f"Number of time chunks: {nchunks}")
+
+    # Track each chunk with the executor set in config (serial/processes/dask)
+    task_args = [(file_chunks[ichunk],) for ichunk in range(0, nchunks)]
+    task_kwargs = [
+        {
+            "prev_file": file_chunks[ichunk - 1][-1] if ichunk > 0 else None,
+            "first_chunk": (ichunk == 0),
+            "last_chunk": (ichunk == nchunks - 1),
+        }
+        for ichunk in range(0, nchunks)
+    ]
+    chunk_results = run_tasks(
+        gettracknumbers_chunk, task_args, config,
+        task_kwargs=task_kwargs, static_kwargs={"config": config},
+    )
+
+    ############################################################################
+    # Stitch tracks across chunk boundaries
+    merged_dict = merge_tracknumbers_chunks(chunk_results, fillval)
+    itrack = merged_dict["itrack"]
+    basetime = merged_dict["basetime"]
+    cloudidfiles = merged_dict["cloudidfiles"]
+    tracknumber = merged_dict["tracknumber"]
+    referencetrackstatus = merged_dict["referencetrackstatus"]
+    newtrackstatus = merged_dict["newtrackstatus"]
+    trackmergenumber = merged_dict["trackmergenumber"]
+    tracksplitnumber = merged_dict["tracksplitnumber"]
+    trackreset = merged_dict["trackreset"]
+    nfiles = len(basetime)
+    strlength = cloudidfiles.shape[1]
+    trackstatus = np.full((1, nfiles, maxnclouds), fillval, dtype=int)
+
+    trackstatus[0, :, :] = np.nansum(
+        np.dstack((referencetrackstatus, newtrackstatus)), 2
+    )
+    trackstatus[np.isnan(trackstatus)] = -9999
+
+    logger.debug("Tracking Done")
+
+    # #################################################################
+    # # Create histograms of the values in tracknumber.
+    # # This effectively counts the number of times each track number appaers in tracknumber,
+    # # which is equivalent to calculating the length of the track.
+    # tracklengths, trackbins = np.histogram(
+    #     np.copy(tracknumber[0, :, :]),
+    #     bins=np.arange(1, itrack + 1, 1),
+    #     range=(1, itrack + 1),
+    # )
+
+    # # #################################################################
+    # # Remove all tracks that have only one cloud.
+    # logger.debug("Removing short tracks")
+    # # logger.debug((time.ctime()))
+    #
+    # # Identify single cloud tracks
+    # singletracks = np.array(np.where(tracklengths <= 1))[0, :]
+    # nsingletracks = len(singletracks)
+    # # singleindices = np.logical_or(tracknumber[0, :, :] == singletracks)
+    #
+    # # Loop over single cloudtracks
+    # nsingleremove = 0
+    # for strack in singletracks:
+    #
+    #     # Indentify clouds in this track
+    #     # Need to add one since singletracks lists the index in the matrix, which starts at zero.
+    #     # Track number starts at one.
+    #     cloudindex = np.array(
+    #         np.where(tracknumber[0, :, :] == int(strack + 1))
+    #     )
+    #
+    #     # Only remove single track if it is not small merger or small split.
+    #     # This is only done if keepsingletrack == 1. This is the default.
+    #     if keepsingletrack == 1:
+    #         if (
+    #             tracksplitnumber[0, cloudindex[0], cloudindex[1]] < 0
+    #             and trackmergenumber[0, cloudindex[0], cloudindex[1]] < 0
+    #         ):
+    #             tracknumber[0, cloudindex[0], cloudindex[1]] = -2
+    #             trackstatus[0, cloudindex[0], cloudindex[1]] = -9999
+    #             nsingleremove = nsingleremove + 1
+    #             tracklengths[strack] = -9999
+    #
+    #     # Remove all single tracks. This corresponds to keepsingletrack == 0.
+    #     else:
+    #         tracknumber[0, cloudindex[0], cloudindex[1]] = -2
+    #         trackstatus[0, cloudindex[0], cloudindex[1]] = -9999
+    #         nsingleremove = nsingleremove + 1
+    #         tracklengths[strack] = -9999
+
+    #######################################################################
+    # Save file
+    logger.debug("Writing all track statistics file")
+    logger.debug((time.ctime()))
+
+    # Check if file already exists. If exists, delete
+    if os.path.isfile(tracknumbers_outfile):
+        os.remove(tracknumbers_outfile)
+
+    # Define output variables dictionary
+    var_dict = {
+        "ntracks": (["time"], np.array([itrack])),
+        "basetimes": (["nfiles"], basetime[:nfiles].astype("datetime64[ns]")),
+        "cloudid_files": (["nfiles", "ncharacters"], cloudidfiles[:nfiles,:]),
+        "track_numbers": (["time", "nfiles", "nclouds"], tracknumber[:,:nfiles,:]),
+        "track_status": (["time", "nfiles", "nclouds"], trackstatus[:,:nfiles,:].astype(int)),
+        "track_mergenumbers": (["time", "nfiles", "nclouds"], trackmergenumber[:,:nfiles,:]),
+        "track_splitnumbers": (["time", "nfiles", "nclouds"], tracksplitnumber[:,:nfiles,:]),
+        "track_reset": (["time", "nfiles", "nclouds"], trackreset[:,:nfiles,:]),
+        }
+    coord_dict = {
+        "time": (["time"], np.arange(0, 1)),
+        "nfiles": (["nfiles"], np.arange(nfiles)),
+        "nclouds": (["nclouds"], np.arange(0, maxnclouds)),
+        "ncharacters": (["ncharacters"], np.arange(0, strlength)),
+    }
+    gattr_dict = {
+        "Title": "Indicates the track each cloud is linked to. " + \
+                 "Flags indicate how the clouds transition(evolve) between files.",
+        # "Conventions": "CF-1.6",
+        "Insitution": "Pacific Northwest National Laboratory",
+        "Contact": "Zhe Feng: zhe.feng@pnnl.gov",
+        "Created": time.ctime(time.time()),
+        # "source": datasource,
+        # "description": datadescription,
+        "singletrack_filebase": singletrack_filebase,
+        "startdate": startdate,
+        "enddate": enddate,
+        "timegap": str(timegap) + "-hours",
+    }
+    # Define Xarray dataset
+    ds_out = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict,)
+
+    # Set variable attributes
+    ds_out.ntracks.attrs["long_name"] = "number of cloud tracks"
+    ds_out.ntracks.attrs["units"] = "unitless"
+
+    ds_out.basetimes.attrs["long_name"] = "epoch time (seconds since 01/01/1970 00:00) of cloudid_files"
+    ds_out.basetimes.attrs["standard_name"] = "time"
+
+    ds_out.cloudid_files.attrs["long_name"] = "filename of each cloudid file used during tracking"
+    ds_out.cloudid_files.attrs["units"] = "unitless"
+
+    ds_out.track_numbers.attrs["long_name"] = "cloud track number"
+    ds_out.track_numbers.attrs["usage"] = "size: 1 by time by number of clouds. " + \
+    "Each column represents a cloudid file (time dimension). " + \
+    "Each row represents a cloud in that file (ex. row 0=cloud 1, row 1000=cloud 1001) through time. " + \
+    "The values indicate the track that cloud is in. This follows the largest cloud in mergers and splits."
+
+    ds_out.track_numbers.attrs["units"] = "unitless"
+    ds_out.track_numbers.attrs["valid_min"] = 1
+    ds_out.track_numbers.attrs["valid_max"] = itrack - 1
+
+    ds_out.track_status.attrs[
+        "long_name"
+    ] = "Flag indicating evolution / behavior for each cloud in a track"
+    ds_out.track_status.attrs["units"] = "unitless"
+    ds_out.track_status.attrs["valid_min"] = 0
+    ds_out.track_status.attrs["valid_max"] = 65
+
+    ds_out.track_mergenumbers.attrs[
+        "long_name"
+    ] = "Number of the track that this small cloud merges into"
+    ds_out.track_mergenumbers.attrs[
+        "usage"
+    ] = "size: 1 by time by number of clouds. Each column represents a cloudid file (time dimension). " + \
+        "Each row represets a cloud in that file through time. " + \
+        "Values give the track number associated with the small clouds in mergers."
+
+    ds_out.track_mergenumbers.attrs["units"] = "unitless"
+    ds_out.track_mergenumbers.attrs["valid_min"] = 1
+    ds_out.track_mergenumbers.attrs["valid_max"] = itrack - 1
+
+    ds_out.track_splitnumbers.attrs[
+        "long_name"
+    ] = "Number of the track that this small cloud splits from"
+    ds_out.track_splitnumbers.attrs[
+        "usage"
+    ] = "size: 1 by time by number of clouds. Each column represents a cloudid file (time). " + \
+        "Each row represets a cloud in that file through time. " + \
+        "Values give the track number associated with the small clouds in the split"
+    ds_out.track_splitnumbers.attrs["units"] = "unitless"
+    ds_out.track_splitnumbers.attrs["valid_min"] = 1
+    ds_out.track_splitnumbers.attrs["valid_max"] = itrack - 1
+
+    ds_out.track_reset.attrs[
+        "long_name"
+    ] = "flag of track starts and abrupt track stops"
+    ds_out.track_reset.attrs[
+        "usage"
+    ] = "Each row represents a cloudid file. Each column represents a cloud in that file. " + \
+        "Numbers indicate if the track started or adruptly ended during this file."
+    ds_out.track_reset.attrs[
+        "values"
+    ] = "0=Track starts and ends within a period of continuous data. " + \
+        "1=Track starts as the first file in the data set or after a data gap. " + \
+        "2=Track ends because data ends or gap in data."
+    ds_out.track_reset.attrs["units"] = "unitless"
+    ds_out.track_reset.attrs["valid_min"] = 0
+    ds_out.track_reset.attrs["valid_max"] = 2
+
+    # Write netcdf file
+    ds_out.to_netcdf(
+        path=tracknumbers_outfile,
+        mode="w",
+        format="NETCDF4_CLASSIC",
+        # unlimited_dims="ntracks",
+        encoding={
+            "ntracks": {"dtype": "int", "zlib": True},
+            "basetimes": {
+                "dtype": "int64",
+                "zlib": True,
+                "units": "seconds since 1970-01-01",
+            },
+            "cloudid_files": {
+                "zlib": True,
+            },
+            "track_numbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
+            "track_status": {"dtype": "int", "zlib": True, "_FillValue": -9999},
+            "track_mergenumbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
+            "track_splitnumbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
+            "track_reset": {"dtype": "int", "zlib": True, "_FillValue": -9999},
+        },
+    )
+    logger.info(tracknumbers_outfile)
+    logger.info('Get track numbers done.')
+    return tracknumbers_outfile
+
+
+def gettracknumbers_chunk(
+    files,
+    config,
+    prev_file=None,
+    first_chunk=True,
+    last_chunk=True,
+):
+    """
+    Track features sequentially through a contiguous chunk of single track files.
+
+    Track numbers of the clouds in the first reference file are initialized as 1, 2, ...,
+    and new tracks are numbered after them. For a chunk that is not the first,
+    these are replaced with the track numbers from the previous chunk in merge_tracknumbers_chunks.
+
+    Arguments:
+        files: list
+            Single track filenames, sorted in time.
+        config: dictionary
+            Dictionary containing config parameters.
+        prev_file: string, optional, default=None
+            Single track filename before this chunk (used to check time gap at the start of the chunk).
+        first_chunk: bool, optional, default=True
+            True if this is the first chunk of the dataset.
+        last_chunk: bool, optional, default=True
+            True if this is the last chunk of the dataset.
+
+    Returns:
+        chunk_dict: dictionary
+            Dictionary containing tracking matrices for the chunk.
+    """
+    # Get parameters from config
+    tracking_outpath = config["tracking_outpath"]
+    timegap = config["timegap"]
+    maxnclouds = config["maxnclouds"]
+    featuresize_varname = config.get("featuresize_varname", "npix_feature")
+    fillval = config["fillval"]
+
+    logger = logging.getLogger(__name__)
 
     ############################################################################
     # Initialize matrices
     nfiles = len(files)
-    logger.info(f"Total number of files to process: {nfiles}")
 
     fillval_f = np.nan
-    missingfrac = 0.3
-    nfiles_m = int(nfiles*(1.+missingfrac))
+    # Count the time gaps in the chunk, each gap adds an extra time to the tracking matrices
+    file_times = []
+    for ifile in ([prev_file] if prev_file is not None else []) + list(files):
+        singletracking_data = Dataset(ifile, "r")
+        file_times.append(np.copy(singletracking_data["basetime_new"][:][0]))
+        singletracking_data.close()
+    ngaps = np.count_nonzero(np.diff(np.array(file_times).astype(float)) > (timegap * 3600))
+    # Number of times: first reference file + new file of each single track file + time gaps
+    nfiles_m = nfiles + ngaps + 1
     tracknumber = np.full((1, nfiles_m, maxnclouds), fillval, dtype=int)
     referencetrackstatus = np.full((nfiles_m, maxnclouds), fillval_f, dtype=float)
     newtrackstatus = np.full((nfiles_m, maxnclouds), fillval_f, dtype=float)
-    trackstatus = np.full((1, nfiles_m, maxnclouds), fillval, dtype=int)
     trackmergenumber = np.full((1, nfiles_m, maxnclouds), fillval, dtype=int)
     tracksplitnumber = np.full((1, nfiles_m, maxnclouds), fillval, dtype=int)
     basetime = np.empty(nfiles_m, dtype="datetime64[s]")
@@ -97,13 +384,17 @@ def gettracknumbers(config):
     cloudidfiles[0, :] = list(os.path.basename(ref_file))
 
     # Initate track numbers
+    # (for a chunk that is not the first, these are the clouds in the last file of the previous chunk,
+    # the track numbers are replaced by those from the previous chunk when the chunks are merged)
     tracknumber[0, 0, 0 : int(nclouds_reference)] = (
         np.arange(0, int(nclouds_reference)) + 1
     )
     itrack = nclouds_reference + 1
+    ninit_tracks = nclouds_reference
 
     # Record that the tracks are being reset / initialized
-    trackreset[0, 0, :] = 1
+    if first_chunk:
+        trackreset[0, 0, :] = 1
 
     ###########################################################################
     # Loop over files and generate tracks
@@ -112,6 +403,13 @@ def gettracknumbers(config):
     logger.debug((time.ctime()))
     ifill = 0
 
+    # Time of the previous track file (to check time gap at the start of the chunk)
+    time_prev = None
+    if prev_file is not None:
+        singletracking_data = Dataset(prev_file, "r")
+        time_prev = np.copy(singletracking_data["basetime_new"][:][0])
+        singletracking_data.close()
+
     for ifile in range(0, nfiles):
         logger.info(os.path.basename(files[ifile]))
 
@@ -171,14 +469,14 @@ def gettracknumbers(config):
         # logger.debug((time.ctime()))
 
         # Set previous and new times
-        if ifile < 1:
+        if time_prev is None:
             time_prev = np.copy(basetime_new[0])
 
         time_new = np.copy(basetime_new[0])
 
         # Check if files immediately follow each other. Missing files can exist.
         # If missing files exist need to increment track numbers
-        if ifile > 0:
+        if (ifile > 0) | (prev_file is not None):
             time_diff = np.array([time_new - time_prev]).astype(float)
             # Convert timegap from [hour] to [second]
             # if time_diff > (timegap * 3.6 * 10 ** 12):
@@ -531,209 +829,101 @@ def gettracknumbers(config):
         #############################################################################
         # Flag the last file in the dataset
         if ifile == nfiles - 1:
-            logger.debug("WE ARE AT THE LAST FILE")
-            for ncn in range(1, int(nclouds_new) + 1):
-                trackreset[0, ifill + 1, :] = 2
+            if last_chunk:
+                logger.debug("WE ARE AT THE LAST FILE")
+                for ncn in range(1, int(nclouds_new) + 1):
+                    trackreset[0, ifill + 1, :] = 2
             ifill = ifill + 1
             break
 
         ##############################################################################
         # Increment to next fill
         ifill = ifill + 1
-
-    trackstatus[0, :, :] = np.nansum(
-        np.dstack((referencetrackstatus, newtrackstatus)), 2
-    )
-    trackstatus[np.isnan(trackstatus)] = -9999
-
-    logger.debug("Tracking Done")
-
-    nfiles = ifill + 1
-
-    # #################################################################
-    # # Create histograms of the values in tracknumber.
-    # # This effectively counts the number of times each track number appaers in tracknumber,
-    # # which is equivalent to calculating the length of the track.
-    # tracklengths, trackbins = np.histogram(
-    #     np.copy(tracknumber[0, :, :]),
-    #     bins=np.arange(1, itrack + 1, 1),
-    #     range=(1, itrack + 1),
-    # )
-
-    # # #################################################################
-    # # Remove all tracks that have only one cloud.
-    # logger.debug("Removing short tracks")
-    # # logger.debug((time.ctime()))
-    #
-    # # Identify single cloud tracks
-    # singletracks = np.array(np.where(tracklengths <= 1))[0, :]
-    # nsingletracks = len(singletracks)
-    # # singleindices = np.logical_or(tracknumber[0, :, :] == singletracks)
-    #
-    # # Loop over single cloudtracks
-    # nsingleremove = 0
-    # for strack in singletracks:
-    #
-    #     # Indentify clouds in this track
-    #     # Need to add one since singletracks lists the index in the matrix, which starts at zero.
-    #     # Track number starts at one.
-    #     cloudindex = np.array(
-    #         np.where(tracknumber[0, :, :] == int(strack + 1))
-    #     )
-    #
-    #     # Only remove single track if it is not small merger or small split.
-    #     # This is only done if keepsingletrack == 1. This is the default.
-    #     if keepsingletrack == 1:
-    #         if (
-    #             tracksplitnumber[0, cloudindex[0], cloudindex[1]] < 0
-    #             and trackmergenumber[0, cloudindex[0], cloudindex[1]] < 0
-    #         ):
-    #             tracknumber[0, cloudindex[0], cloudindex[1]] = -2
-    #             trackstatus[0, cloudindex[0], cloudindex[1]] = -9999
-    #             nsingleremove = nsingleremove + 1
-    #             tracklengths[strack] = -9999
-    #
-    #     # Remove all single tracks. This corresponds to keepsingletrack == 0.
-    #     else:
-    #         tracknumber[0, cloudindex[0], cloudindex[1]] = -2
-    #         trackstatus[0, cloudindex[0], cloudindex[1]] = -9999
-    #         nsingleremove = nsingleremove + 1
-    #         tracklengths[strack] = -9999
-
-    #######################################################################
-    # Save file
-    logger.debug("Writing all track statistics file")
-    logger.debug((time.ctime()))
-
-    # Check if file already exists. If exists, delete
-    if os.path.isfile(tracknumbers_outfile):
-        os.remove(tracknumbers_outfile)
-
-    # Define output variables dictionary
-    var_dict = {
-        "ntracks": (["time"], np.array([itrack])),
-        "basetimes": (["nfiles"], basetime[:nfiles].astype("datetime64[ns]")),
-        "cloudid_files": (["nfiles", "ncharacters"], cloudidfiles[:nfiles,:]),
-        "track_numbers": (["time", "nfiles", "nclouds"], tracknumber[:,:nfiles,:]),
-        "track_status": (["time", "nfiles", "nclouds"], trackstatus[:,:nfiles,:].astype(int)),
-        "track_mergenumbers": (["time", "nfiles", "nclouds"], trackmergenumber[:,:nfiles,:]),
-        "track_splitnumbers": (["time", "nfiles", "nclouds"], tracksplitnumber[:,:nfiles,:]),
-        "track_reset": (["time", "nfiles", "nclouds"], trackreset[:,:nfiles,:]),
-        }
-    coord_dict = {
-        "time": (["time"], np.arange(0, 1)),
-        "nfiles": (["nfiles"], np.arange(nfiles)),
-        "nclouds": (["nclouds"], np.arange(0, maxnclouds)),
-        "ncharacters": (["ncharacters"], np.arange(0, strlength)),
+    nrows = ifill + 1
+    chunk_dict = {
+        "ninit_tracks": ninit_tracks,
+        "itrack": itrack,
+        "basetime": basetime[:nrows],
+        "cloudidfiles": cloudidfiles[:nrows, :],
+        "tracknumber": tracknumber[:, :nrows, :],
+        "referencetrackstatus": referencetrackstatus[:nrows, :],
+        "newtrackstatus": newtrackstatus[:nrows, :],
+        "trackmergenumber": trackmergenumber[:, :nrows, :],
+        "tracksplitnumber": tracksplitnumber[:, :nrows, :],
+        "trackreset": trackreset[:, :nrows, :],
     }
-    gattr_dict = {
-        "Title": "Indicates the track each cloud is linked to. " + \
-                 "Flags indicate how the clouds transition(evolve) between files.",
-        # "Conventions": "CF-1.6",
-        "Insitution": "Pacific Northwest National Laboratory",
-        "Contact": "Zhe Feng: zhe.feng@pnnl.gov",
-        "Created": time.ctime(time.time()),
-        # "source": datasource,
-        # "description": datadescription,
-        "singletrack_filebase": singletrack_filebase,
-        "startdate": startdate,
-        "enddate": enddate,
-        "timegap": str(timegap) + "-hours",
-    }
-    # Define Xarray dataset
-    ds_out = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict,)
+    return chunk_dict
 
-    # Set variable attributes
-    ds_out.ntracks.attrs["long_name"] = "number of cloud tracks"
-    ds_out.ntracks.attrs["units"] = "unitless"
 
-    ds_out.basetimes.attrs["long_name"] = "epoch time (seconds since 01/01/1970 00:00) of cloudid_files"
-    ds_out.basetimes.attrs["standard_name"] = "time"
-
-    ds_out.cloudid_files.attrs["long_name"] = "filename of each cloudid file used during tracking"
-    ds_out.cloudid_files.attrs["units"] = "unitless"
-
-    ds_out.track_numbers.attrs["long_name"] = "cloud track number"
-    ds_out.track_numbers.attrs["usage"] = "size: 1 by time by number of clouds. " + \
-    "Each column represents a cloudid file (time dimension). " + \
-    "Each row represents a cloud in that file (ex. row 0=cloud 1, row 1000=cloud 1001) through time. " + \
-    "The values indicate the track that cloud is in. This follows the largest cloud in mergers and splits."
-
-    ds_out.track_numbers.attrs["units"] = "unitless"
-    ds_out.track_numbers.attrs["valid_min"] = 1
-    ds_out.track_numbers.attrs["valid_max"] = itrack - 1
-
-    ds_out.track_status.attrs[
-        "long_name"
-    ] = "Flag indicating evolution / behavior for each cloud in a track"
-    ds_out.track_status.attrs["units"] = "unitless"
-    ds_out.track_status.attrs["valid_min"] = 0
-    ds_out.track_status.attrs["valid_max"] = 65
-
-    ds_out.track_mergenumbers.attrs[
-        "long_name"
-    ] = "Number of the track that this small cloud merges into"
-    ds_out.track_mergenumbers.attrs[
-        "usage"
-    ] = "size: 1 by time by number of clouds. Each column represents a cloudid file (time dimension). " + \
-        "Each row represets a cloud in that file through time. " + \
-        "Values give the track number associated with the small clouds in mergers."
+def merge_tracknumbers_chunks(chunk_results, fillval):
+    """
+    Merge tracking matrices from contiguous time chunks and stitch tracks across chunk boundaries.
 
-    ds_out.track_mergenumbers.attrs["units"] = "unitless"
-    ds_out.track_mergenumbers.attrs["valid_min"] = 1
-    ds_out.track_mergenumbers.attrs["valid_max"] = itrack - 1
+    The last file of a chunk is the first reference file of the next chunk. The provisional track numbers
+    in each chunk are replaced with the track numbers from the previous chunk (tracks continuing across
+    the boundary) or offset by the number of tracks in the previous chunks (new tracks),
+    which gives the same track numbers as tracking all files sequentially.
 
-    ds_out.track_splitnumbers.attrs[
-        "long_name"
-    ] = "Number of the track that this small cloud splits from"
-    ds_out.track_splitnumbers.attrs[
-        "usage"
-    ] = "size: 1 by time by number of clouds. Each column represents a cloudid file (time). " + \
-        "Each row represets a cloud in that file through time. " + \
-        "Values give the track number associated with the small clouds in the split"
-    ds_out.track_splitnumbers.attrs["units"] = "unitless"
-    ds_out.track_splitnumbers.attrs["valid_min"] = 1
-    ds_out.track_splitnumbers.attrs["valid_max"] = itrack - 1
-
-    ds_out.track_reset.attrs[
-        "long_name"
-    ] = "flag of track starts and abrupt track stops"
-    ds_out.track_reset.attrs[
-        "usage"
-    ] = "Each row represents a cloudid file. Each column represents a cloud in that file. " + \
-        "Numbers indicate if the track started or adruptly ended during this file."
-    ds_out.track_reset.attrs[
-        "values"
-    ] = "0=Track starts and ends within a period of continuous data. " + \
-        "1=Track starts as the first file in the data set or after a data gap. " + \
-        "2=Track ends because data ends or gap in data."
-    ds_out.track_reset.attrs["units"] = "unitless"
-    ds_out.track_reset.attrs["valid_min"] = 0
-    ds_out.track_reset.attrs["valid_max"] = 2
+    Arguments:
+        chunk_results: list
+            List of dictionaries from gettracknumbers_chunk, sorted in time.
+        fillval: int
+            Missing value for the track number matrices.
 
-    # Write netcdf file
-    ds_out.to_netcdf(
-        path=tracknumbers_outfile,
-        mode="w",
-        format="NETCDF4_CLASSIC",
-        # unlimited_dims="ntracks",
-        encoding={
-            "ntracks": {"dtype": "int", "zlib": True},
-            "basetimes": {
-                "dtype": "int64",
-                "zlib": True,
-                "units": "seconds since 1970-01-01",
-            },
-            "cloudid_files": {
-                "zlib": True,
-            },
-            "track_numbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
-            "track_status": {"dtype": "int", "zlib": True, "_FillValue": -9999},
-            "track_mergenumbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
-            "track_splitnumbers": {"dtype": "int", "zlib": True, "_FillValue": -9999},
-            "track_reset": {"dtype": "int", "zlib": True, "_FillValue": -9999},
-        },
-    )
-    logger.info(tracknumbers_outfile)
-    logger.info('Get track numbers done.')
-    return tracknumbers_outfile
+    Returns:
+        merged_dict: dictionary
+            Dictionary containing merged tracking matrices.
+    """
+    keys = ["basetime", "cloudidfiles", "tracknumber", "referencetrackstatus", "newtrackstatus",
+            "trackmergenumber", "tracksplitnumber", "trackreset"]
+    # Matrices with track numbers that need to be converted
+    tracknumber_keys = ["tracknumber", "trackmergenumber", "tracksplitnumber"]
+    # Matrices with [time, nfiles, nclouds] dimensions
+    dim3_keys = ["tracknumber", "trackmergenumber", "tracksplitnumber", "trackreset"]
+
+    merged_list = {key: [] for key in keys}
+    next_track = 1
+    boundary_tracknumber = None
+    for ichunk, chunk_dict in enumerate(chunk_results):
+        ninit_tracks = chunk_dict["ninit_tracks"]
+        # Track numbers for the initial clouds (the first chunk keeps its own numbers)
+        if ichunk == 0:
+            init_tracknumber = np.arange(1, ninit_tracks + 1)
+            next_track = ninit_tracks + 1
+        else:
+            init_tracknumber = boundary_tracknumber[:ninit_tracks]
+        # Convert chunk track numbers to global track numbers
+        for key in tracknumber_keys:
+            chunk_number = chunk_dict[key]
+            init_index = np.clip(chunk_number - 1, 0, max(ninit_tracks - 1, 0))
+            init_number = init_tracknumber[init_index] if ninit_tracks > 0 else chunk_number
+            chunk_dict[key] = np.where(
+                chunk_number > ninit_tracks, chunk_number - ninit_tracks - 1 + next_track,
+                np.where(chunk_number >= 1, init_number, chunk_number)
+            )
+        next_track = chunk_dict["itrack"] - ninit_tracks - 1 + next_track
+
+        for key in keys:
+            values = chunk_dict[key]
+            if key in dim3_keys:
+                values = values[0]
+            if ichunk > 0:
+                # The first file of the chunk is the last file of the previous chunk,
+                # fill in values assigned to it in this chunk
+                prev_values = merged_list[key][-1]
+                first_values = values[0]
+                if key in ["basetime", "cloudidfiles"]:
+                    pass
+                elif key in ["referencetrackstatus", "newtrackstatus"]:
+                    prev_values[-1] = np.where(np.isnan(first_values), prev_values[-1], first_values)
+                else:
+                    prev_values[-1] = np.where(first_values == fillval, prev_values[-1], first_values)
+                values = values[1:]
+            merged_list[key].append(np.copy(values))
+        boundary_tracknumber = merged_list["tracknumber"][-1][-1]
+
+    merged_dict = {key: np.concatenate(merged_list[key], axis=0) for key in keys}
+    for key in dim3_keys:
+        merged_dict[key] = merged_dict[key][np.newaxis, :, :]
+    merged_dict["itrack"] = next_track
+    return merged_dict
@@ -9,6 +9,7 @@ from pyflextrkr.steiner_func import expand_conv_core
 from pyflextrkr.echotop_func import echotop_height
 from pyflextrkr.echotop_func import echotop_height_wrf
 from pyflextrkr.netcdf_io import write_radar_cellid
+from pyflextrkr.tiling_func import get_tile_dict
 
 def idcells_reflectivity(
     input_filename,
@@ -57,6 +58,8 @@ def idcells_reflectivity(
     convolve_method = config.get('convolve_method', 'ndimage')
     remove_smallcores = config.get('remove_smallcores', True)
     remove_smallcells = config.get('remove_smallcells', False)
+    # Domain tiling parameters (None if not enabled)
+    tile_dict = get_tile_dict(config)
 
     # Set echo classification type values
     types_powell = {
@@ -149,6 +152,7 @@ def idcells_reflectivity(
             remove_smallcells=remove_smallcells,
             return_diag=return_diag,
             convolve_method=convolve_method,
+            tile_dict=tile_dict,
         )
 
     if return_diag == True:
@@ -172,6 +176,7 @@ def idcells_reflectivity(
             remove_smallcells=remove_smallcells,
             return_diag=return_diag,
             convolve_method=convolve_method,
+            tile_dict=tile_dict,
         )
 
     # Expand convective cell masks outward to a set of radii to
@@ -5,6 +5,7 @@ import xarray as xr
 from scipy.signal import medfilt2d
 from scipy.ndimage import label, filters
 from pyflextrkr import netcdf_io as net
+from pyflextrkr.ft_utilities import get_geolimit_window
 
 def idclouds_gpmmergir(
     filename,
@@ -52,9 +53,13 @@ def idclouds_gpmmergir(
 
         # Read in data using xarray
         rawdata = xr.open_dataset(filename)
+        time_decode = rawdata["time"]
+        # Find the index window within lat/lon range set by geolimits,
+        # only the data within the window is read from the file
+        yslice, xslice = get_geolimit_window(rawdata["lat"], rawdata["lon"], config['geolimits'])
+        rawdata = rawdata.isel(lat=yslice, lon=xslice)
         lat = rawdata["lat"].values
         lon = rawdata["lon"].values
-        time_decode = rawdata["time"]
         original_ir = rawdata[config["tb_varname"]].values
         rawdata.close()
 
@@ -101,38 +106,13 @@ def idclouds_gpmmergir(
 
                 #####################################################
                 # determine geographic region of interest is within the data set.
-                # if it is proceed and limit the data to that geographic region. if not exit the code.
-
-                # isolate data within lat/lon range set by limit
-                indicesy, indicesx = np.array(
-                    np.where(
-                        (in_lat >= config['geolimits'][0])
-                        & (in_lat <= config['geolimits'][2])
-                        & (in_lon >= config['geolimits'][1])
-                        & (in_lon <= config['geolimits'][3])
-                    )
-                )
+                # if it is proceed (data has been limited to that geographic region when reading). if not exit the code.
 
                 # proceed if file covers the geographic region in interest
-                if (len(indicesx) > 0) and (len(indicesy) > 0):
-                    out_lat = np.copy(
-                        in_lat[
-                            np.nanmin(indicesy) : np.nanmax(indicesy) + 1,
-                            np.nanmin(indicesx) : np.nanmax(indicesx) + 1,
-                        ]
-                    )
-                    out_lon = np.copy(
-                        in_lon[
-                            np.nanmin(indicesy) : np.nanmax(indicesy) + 1,
-                            np.nanmin(indicesx) : np.nanmax(indicesx) + 1,
-                        ]
-                    )
-                    out_ir = np.copy(
-                        in_ir[
-                            np.nanmin(indicesy) : np.nanmax(indicesy) + 1,
-                            np.nanmin(indicesx) : np.nanmax(indicesx) + 1,
-                        ]
-                    )
+                if (in_ir.shape[0] > 0) and (in_ir.shape[1] > 0):
+                    out_lat = np.copy(in_lat)
+                    out_lon = np.copy(in_lon)
+                    out_ir = np.copy(in_ir)
 
                     ######################################################
                     # proceed only if number of missing data does not exceed an accepable threshold
@@ -193,7 +173,7 @@ def idclouds_gpmmergir(
                             if final_nclouds > 0:
                                 # Read precipitation
                                 rawdata = xr.open_dataset(filename, mask_and_scale=False)
-                                pcp = rawdata[config['pcp_varname']].values
+                                pcp = rawdata[config['pcp_varname']].isel(lat=yslice, lon=xslice).values
                                 rawdata.close()
 
                                 # For 'gpmirimerg', precipitation is averaged to 1-hourly
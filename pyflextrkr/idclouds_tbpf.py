@@ -6,14 +6,14 @@ import xarray as xr
 import pandas as pd
 from scipy.signal import medfilt2d
 from scipy.ndimage import label, filters
-from astropy.convolution import Box2DKernel, convolve
 from pyflextrkr import netcdf_io as net
 from pyflextrkr.ftfunctions import olr_to_tb
 from pyflextrkr.futyan3 import futyan3
 from pyflextrkr.label_and_grow_cold_clouds import label_and_grow_cold_clouds
-from pyflextrkr.ftfunctions import sort_renumber, sort_renumber2vars, link_pf_tb
+from pyflextrkr.ftfunctions import sort_renumber, sort_renumber2vars, link_pf_tb, box_smooth
 from pyflextrkr.sl3d_func import run_sl3d
-from pyflextrkr.ft_utilities import get_timestamp_from_filename_single
+from pyflextrkr.ft_utilities import get_timestamp_from_filename_single, get_geolimit_window
+from pyflextrkr.tiling_func import get_tile_dict, filter_tiled, label_tiled
 
 def idclouds_tbpf(
     filename,
@@ -75,6 +75,8 @@ def idclouds_tbpf(
     pf_dbz_thresh = config.get('pf_dbz_thresh', 0)
     pf_link_area_thresh = config.get('pf_link_area_thresh', 0)
     feature_type = config['feature_type']
+    # Domain tiling parameters (None if not enabled)
+    tile_dict = get_tile_dict(config)
     # Output file name parameters
     tracking_outpath = config['tracking_outpath']
     cloudid_filebase = config['cloudid_filebase']
@@ -130,43 +132,18 @@ def idclouds_tbpf(
         logger.debug(f'Added Timestamp: {file_timestamp} calculated from filename to the input data')
 
     # Get data coordinates
-    lat = rawdata[y_coordname].data
-    lon = rawdata[x_coordname].data
     time_decode = rawdata[time_coordname]
 
-    # Check coordinate dimensions
-    if (lat.ndim == 1) | (lon.ndim == 1):
-        # Mesh 1D coordinate into 2D
-        in_lon, in_lat = np.meshgrid(lon, lat)
-    elif (lat.ndim == 2) | (lon.ndim == 2):
-        in_lon = lon
-        in_lat = lat
-    else:
-        logger.critical("ERROR: Unexpected input data x, y coordinate dimensions.")
-        logger.critical(f"{x_coordname} dimension: {lon.ndim}")
-        logger.critical(f"{y_coordname} dimension: {lat.ndim}")
-        logger.critical("Tracking will now exit.")
-        sys.exit()
-
     ##############################################################################
     # Subset input dataset within geolimits
-    # Find indices within lat/lon range set by geolimits
-    indicesy, indicesx = np.array(
-        np.where(
-            (in_lat >= geolimits[0])
-            & (in_lat <= geolimits[2])
-            & (in_lon >= geolimits[1])
-            & (in_lon <= geolimits[3])
-        )
-    )
-    ymin, ymax = np.nanmin(indicesy), np.nanmax(indicesy) + 1
-    xmin, xmax = np.nanmin(indicesx), np.nanmax(indicesx) + 1
+    # Find the index window within lat/lon range set by geolimits (computed once per grid)
+    yslice, xslice = get_geolimit_window(rawdata[y_coordname], rawdata[x_coordname], geolimits)
     # Create a dictionary for dataset subset
     subset_dict = {
-        y_dimname: slice(ymin, ymax),
-        x_dimname: slice(xmin, xmax),
+        y_dimname: yslice,
+        x_dimname: xslice,
     }
-    # Subset dataset
+    # Subset dataset before reading the data, only the window is read from the file
     rawdata = rawdata[subset_dict]
     # Get lat/lon coordinates again
     lat = rawdata[y_coordname].data
@@ -178,6 +155,12 @@ def idclouds_tbpf(
     elif (lat.ndim == 2) | (lon.ndim == 2):
         in_lon = lon
         in_lat = lat
+    else:
+        logger.critical("ERROR: Unexpected input data x, y coordinate dimensions.")
+        logger.critical(f"{x_coordname} dimension: {lon.ndim}")
+        logger.critical(f"{y_coordname} dimension: {lat.ndim}")
+        logger.critical("Tracking will now exit.")
+        sys.exit()
     ##############################################################################
 
     # Convert OLR to Tb if olr2tb flag is set
@@ -226,7 +209,12 @@ def idclouds_tbpf(
                 sys.exit()
 
             # Use median filter to fill in missing values
-            ir_filt = medfilt2d(in_ir, kernel_size=medfiltsize)
+            if tile_dict is None:
+                ir_filt = medfilt2d(in_ir, kernel_size=medfiltsize)
+            else:
+                ir_filt = filter_tiled(
+                    lambda x: medfilt2d(x, kernel_size=medfiltsize), in_ir, tile_dict, halo=medfiltsize,
+                )
             # Copy the original IR data
             out_ir = np.copy(in_ir)
             # Create a mask for the missing pixels
@@ -240,7 +228,7 @@ def idclouds_tbpf(
             out_ir[out_ir > maxtb_thresh] = np.nan
 
             # proceed if file covers the geographic region in interest
-            if (len(indicesx) > 0) and (len(indicesy) > 0):
+            if (in_ir.shape[0] > 0) and (in_ir.shape[1] > 0):
 
                 # Determine number of missing data
                 missingcount = np.count_nonzero(np.isnan(out_ir))
@@ -258,6 +246,7 @@ def idclouds_tbpf(
                             mincoldcorepix,
                             smoothwindowdimensions,
                             warmanvilexpansion,
+                            tile_dict=tile_dict,
                         )
                     elif cloudidmethod == "futyan3":
                         clouddata = futyan3(
@@ -313,19 +302,24 @@ def idclouds_tbpf(
 
                             # Replace values <=0 with 0 before smoothing
                             pcp_linkpf[pcp_linkpf <= 0] = 0
-                            # Smooth pcp_linkpf using convolve filter (handles NaN)
-                            kernel = Box2DKernel(pf_smooth_window)
-                            pcp_s = convolve(
-                                np.squeeze(pcp_linkpf), kernel, 
-                                boundary="extend", nan_treatment="interpolate", preserve_nan=True,
-                            )
+                            # Smooth pcp_linkpf using a box filter (handles NaN)
+                            smooth_pf = lambda x: box_smooth(x, pf_smooth_window)
+                            if tile_dict is None:
+                                pcp_s = smooth_pf(np.squeeze(pcp_linkpf))
+                            else:
+                                pcp_s = filter_tiled(
+                                    smooth_pf, np.squeeze(pcp_linkpf), tile_dict, halo=pf_smooth_window + 1,
+                                )
                             # Smooth PF variable, then label PF exceeding threshold
                             # pcp_s = filters.uniform_filter(
                             #     np.squeeze(pcp_linkpf),
                             #     size=pf_smooth_window,
                             #     mode="nearest",
                             # )
-                            pf_number, npf = label(pcp_s >= pf_dbz_thresh)
+                            if tile_dict is None:
+                                pf_number, npf = label(pcp_s >= pf_dbz_thresh)
+                            else:
+                                pf_number, npf = label_tiled(pcp_s >= pf_dbz_thresh, tile_dict)
 
                             # Convert PF area threshold to number of pixels
                             min_npix = np.ceil(
@@ -52,12 +52,12 @@ def identifymcs_tb(config):
     statistics_file = f"{stats_path}{trackstats_sparse_filebase}{startdate}_{enddate}.nc"
     logger.debug(statistics_file)
 
-    # Load sparse tracks statistics file and convert to sparse arrays
+    # Load sparse tracks statistics file and convert to sparse arrays (only the needed variables)
     ds_1d, \
     sparse_attrs_dict, \
     sparse_dict = load_sparse_trackstats(max_trackduration, statistics_file,
                                          times_idx_varname, tracks_dimname,
-                                         tracks_idx_varname)
+                                         tracks_idx_varname, var_list=["core_area", "cold_area", "base_time", "cloudnumber", "track_status"])
 
     # Get necessary variables
     ntracks_all = ds_1d.sizes[tracks_dimname]
@@ -247,9 +247,12 @@ def identifymcs_tb(config):
     ###########################################################################
     # Prepare output dataset
 
-    # Subset tracks in sparse array dictionary
-    for ivar in sparse_dict.keys():
-        sparse_dict[ivar] = sparse_dict[ivar][trackidx_mcs, :]
+    # Load all sparse variables for the subset tracks
+    _, \
+    sparse_attrs_dict, \
+    sparse_dict = load_sparse_trackstats(max_trackduration, statistics_file,
+                                         times_idx_varname, tracks_dimname,
+                                         tracks_idx_varname, tracks_subset=trackidx_mcs)
     # Remove the tracks/times indices variables
     sparse_dict.pop(tracks_idx_varname, None)
     sparse_dict.pop(times_idx_varname, None)
@@ -1,8 +1,7 @@
 import sys
 import logging
-import dask
-from dask.distributed import wait
 from pyflextrkr.ft_utilities import subset_files_timerange
+from pyflextrkr.ft_executor import run_tasks
 
 def idfeature_driver(config):
     """
@@ -26,19 +25,9 @@ def idfeature_driver(config):
     start_basetime = config.get("start_basetime", None)
     end_basetime = config.get("end_basetime", None)
     time_format = config["time_format"]
-    run_parallel = config["run_parallel"]
     feature_type = config["feature_type"]
     # Load function depending on feature_type
-    if feature_type == "generic":
-        from pyflextrkr.idfeature_generic import idfeature_generic as id_feature
-    elif feature_type == "radar_cells":
-        from pyflextrkr.idcells_reflectivity import idcells_reflectivity as id_feature
-    elif "tb_pf" in feature_type:
-        from pyflextrkr.idclouds_tbpf import idclouds_tbpf as id_feature
-    else:
-        logger.critical(f"ERROR: Unknown feature_type: {feature_type}")
-        logger.critical("Tracking will now exit.")
-        sys.exit()
+    id_feature = get_idfeature_func(feature_type)
 
     # Identify files to process
     infiles_info = subset_files_timerange(
@@ -53,20 +42,41 @@ def idfeature_driver(config):
     nfiles = len(rawdatafiles)
     logger.info(f"Total number of files to process: {nfiles}")
 
-    # Serial
-    if run_parallel == 0:
-        for ifile in range(0, nfiles):
-            id_feature(rawdatafiles[ifile], config)
-    # Parallel
-    elif run_parallel >= 1:
-        results = []
-        for ifile in range(0, nfiles):
-            result = dask.delayed(id_feature)(rawdatafiles[ifile], config)
-            results.append(result)
-        final_result = dask.compute(*results)
-        wait(final_result)
+    # Multi-time ERA5 vorticity files: time steps of each file are split into tasks
+    if feature_type == "vorticity_era5":
+        from pyflextrkr.idvorticity_era5 import idvorticity_era5_driver
+        idvorticity_era5_driver(rawdatafiles, config)
     else:
-        sys.exit('Valid parallelization flag not provided')
+        # Run each file with the executor set in config (serial/processes/dask)
+        run_tasks(id_feature, [(ifile,) for ifile in rawdatafiles], config,
+                  static_kwargs={"config": config})
 
     logger.info('Done with features from raw data.')
-    return
\ No newline at end of file
+    return
+
+def get_idfeature_func(feature_type):
+    """
+    Get feature identification function for a feature type.
+
+    Args:
+        feature_type: string
+            Type of feature being tracked.
+
+    Returns:
+        id_feature: function
+            Feature identification function.
+    """
+    logger = logging.getLogger(__name__)
+    if feature_type == "generic":
+        from pyflextrkr.idfeature_generic import idfeature_generic as id_feature
+    elif feature_type == "radar_cells":
+        from pyflextrkr.idcells_reflectivity import idcells_reflectivity as id_feature
+    elif "tb_pf" in feature_type:
+        from pyflextrkr.idclouds_tbpf import idclouds_tbpf as id_feature
+    elif feature_type == "vorticity_era5":
+        from pyflextrkr.idvorticity_era5 import idvorticity_era5 as id_feature
+    else:
+        logger.critical(f"ERROR: Unknown feature_type: {feature_type}")
+        logger.critical("Tracking will now exit.")
+        sys.exit()
+    return id_feature
@@ -7,6 +7,7 @@ import pandas as pd
 import logging
 from scipy.ndimage import label
 from pyflextrkr.ftfunctions import sort_renumber, skimage_watershed
+from pyflextrkr.tiling_func import get_tile_dict, label_tiled
 
 def idfeature_generic(
     input_filename,
@@ -45,6 +46,8 @@ def idfeature_generic(
     R_earth = config.get("R_earth")
     pass_varname = config.get("pass_varname", None)
     fillval = config["fillval"]
+    # Domain tiling parameters (None if not enabled)
+    tile_dict = get_tile_dict(config)
 
     # Get min/max field thresholds
     field_thresh_min = np.min(field_thresh)
@@ -124,7 +127,10 @@ def idfeature_generic(
         # Label feature
         # Simple threshold & connectivity method
         if label_method == 'ndimage.label':
-            var_number, nblobs = label((field_thresh_min < fvar) & (fvar < field_thresh_max))
+            if tile_dict is None:
+                var_number, nblobs = label((field_thresh_min < fvar) & (fvar < field_thresh_max))
+            else:
+                var_number, nblobs = label_tiled((field_thresh_min < fvar) & (fvar < field_thresh_max), tile_dict)
             param_dict = {
                 'field_thresh': field_thresh,
             }
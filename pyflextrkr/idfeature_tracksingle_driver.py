@@ -0,0 +1,242 @@
+import logging
+import numpy as np
+import pandas as pd
+import xarray as xr
+from netCDF4 import Dataset
+from pyflextrkr.ft_executor import run_tasks, get_executor_name
+from pyflextrkr.ft_utilities import subset_files_timerange, get_timestamp_from_filename_single, \
+    match_drift_times
+from pyflextrkr.idfeature_driver import idfeature_driver, get_idfeature_func
+from pyflextrkr.tracksingle_driver import tracksingle_driver
+from pyflextrkr.tracksingle_drift import trackclouds, load_cloudid_frame
+
+def idfeature_tracksingle_driver(config):
+    """
+    Driver for streaming feature identification and linking.
+
+    The input files are split into contiguous blocks, one task per block.
+    Within a block, each new frame is linked to the previous frame kept in memory
+    as soon as it is identified, so every cloudid file is read only once.
+    Pairs straddling two blocks are linked after all blocks are done.
+    Streaming requires one time per input file, if the first input file has multiple times,
+    idfeature and tracksingle are run separately instead.
+
+    Args:
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        Feature identification and track data are written to netCDF files.
+    """
+
+    logger = logging.getLogger(__name__)
+    logger.info('Identifying features and linking them in a streaming pass')
+
+    clouddata_path = config["clouddata_path"]
+    databasename = config["databasename"]
+    start_basetime = config.get("start_basetime", None)
+    end_basetime = config.get("end_basetime", None)
+    time_format = config["time_format"]
+    driftfile = config.get("driftfile", None)
+    # Number of contiguous file blocks (default to the number of processors)
+    nblocks = config.get("stream_nblocks", config.get("nprocesses", 1))
+
+    # Identify files to process
+    infiles_info = subset_files_timerange(
+        clouddata_path,
+        databasename,
+        start_basetime=start_basetime,
+        end_basetime=end_basetime,
+        time_format=time_format,
+    )
+    # Get file list
+    rawdatafiles = infiles_info[0]
+    nfiles = len(rawdatafiles)
+    logger.info(f"Total number of files to process: {nfiles}")
+
+    # The feature identification functions return one cloudid file per input file,
+    # fall back to separate idfeature and tracksingle steps if the input files have multiple times
+    ntimes = get_ntimes(rawdatafiles[0], config.get("time_dimname", "time")) if nfiles > 0 else 1
+    if ntimes > 1:
+        logger.warning(f"Input files contain {ntimes} times, streaming requires one time per file.")
+        logger.warning("Running idfeature and tracksingle separately instead.")
+        idfeature_driver(config)
+        tracksingle_driver(config)
+        return
+
+    # Read drift data
+    drift_dict = None
+    if driftfile is not None:
+        drift_dict = get_drift_dict(driftfile)
+
+    # Split files into contiguous blocks
+    if get_executor_name(config) == "serial":
+        nblocks = 1
+    nblocks = max(1, min(nblocks, nfiles))
+    file_blocks = [block.tolist() for block in np.array_split(np.array(rawdatafiles), nblocks)]
+
+    # Run each block with the executor set in config (serial/processes/dask)
+    block_ends = run_tasks(
+        idfeature_tracksingle_block, [(block,) for block in file_blocks], config,
+        static_kwargs={"config": config, "drift_dict": drift_dict},
+    )
+
+    # Link the last frame of each block with the first frame of the next non-empty block
+    block_ends = [ends for ends in block_ends if ends[0] is not None]
+    logger.info(f"Linking {max(len(block_ends) - 1, 0)} pairs across block boundaries")
+    for iblock in range(0, len(block_ends) - 1):
+        ref_file, ref_basetime = block_ends[iblock][1]
+        new_file, new_basetime = block_ends[iblock + 1][0]
+        trackclouds(
+            (ref_file, new_file),
+            (ref_basetime, new_basetime),
+            config,
+            drift_data=get_drift_data(drift_dict, ref_basetime),
+        )
+
+    logger.info('Done with streaming feature identification and linking.')
+    return
+
+
+def idfeature_tracksingle_block(
+    rawdatafiles,
+    config,
+    drift_dict=None,
+):
+    """
+    Identify features and link consecutive frames for a contiguous block of input files.
+
+    Args:
+        rawdatafiles: list
+            Input data filenames, sorted in time.
+        config: dictionary
+            Dictionary containing config parameters.
+        drift_dict: dictionary, optional. Default: None.
+            Drift data {datetime_string: (xdrift, ydrift)}.
+
+    Returns:
+        first_frame: tuple
+            (cloudid filename, basetime) of the first frame in the block.
+        last_frame: tuple
+            (cloudid filename, basetime) of the last frame in the block.
+    """
+    logger = logging.getLogger(__name__)
+    id_feature = get_idfeature_func(config["feature_type"])
+    cloudid_filebase = config["cloudid_filebase"]
+    start_basetime = config["start_basetime"]
+    end_basetime = config["end_basetime"]
+
+    first_frame = None
+    last_frame = None
+    prev_frame = None
+    for ifile in rawdatafiles:
+        cloudid_file = id_feature(ifile, config)
+        # No cloudid file is written (e.g., no feature, too much missing data)
+        if cloudid_file is None:
+            continue
+        # Get basetime from cloudid filename (same as tracksingle_driver)
+        file_timestamp = get_timestamp_from_filename_single(
+            cloudid_file, cloudid_filebase, time_format="yyyymodd_hhmmss",
+        )
+        basetime = int((file_timestamp - pd.Timestamp('1970-01-01T00:00:00')).total_seconds())
+        if (basetime < start_basetime) | (basetime > end_basetime):
+            continue
+
+        frame = load_cloudid_frame(cloudid_file, config)
+        if prev_frame is not None:
+            # Link the new frame with the previous frame in memory
+            trackclouds(
+                (last_frame[0], cloudid_file),
+                (last_frame[1], basetime),
+                config,
+                drift_data=get_drift_data(drift_dict, last_frame[1]),
+                cloudid_frames=(prev_frame, frame),
+            )
+        else:
+            first_frame = (cloudid_file, basetime)
+        prev_frame = frame
+        last_frame = (cloudid_file, basetime)
+        logger.debug(f"Linked up to {cloudid_file}")
+
+    return first_frame, last_frame
+
+
+def get_ntimes(filename, time_dimname):
+    """
+    Get the number of times in an input file.
+
+    Args:
+        filename: string
+            Input data filename.
+        time_dimname: string
+            Time dimension name.
+
+    Returns:
+        ntimes: int
+            Number of times (1 for a file without a time dimension).
+    """
+    with Dataset(filename, "r") as ds:
+        if time_dimname in ds.dimensions:
+            ntimes = len(ds.dimensions[time_dimname])
+        else:
+            ntimes = 1
+    return ntimes
+
+
+def get_drift_dict(driftfile):
+    """
+    Read drift (advection) file into a dictionary.
+
+    Drift data are matched to each drift time with match_drift_times,
+    the same way tracksingle_driver matches them to the cloudid file times.
+
+    Args:
+        driftfile: string
+            Drift (advection) file name.
+
+    Returns:
+        drift_dict: dictionary
+            Drift data {datetime_string: (xdrift, ydrift)}.
+            xdrift/ydrift are integers for domain mean drift, or 2D arrays [tile_y, tile_x] for drift in tiles.
+    """
+    ds_drift = xr.open_dataset(driftfile)
+    datetime_drift = np.atleast_1d(ds_drift['time'].dt.strftime("%Y%m%d_%H%M%S").values).tolist()
+    ds_drift.close()
+    datestrings = [dt[0:8] for dt in datetime_drift]
+    timestrings = [dt[9:] for dt in datetime_drift]
+    # match_drift_times matches all but the last time (the last cloudid file is never a reference),
+    # repeat the last drift time so that every drift time is matched
+    datetime_drift_match, \
+    xdrifts_match, \
+    ydrifts_match = match_drift_times(datestrings + datestrings[-1:],
+                                      timestrings + timestrings[-1:],
+                                      driftfile=driftfile)
+    drift_dict = {
+        dt: (xx, yy) for dt, xx, yy in zip(datetime_drift_match, xdrifts_match, ydrifts_match) if dt != ''
+    }
+    return drift_dict
+
+
+def get_drift_data(drift_dict, reference_basetime):
+    """
+    Get drift data for a reference time.
+
+    Args:
+        drift_dict: dictionary
+            Drift data {datetime_string: (xdrift, ydrift)}.
+        reference_basetime: int
+            Reference frame base time (Epoch time).
+
+    Returns:
+        drift_data: tuple
+            Drift data (datetime_string, xdrift, ydrift), None if drift_dict is None.
+    """
+    if drift_dict is None:
+        return None
+    datetime_ref = pd.to_datetime(reference_basetime, unit="s").strftime("%Y%m%d_%H%M%S")
+    if datetime_ref in drift_dict:
+        xdrift, ydrift = drift_dict[datetime_ref]
+        return (datetime_ref, xdrift, ydrift)
+    else:
+        # No matching drift time (trackclouds will not apply shifting)
+        return ('', 0, 0)
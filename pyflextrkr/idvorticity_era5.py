@@ -5,10 +5,12 @@ import xarray as xr
 import logging
 from scipy.ndimage import label
 from pyflextrkr.ftfunctions import sort_renumber
+from pyflextrkr.ft_executor import run_tasks
 
 def idvorticity_era5(
     input_filename,
     config,
+    time_indices=None,
 ):
     """
     Identifies vorticity features from ERA5 data.
@@ -18,137 +20,251 @@ def idvorticity_era5(
             Input data filename
         config: dictionary
             Dictionary containing config parameters
+        time_indices: list, optional, default=None
+            Time indices in the input file to process. All times are processed if None.
 
     Returns:
         cloudid_outfile: string
-            Cloudid file name.
+            Cloudid file name (the last one if multiple times are processed).
+    """
+    # Identify features
+    feature_dict = label_vorticity_era5(input_filename, config, time_indices=time_indices)
+
+    # Write one file per time
+    ntimes = len(feature_dict["base_time"])
+    cloudid_outfile = None
+    for tt in range(0, ntimes):
+        cloudid_outfile = write_cloudid_vorticity(feature_dict, config, tt)
+
+    return cloudid_outfile
+
+
+def idvorticity_era5_driver(rawdatafiles, config):
+    """
+    Identifies vorticity features from multi-time ERA5 files, time steps of each file are split into tasks.
+
+    Args:
+        rawdatafiles: list
+            Input data filenames.
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        None.
+    """
+    time_dimname = config.get("time_dimname", "time")
+    ntimes_per_task = config.get("ntimes_per_task", 24)
+    logger = logging.getLogger(__name__)
+
+    # Split the times in each file into tasks
+    task_args = []
+    task_kwargs = []
+    for ifile in rawdatafiles:
+        with xr.open_dataset(ifile) as ds:
+            ntimes = ds.sizes[time_dimname]
+        for itime in range(0, ntimes, ntimes_per_task):
+            task_args.append((ifile,))
+            task_kwargs.append({"time_indices": list(range(itime, min(itime + ntimes_per_task, ntimes)))})
+    logger.info(f"Number of tasks: {len(task_args)}")
+
+    # Run the tasks with the executor set in config (serial/processes/dask)
+    run_tasks(idvorticity_era5, task_args, config, task_kwargs=task_kwargs,
+              static_kwargs={"config": config})
+    return
+
+
+def label_vorticity_era5(
+    input_filename,
+    config,
+    time_indices=None,
+):
+    """
+    Labels vorticity features for multiple times in an ERA5 file.
+
+    Args:
+        input_filename: string
+            Input data filename
+        config: dictionary
+            Dictionary containing config parameters
+        time_indices: list, optional, default=None
+            Time indices in the input file to process. All times are processed if None.
+
+    Returns:
+        feature_dict: dictionary
+            Dictionary containing the input field, labeled features and feature sizes for each time.
     """
-    feature_varname = config.get("feature_varname", "feature_number")
-    nfeature_varname = config.get("nfeature_varname", "nfeatures")
-    featuresize_varname = config.get("featuresize_varname", "npix_feature")
     x_dimname = config.get("x_dimname", "longitude")
     y_dimname = config.get("y_dimname", "latitude")
-    time_dimname = config.get("time", "time")
+    time_dimname = config.get("time_dimname", "time")
     field_varname = config.get("field_varname")
     vor_thresh = config.get("vor_thresh")
     min_npix = config.get("min_npix")
 
-    np.set_printoptions(threshold=np.inf)
-    logger = logging.getLogger(__name__)
-
-    fillval = config["fillval"]
-
     # Read input data
     ds = xr.open_dataset(input_filename, mask_and_scale=False)
-    ntimes = ds.dims[time_dimname]
+    if time_indices is not None:
+        ds = ds.isel({time_dimname: time_indices})
     x_coord = ds.coords[x_dimname]
     y_coord = ds.coords[y_dimname]
     time_decode = ds[time_dimname]
-    field_var = ds[field_varname]
+    # Read the field once with time as the leading (contiguous) dimension
+    field_var = ds[field_varname].transpose(time_dimname, ...)
+    field_data = np.ascontiguousarray(field_var.values)
+    field_attrs = field_var.attrs
+    basetime = time_decode.values.astype("datetime64[ns]").astype(np.int64) / 1e9
+    datestrings = time_decode.dt.strftime("%Y%m%d").values
+    timestrings = time_decode.dt.strftime("%H%M").values
+    x_coord.load()
+    y_coord.load()
     ds.close()
 
+    ntimes = field_data.shape[0]
+    feature_mask = np.zeros(field_data.shape, dtype=int)
+    nfeatures = np.zeros(ntimes, dtype=int)
+    npix_feature = []
+    # Loop over each time
+    for tt in range(0, ntimes):
+        # Label vorticity feature > vor_thresh
+        vor_number, nvor = label(field_data[tt] > vor_thresh)
+
+        # Sort and renumber features, filter features < min_npix
+        # Feature sizes come from the renumbering (feature 1 is the largest)
+        feature_mask[tt], inpix_feature = sort_renumber(vor_number, min_npix)
+        npix_feature.append(inpix_feature.astype(int))
+
+        # Get number of features
+        nfeatures[tt] = len(inpix_feature)
+
+    feature_dict = {
+        "field": field_data,
+        "field_attrs": field_attrs,
+        "feature_mask": feature_mask,
+        "nfeatures": nfeatures,
+        "npix_feature": npix_feature,
+        "base_time": basetime,
+        "datestrings": datestrings,
+        "timestrings": timestrings,
+        "x_coord": x_coord,
+        "y_coord": y_coord,
+    }
+    return feature_dict
+
+
+def write_cloudid_vorticity(
+    feature_dict,
+    config,
+    time_index,
+):
+    """
+    Writes labeled vorticity features at one time to a cloudid netCDF file.
+
+    Args:
+        feature_dict: dictionary
+            Dictionary containing features from label_vorticity_era5.
+        config: dictionary
+            Dictionary containing config parameters
+        time_index: int
+            Time index in feature_dict to write.
+
+    Returns:
+        cloudid_outfile: string
+            Cloudid file name.
+    """
+    feature_varname = config.get("feature_varname", "feature_number")
+    nfeature_varname = config.get("nfeature_varname", "nfeatures")
+    featuresize_varname = config.get("featuresize_varname", "npix_feature")
+    field_varname = config.get("field_varname")
+    vor_thresh = config.get("vor_thresh")
+    min_npix = config.get("min_npix")
+    fillval = config["fillval"]
+    logger = logging.getLogger(__name__)
+
+    # Keep the time dimension in the output variables
+    time_indices = [time_index]
+    x_coord = feature_dict["x_coord"]
+    y_coord = feature_dict["y_coord"]
+
     # Create 2D lat/lon grid
     lon2d, lat2d = np.meshgrid(x_coord, y_coord)
     lon2d = lon2d.astype(np.float32)
     lat2d = lat2d.astype(np.float32)
 
-    # Loop over each time
-    for tt in range(0, ntimes):
-        fvar = field_var.data[:,:,tt]
+    # Get date/time and make output filename
+    out_basetime = feature_dict["base_time"][time_indices]
+    out_nfeatures = feature_dict["nfeatures"][time_indices]
+    file_datestring = feature_dict["datestrings"][time_index]
+    file_timestring = feature_dict["timestrings"][time_index]
+    cloudid_outfile = (
+        config["tracking_outpath"] +
+        config["cloudid_filebase"] +
+        file_datestring +
+        "_" +
+        file_timestring +
+        ".nc"
+    )
 
-        # Label vorticity feature > vor_thresh
-        vor_number, nvor = label(fvar > vor_thresh)
+    # Number of pixels for each feature
+    npix_feature = feature_dict["npix_feature"][time_index]
+    nfeatures_max = len(npix_feature)
 
-        # Sort and renumber features, filter features < min_npix
-        feature_mask, npix_feature = sort_renumber(vor_number, min_npix)
+    #######################################################
+    # Output netcdf file
+    # Define 3 variables required for tracking
+    bt_attrs = {
+        "long_name": "Base time in Epoch",
+        "units": "Seconds since 1970-1-1 0:00:00 0:00",
+    }
+    featuremask_attrs = {
+        "long_name": "Labeled feature number for tracking",
+        "units": "unitless",
+    }
+    nfeatures_attrs = {
+        "long_name": "Number of features labeled",
+        "units": "unitless",
+    }
+    npix_feature_attrs = {
+        "long_name": "Number of pixels for each feature",
+        "units": "unitless",
+    }
+    # Define variable dictionary
+    var_dict = {
+        "base_time": (["time"], out_basetime, bt_attrs),
+        "longitude": (["lat", "lon"], lon2d, x_coord.attrs),
+        "latitude": (["lat", "lon"], lat2d, y_coord.attrs),
+        field_varname: (["time", "lat", "lon"], feature_dict["field"][time_indices], feature_dict["field_attrs"]),
+        feature_varname: (["time", "lat", "lon"], feature_dict["feature_mask"][time_indices], featuremask_attrs),
+        nfeature_varname: (["time"], out_nfeatures, nfeatures_attrs),
+        featuresize_varname: (["features"], npix_feature, npix_feature_attrs),
+    }
+    coord_dict = {
+        "time": (["time"], out_basetime, bt_attrs),
+        "lat": (["lat"], y_coord.data, y_coord.attrs),
+        "lon": (["lon"], x_coord.data, x_coord.attrs),
+        "features": (["features"], np.arange(1, nfeatures_max + 1)),
+    }
+    gattr_dict = {
+        "title": f"Cloudid file from {file_datestring}.{file_timestring}",
+        "institution": "Pacific Northwest National Laboratory",
+        "contact": "Zhe Feng: zhe.feng@pnnl.gov",
+        "created_on": time.ctime(time.time()),
+        "vor_thresh": vor_thresh,
+        "min_npix": min_npix,
+    }
+    # Define xarray dataset
+    dsout = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict)
 
-        # Count number of pixels for each feature
-        unique_num, npix_feature = np.unique(feature_mask, return_counts=True)
-        # Remove background (unique_num = 0)
-        npix_feature = npix_feature[(unique_num > 0)]
+    # Delete file if it already exists
+    if os.path.isfile(cloudid_outfile):
+        os.remove(cloudid_outfile)
 
-        # Get number of features
-        nfeatures = np.nanmax(feature_mask)
-
-        # Get date/time and make output filename
-        file_basetime = time_decode[tt].values.tolist() / 1e9
-        file_datestring = time_decode[tt].dt.strftime("%Y%m%d").item()
-        file_timestring = time_decode[tt].dt.strftime("%H%M").item()
-        cloudid_outfile = (
-            config["tracking_outpath"] +
-            config["cloudid_filebase"] +
-            file_datestring +
-            "_" +
-            file_timestring +
-            ".nc"
-        )
-
-        # Put time and nfeatures in a numpy array so that they can be set with a time dimension
-        out_basetime = np.zeros(1, dtype=float)
-        out_basetime[0] = file_basetime
-
-        out_nfeatures = np.zeros(1, dtype=int)
-        out_nfeatures[0] = nfeatures
-
-        #######################################################
-        # Output netcdf file
-        # Define 3 variables required for tracking
-        bt_attrs = {
-            "long_name": "Base time in Epoch",
-            "units": "Seconds since 1970-1-1 0:00:00 0:00",
-        }
-        featuremask_attrs = {
-            "long_name": "Labeled feature number for tracking",
-            "units": "unitless",
-        }
-        nfeatures_attrs = {
-            "long_name": "Number of features labeled",
-            "units": "unitless",
-        }
-        npix_feature_attrs = {
-            "long_name": "Number of pixels for each feature",
-            "units": "unitless",
-        }
-        # Define variable dictionary
-        var_dict = {
-            "base_time": (["time"], out_basetime, bt_attrs),
-            "longitude": (["lat", "lon"], lon2d, x_coord.attrs),
-            "latitude": (["lat", "lon"], lat2d, y_coord.attrs),
-            field_varname: (["time", "lat", "lon"], np.expand_dims(fvar, 0), field_var.attrs),
-            feature_varname: (["time", "lat", "lon"], np.expand_dims(feature_mask, 0), featuremask_attrs),
-            nfeature_varname: (["time"], out_nfeatures, nfeatures_attrs),
-            featuresize_varname: (["features"], npix_feature, npix_feature_attrs),
-        }
-        coord_dict = {
-            "time": (["time"], out_basetime, bt_attrs),
-            "lat": (["lat"], y_coord.data, y_coord.attrs),
-            "lon": (["lon"], x_coord.data, x_coord.attrs),
-            "features": (["features"], np.arange(1, nfeatures + 1)),
-        }
-        gattr_dict = {
-            "title": f"Cloudid file from {file_datestring}.{file_timestring}",
-            "institution": "Pacific Northwest National Laboratory",
-            "contact": "Zhe Feng: zhe.feng@pnnl.gov",
-            "created_on": time.ctime(time.time()),
-            "vor_thresh": vor_thresh,
-            "min_npix": min_npix,
-        }
-        # Define xarray dataset
-        dsout = xr.Dataset(var_dict, coords=coord_dict, attrs=gattr_dict)
-
-        # Delete file if it already exists
-        if os.path.isfile(cloudid_outfile):
-            os.remove(cloudid_outfile)
-
-        # Set encoding/compression for all variables
-        comp = dict(zlib=True)
-        encoding = {var: comp for var in dsout.data_vars}
-        # Write to netcdf file
-        dsout.to_netcdf(path=cloudid_outfile,
-                        mode='w',
-                        format='NETCDF4',
-                        encoding=encoding)
-        logger.info(f"{cloudid_outfile}")
-        # import pdb; pdb.set_trace()
+    # Set encoding/compression for all variables
+    comp = dict(zlib=True)
+    encoding = {var: comp for var in dsout.data_vars}
+    # Write to netcdf file
+    dsout.to_netcdf(path=cloudid_outfile,
+                    mode='w',
+                    format='NETCDF4',
+                    encoding=encoding)
+    logger.info(f"{cloudid_outfile}")
 
     return cloudid_outfile
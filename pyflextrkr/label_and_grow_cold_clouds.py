@@ -1,8 +1,8 @@
 import logging
 import numpy as np
 from scipy.ndimage import label, binary_dilation, generate_binary_structure
-from astropy.convolution import Box2DKernel, convolve
-from pyflextrkr.ftfunctions import sort_renumber, grow_cells
+from pyflextrkr.ftfunctions import sort_renumber, grow_cells, box_smooth
+from pyflextrkr.tiling_func import filter_tiled, label_tiled, grow_cells_tiled
 
 
 def label_and_grow_cold_clouds(
@@ -13,6 +13,7 @@ def label_and_grow_cold_clouds(
     mincoldcorepix,
     smoothsize,
     warmanvilexpansion,
+    tile_dict=None,
 ):
     """
     Label and growth cold clouds using infrared Tb.
@@ -32,6 +33,9 @@ def label_and_grow_cold_clouds(
             Window size to smooth Tb data using Box2DKernel.
         warmanvilexpansion: int
             Flag to expand cloud to include warm anvil.
+        tile_dict: dictionary, optional, default=None
+            Dictionary containing tiling parameters (from get_tile_dict).
+            If provided, smoothing, labeling and growing are done tile by tile.
 
     Returns:
         Dictionary: 
@@ -69,9 +73,14 @@ def label_and_grow_cold_clouds(
 
     #################################################################
     # Smooth Tb data
-    smoothir = smooth_tb(ir, smoothsize)
+    if tile_dict is None:
+        smoothir = smooth_tb(ir, smoothsize)
+    else:
+        smoothir = filter_tiled(lambda x: smooth_tb(x, smoothsize), ir, tile_dict, halo=smoothsize)
     # Label cold cores
-    labelcore_number2d, nlabelcores = find_and_label_cold_cores(smoothir, thresh_core)
+    labelcore_number2d, nlabelcores = find_and_label_cold_cores(
+        smoothir, thresh_core, tile_dict=tile_dict,
+    )
 
     # Create empty arrays
     labelcorecold_number2d = np.zeros((ny, nx), dtype=int)
@@ -106,7 +115,10 @@ def label_and_grow_cold_clouds(
             labelcorecold_number2d[cold_threshold_map] = -1
 
             # Then we grow out seed points
-            labelcorecold_number2d = grow_cells(labelcorecold_number2d)
+            if tile_dict is None:
+                labelcorecold_number2d = grow_cells(labelcorecold_number2d)
+            else:
+                labelcorecold_number2d = grow_cells_tiled(labelcorecold_number2d, tile_dict)
 
             # Then just to match before we put back old labels.
             labelcorecold_number2d[
@@ -137,7 +149,10 @@ def label_and_grow_cold_clouds(
             isolated_flag[isolated_indices] = 1
 
         # Label isolated cold cores or cold anvils
-        labelisolated_number2d, nlabelisolated = label(isolated_flag)
+        if tile_dict is None:
+            labelisolated_number2d, nlabelisolated = label(isolated_flag)
+        else:
+            labelisolated_number2d, nlabelisolated = label_tiled(isolated_flag, tile_dict)
 
         # Sort isolated cold cores/anvils by size and remove small ones
         sortedisolated_number2d, sortedisolated_npix = sort_renumber(labelisolated_number2d, nthresh)
@@ -211,7 +226,10 @@ def label_and_grow_cold_clouds(
         #################################################
         # Label regions with cold anvils and cores
         corecold_flag = core_flag + coldanvil_flag
-        corecold_number2d, ncorecold = label(coldanvil_flag)
+        if tile_dict is None:
+            corecold_number2d, ncorecold = label(coldanvil_flag)
+        else:
+            corecold_number2d, ncorecold = label_tiled(coldanvil_flag, tile_dict)
 
         ##########################################################
         # Loop through clouds and only keep those where core + cold anvil exceed threshold
@@ -424,7 +442,7 @@ def label_and_grow_cold_clouds(
     }
 
 
-def find_and_label_cold_cores(smoothir, thresh_core):
+def find_and_label_cold_cores(smoothir, thresh_core, tile_dict=None):
     """
     Label cold cores using ndimage.label.
 
@@ -433,6 +451,8 @@ def find_and_label_cold_cores(smoothir, thresh_core):
             Array containing smoothed IR Tb data.
         thresh_core: float
             Tb threshold to define cold core.
+        tile_dict: dictionary, optional, default=None
+            Dictionary containing tiling parameters. If provided, label tile by tile.
 
     Returns:
         labelcore_number2d: np.array
@@ -448,13 +468,16 @@ def find_and_label_cold_cores(smoothir, thresh_core):
     if nsmoothcorepix > 0:
         smoothcore_flag[smoothcore_indices] = 1
     # Label cold cores in smoothed data
-    labelcore_number2d, nlabelcores = label(smoothcore_flag)
+    if tile_dict is None:
+        labelcore_number2d, nlabelcores = label(smoothcore_flag)
+    else:
+        labelcore_number2d, nlabelcores = label_tiled(smoothcore_flag, tile_dict)
     return labelcore_number2d, nlabelcores
 
 
 def smooth_tb(ir, smoothsize):
     """
-    Smooth Tb with a convolve filter.
+    Smooth Tb with a box filter.
 
     Args:
         ir: np.array
@@ -469,11 +492,8 @@ def smooth_tb(ir, smoothsize):
             Array containing smoothed IR Tb data.
 
     """
-    # Smooth Tb data using a convolve filter
-    kernel = Box2DKernel(smoothsize)
-    smoothir = convolve(
-        ir, kernel, boundary="extend", nan_treatment="interpolate", preserve_nan=True
-    )
+    # Smooth Tb data using a NaN-aware box filter
+    smoothir = box_smooth(ir, smoothsize)
     return smoothir
 
 
@@ -51,12 +51,12 @@ def link_mergesplit_tracks(config):
     statistics_file = f"{stats_path}{trackstats_sparse_filebase}{startdate}_{enddate}.nc"
     logger.debug(statistics_file)
 
-    # Load sparse tracks statistics file and convert to sparse arrays
+    # Load sparse tracks statistics file and convert to sparse arrays (only the needed variables)
     ds_1d, \
     sparse_attrs_dict, \
     sparse_dict = load_sparse_trackstats(max_trackduration, statistics_file,
                                          times_idx_varname, tracks_dimname,
-                                         tracks_idx_varname)
+                                         tracks_idx_varname, var_list=["area", "base_time", "cloudnumber"])
 
     # Get necessary variables
     ntracks_all = ds_1d.dims[tracks_dimname]
@@ -67,7 +67,6 @@ def link_mergesplit_tracks(config):
     trackstat_area = sparse_dict["area"]
     basetime = sparse_dict["base_time"]
     cloudnumbers = sparse_dict["cloudnumber"]
-    track_status = sparse_dict["track_status"]
 
     logger.info(f"Number of tracks to process: {ntracks_all}")
 
@@ -94,103 +93,47 @@ def link_mergesplit_tracks(config):
     ntracks_main = len(maintrack_idx)
     logger.info(f"Number of main track defined: {ntracks_main}")
 
-    # maintrack_idx is the index number, want the track number so add one
-    maintracknumbers = np.copy(maintrack_idx) + 1
-
     ###################################################################################
     # Find small merge or split tracks and link to main tracks
-    merge_cloudnumber = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval, dtype=np.int32)
-    merge_status = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval, dtype=np.int32)
-    merge_area = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval_f, dtype=np.float32)
-    split_cloudnumber = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval, dtype=np.int32)
-    split_status = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval, dtype=np.int32)
-    split_area = np.full((ntracks_main, max_trackduration, nmaxmerge), fillval_f, dtype=np.float32)
-
-    # Loop through each main track and link small clouds merging in
-    for itrack in np.arange(0, ntracks_main):
-        ###################################################################################
-        # Find tracks that end as merging with the main track
-        mergetrack_idx = np.where(end_merge_tracknumber == maintracknumbers[itrack])[0]
-        if len(mergetrack_idx) > 0:
-            # Isolate merge tracks that have short duration
-            mergetrack_idx = mergetrack_idx[trackstat_lifetime[mergetrack_idx] < merge_duration]
-
-            # Make sure the merge tracks are not main track
-            mergetrack_idx = mergetrack_idx[np.isin(mergetrack_idx, maintrack_idx, invert=True)]
-            if len(mergetrack_idx) > 0:
-                # Get data for merging tracks
-                mergingcloudnumber = cloudnumbers[mergetrack_idx, :].data
-                mergingbasetime = basetime[mergetrack_idx, :].data
-                mergingstatus = track_status[mergetrack_idx, :].data
-                mergingarea = trackstat_area[mergetrack_idx, :].data
-
-                # Get main track basetime
-                itrack_bt = basetime[int(maintracknumbers[itrack]) - 1, :].data
-
-                # Loop through each timestep in the main track
-                for t in np.arange(0, len(itrack_bt)):
-                    # Find merging cloud times that match current main track time
-                    timematch = np.where(mergingbasetime == itrack_bt[int(t)])[0]
-                    nmergers = len(timematch)
-                    if nmergers > 0:
-                        # Find the smaller value between the two
-                        # to make sure it fits into the array
-                        nmergers_sav = np.min([nmergers, nmaxmerge])
-                        merge_cloudnumber[itrack, int(t), 0:nmergers_sav] = mergingcloudnumber[
-                            timematch[0:nmergers_sav]]
-                        merge_status[itrack, int(t), 0:nmergers_sav] = mergingstatus[timematch[0:nmergers_sav]]
-                        merge_area[itrack, int(t), 0:nmergers_sav] = mergingarea[timematch[0:nmergers_sav]]
-                        if (nmergers > nmaxmerge):
-                            logger.warning(f'WARNING: nmergers ({nmergers}) > nmaxmerge ({nmaxmerge}), ' + \
-                                           'only partial merge clouds are saved.')
-                            logger.warning(f'Main track index: {itrack}')
-                            logger.warning(f'Increase nmaxmerge to avoid this WARNING.')
-
-        ###################################################################################
-        # Find tracks that split from the main track
-        splittrack_idx = np.where(start_split_tracknumber == maintracknumbers[itrack])[0]
-        if len(splittrack_idx) > 0:
-            # Isolate split tracks that have short duration
-            splittrack_idx = splittrack_idx[trackstat_lifetime[splittrack_idx] < split_duration]
-
-            # Make sure the split tracks are not main track
-            splittrack_idx = splittrack_idx[np.isin(splittrack_idx, maintrack_idx, invert=True)]
-            if len(splittrack_idx) > 0:
-                # Get data for split tracks
-                splittingcloudnumber = cloudnumbers[splittrack_idx, :].data
-                splittingbasetime = basetime[splittrack_idx, :].data
-                splittingstatus = track_status[splittrack_idx, :].data
-                splittingarea = trackstat_area[splittrack_idx, :].data
-
-                # Get main track basetime
-                itrack_bt = basetime[int(maintracknumbers[itrack]) - 1, :].data
-
-                # Loop through each timestep in the main track
-                for t in np.arange(0, len(itrack_bt)):
-                    # Find splitting cloud times that match current main track time
-                    timematch = np.where(splittingbasetime == itrack_bt[int(t)])[0]
-                    nspliters = len(timematch)
-                    if nspliters > 0:
-                        # Find the smaller value between the two
-                        # to make sure it fits into the array
-                        nspliters_sav = np.min([nspliters, nmaxmerge])
-                        split_cloudnumber[itrack, int(t), 0:nspliters_sav] = splittingcloudnumber[
-                            timematch[0:nspliters_sav]]
-                        split_status[itrack, int(t), 0:nspliters_sav] = splittingstatus[timematch[0:nspliters_sav]]
-                        split_area[itrack, int(t), 0:nspliters_sav] = splittingarea[timematch[0:nspliters_sav]]
-                        if (nspliters > nmaxmerge):
-                            logger.warning(f'WARNING: nspliters ({nspliters}) > nmaxmerge ({nmaxmerge}), ' + \
-                                           'only partial split clouds are saved.')
-                            logger.warning(f'Main track index: {itrack}')
-                            logger.warning(f'Increase nmaxmerge to avoid this WARNING.')
-
+    # Tracks that end as merging with / start as splitting from a main track
+    # Isolate merge/split tracks that have short duration, make sure they are not main track
+    is_maintrack = np.zeros(ntracks_all, dtype=bool)
+    is_maintrack[maintrack_idx] = True
+    mergetrack_idx = np.where((trackstat_lifetime < merge_duration) & (~is_maintrack))[0]
+    splittrack_idx = np.where((trackstat_lifetime < split_duration) & (~is_maintrack))[0]
+
+    # Link merge/split clouds to main track times in sparse form (track, time, slot)
+    merge_links = get_mergesplit_links(
+        end_merge_tracknumber, mergetrack_idx, maintrack_idx,
+        basetime, [cloudnumbers, trackstat_area], nmaxmerge,
+    )
+    split_links = get_mergesplit_links(
+        start_split_tracknumber, splittrack_idx, maintrack_idx,
+        basetime, [cloudnumbers, trackstat_area], nmaxmerge,
+    )
+    for links, name in zip([merge_links, split_links], ['nmergers', 'nspliters']):
+        for itrack, nlinks in links["overflow"]:
+            logger.warning(f'WARNING: {name} ({nlinks}) > nmaxmerge ({nmaxmerge}), ' + \
+                           'only partial merge/split clouds are saved.')
+            logger.warning(f'Main track index: {itrack}')
+            logger.warning(f'Increase nmaxmerge to avoid this WARNING.')
+
+    # Make dense arrays for output
+    dense_shape = (ntracks_main, max_trackduration, nmaxmerge)
+    merge_cloudnumber = mergesplit_links_to_dense(merge_links, 0, dense_shape, fillval, np.int32)
+    merge_area = mergesplit_links_to_dense(merge_links, 1, dense_shape, fillval_f, np.float32)
+    split_cloudnumber = mergesplit_links_to_dense(split_links, 0, dense_shape, fillval, np.int32)
+    split_area = mergesplit_links_to_dense(split_links, 1, dense_shape, fillval_f, np.float32)
 
     ###########################################################################
     # Prepare output dataset
 
-    # Subset tracks in sparse array dictionary
-    for ivar in sparse_dict.keys():
-        sparse_dict[ivar] = sparse_dict[ivar][maintrack_idx, :]
+    # Load all sparse variables for the subset tracks
+    _, \
+    sparse_attrs_dict, \
+    sparse_dict = load_sparse_trackstats(max_trackduration, statistics_file,
+                                         times_idx_varname, tracks_dimname,
+                                         tracks_idx_varname, tracks_subset=maintrack_idx)
     # Remove the tracks/times indices variables
     sparse_dict.pop(tracks_idx_varname, None)
     sparse_dict.pop(times_idx_varname, None)
@@ -311,4 +254,116 @@ def link_mergesplit_tracks(config):
                     format="NETCDF4", unlimited_dims=tracks_dimname, encoding=encoding)
     logger.info(f"{statistics_outfile}")
 
-    return statistics_outfile
\ No newline at end of file
+    return statistics_outfile
+
+def get_mergesplit_links(parent_tracknumber, link_idx, maintrack_idx, basetime, link_vars, nmaxmerge):
+    """
+    Link merge/split clouds to main tracks by matching (parent track, base_time).
+
+    The links are found with a single group-by on the parent track numbers and a sorted join
+    on (parent main track, base_time) against the sparse track statistics.
+    Multiple clouds at the same main track time are stored in slots, in the order of track index.
+
+    Args:
+        parent_tracknumber: np.array
+            Track number each track merges into (or splits from) [ntracks_all].
+        link_idx: np.array
+            Track indices that can be linked (e.g., short duration, not main track).
+        maintrack_idx: np.array
+            Main track indices.
+        basetime: scipy.sparse.csr_matrix
+            Base time sparse array [ntracks_all, max_trackduration].
+        link_vars: list
+            Sparse arrays (same sparsity as basetime) with values to save for the linked clouds.
+        nmaxmerge: int
+            Maximum number of merge/split clouds saved at each main track time.
+
+    Returns:
+        links: dictionary
+            Dictionary containing sparse links:
+            'track': main track index, 'time': main track time index, 'slot': slot index,
+            'values': list of values for each variable in link_vars,
+            'overflow': list of (main track index, number of links) with more than nmaxmerge links.
+    """
+    ntracks_all = basetime.shape[0]
+    # Main track index for each track index (-1 for non-main track)
+    main_lookup = np.full(ntracks_all, -1, dtype=np.int64)
+    main_lookup[maintrack_idx] = np.arange(0, len(maintrack_idx))
+
+    # Main track index that each linkable track belongs to (group-by parent track number)
+    parent = np.asarray(parent_tracknumber[link_idx], dtype=np.float64)
+    valid = np.isfinite(parent) & (parent >= 1) & (parent <= ntracks_all)
+    row_main = np.full(ntracks_all, -1, dtype=np.int64)
+    row_main[link_idx[valid]] = main_lookup[parent[valid].astype(np.int64) - 1]
+
+    # Sparse entries: row (track index), position in the row (time index), base_time
+    indptr = basetime.indptr
+    entry_row = np.repeat(np.arange(0, ntracks_all), np.diff(indptr))
+    entry_time = np.arange(0, basetime.nnz) - indptr[entry_row]
+    # Convert base_time to integer ranks to make (track, base_time) keys
+    bt_unique, bt_rank = np.unique(basetime.data, return_inverse=True)
+    nbt = max(len(bt_unique), 1)
+
+    # Main track entries sorted by (main track, base_time)
+    main_entry = np.where(main_lookup[entry_row] >= 0)[0]
+    main_key = main_lookup[entry_row[main_entry]] * nbt + bt_rank[main_entry]
+    main_order = np.argsort(main_key, kind='stable')
+    main_key = main_key[main_order]
+    main_entry = main_entry[main_order]
+
+    # Linked cloud entries (in order of track index, then time)
+    link_entry = np.where(row_main[entry_row] >= 0)[0]
+    link_key = row_main[entry_row[link_entry]] * nbt + bt_rank[link_entry]
+    # Join on (main track, base_time)
+    pos = np.minimum(np.searchsorted(main_key, link_key), max(len(main_key) - 1, 0))
+    matched = np.zeros(len(link_key), dtype=bool)
+    if len(main_key) > 0:
+        matched = main_key[pos] == link_key
+    link_entry = link_entry[matched]
+    target = main_entry[pos[matched]]
+
+    # Slot index within each (main track, time), keep the track index order
+    order = np.argsort(target, kind='stable')
+    link_entry = link_entry[order]
+    target = target[order]
+    group_start = np.r_[0, np.nonzero(np.diff(target))[0] + 1]
+    group_size = np.diff(np.r_[group_start, len(target)])
+    slot = np.arange(0, len(target)) - np.repeat(group_start, group_size)
+    # Only save up to nmaxmerge clouds at each main track time
+    keep = slot < nmaxmerge
+    over = np.where(group_size > nmaxmerge)[0]
+    overflow = list(zip(main_lookup[entry_row[target[group_start[over]]]], group_size[over]))
+
+    links = {
+        'track': main_lookup[entry_row[target[keep]]],
+        'time': entry_time[target[keep]],
+        'slot': slot[keep],
+        'values': [ivar.data[link_entry[keep]] for ivar in link_vars],
+        'overflow': overflow,
+    }
+    return links
+
+
+def mergesplit_links_to_dense(links, ivar, dense_shape, fill_value, dtype):
+    """
+    Convert sparse merge/split links to a dense [tracks, times, nmaxmerge] array.
+
+    Args:
+        links: dictionary
+            Dictionary containing sparse links (from get_mergesplit_links).
+        ivar: int
+            Index of the variable in links['values'].
+        dense_shape: tuple
+            Dense array shape (ntracks_main, max_trackduration, nmaxmerge).
+        fill_value: int or float
+            Fill value for the dense array.
+        dtype: np.dtype
+            Data type for the dense array.
+
+    Returns:
+        dense_array: np.array
+            Dense array.
+    """
+    dense_array = np.full(dense_shape, fill_value, dtype=dtype)
+    dense_array[links['track'], links['time'], links['slot']] = links['values'][ivar]
+    return dense_array
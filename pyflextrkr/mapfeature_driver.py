@@ -1,11 +1,9 @@
 import os
-import sys
 import logging
 import numpy as np
 import xarray as xr
-import dask
-from dask.distributed import wait
 from pyflextrkr.ft_utilities import subset_files_timerange
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.mapfeature_func import map_feature
 
 def mapfeature_driver(
@@ -54,7 +52,6 @@ def mapfeature_driver(
     end_basetime = config["end_basetime"]
     # Minimum time difference threshold [second] to match track stats and cloudid pixel files
     match_pixel_dt_thresh = config["match_pixel_dt_thresh"]
-    run_parallel = config["run_parallel"]
     # feature_type = config["feature_type"]
     nmaxlinks = config["nmaxlinks"]
     tracks_dimname = config.get("tracks_dimname", "tracks")
@@ -115,7 +112,7 @@ def mapfeature_driver(
     nfiles = len(cloudidfiles)
     logger.info(f"Total number of files to process: {nfiles}")
 
-    results = []
+    task_args = []
     # Loop over each pixel file
     for ifile in range(0, nfiles):
         # Find all matching time indices from stats file to the current cloudid file
@@ -144,48 +141,26 @@ def mapfeature_driver(
         file_mergetracknumber = stats_mergetracknumber[itrack, itime]
         file_splittracknumber = stats_splittracknumber[itrack, itime]
 
-        # Serial
-        if run_parallel == 0:
-            result = map_feature(
-                cloudidfiles[ifile],
-                cloudidfiles_basetime[ifile],
-                file_trackindex,
-                file_cloudnumber,
-                file_trackstatus,
-                file_mergetracknumber,
-                file_splittracknumber,
-                file_mergecloudnumber,
-                file_splitcloudnumber,
-                trackstats_comments,
-                config,
-                pixeltracking_outpath,
-                pixeltracking_filebase,
-            )
-        # Parallel
-        elif run_parallel >= 1:
-            result = dask.delayed(map_feature)(
-                cloudidfiles[ifile],
-                cloudidfiles_basetime[ifile],
-                file_trackindex,
-                file_cloudnumber,
-                file_trackstatus,
-                file_mergetracknumber,
-                file_splittracknumber,
-                file_mergecloudnumber,
-                file_splitcloudnumber,
-                trackstats_comments,
-                config,
-                pixeltracking_outpath,
-                pixeltracking_filebase,
-            )
-            results.append(result)
-        else:
-            sys.exit('Valid parallelization flag not provided.')
-
-    if run_parallel >= 1:
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
+        task_args.append((
+            cloudidfiles[ifile],
+            cloudidfiles_basetime[ifile],
+            file_trackindex,
+            file_cloudnumber,
+            file_trackstatus,
+            file_mergetracknumber,
+            file_splittracknumber,
+            file_mergecloudnumber,
+            file_splitcloudnumber,
+        ))
+
+    # Map each file with the executor set in config (serial/processes/dask)
+    static_kwargs = {
+        "trackstats_comments": trackstats_comments,
+        "config": config,
+        "pixeltracking_outpath": pixeltracking_outpath,
+        "pixeltracking_filebase": pixeltracking_filebase,
+    }
+    run_tasks(map_feature, task_args, config, static_kwargs=static_kwargs)
 
     logger.info('Done with mapping features to pixel-level files')
     return
\ No newline at end of file
@@ -1,12 +1,10 @@
 import numpy as np
 import os
-import sys
 import xarray as xr
 import time
 import logging
-import dask
-from dask.distributed import wait
 from pyflextrkr.ft_utilities import subset_files_timerange
+from pyflextrkr.ft_executor import run_tasks
 # from pyflextrkr.matchtbpf_func import matchtbpf_singlefile
 
 def match_tbpf_tracks(config):
@@ -34,7 +32,6 @@ def match_tbpf_tracks(config):
     tracks_dimname = config["tracks_dimname"]
     times_dimname = config["times_dimname"]
     pf_dimname = config["pf_dimname"]
-    run_parallel = config["run_parallel"]
     fillval = config["fillval"]
     # Minimum time difference threshold [second] to match track stats and cloudid pixel files
     match_pixel_dt_thresh = config["match_pixel_dt_thresh"]
@@ -92,7 +89,7 @@ def match_tbpf_tracks(config):
     # Create a list to store matchindices for each pixel file
     trackindices_all = []
     timeindices_all = []
-    results = []
+    task_args = []
 
     # Loop over each pixel file to calculate PF statistics
     for ifile in range(nfiles):
@@ -113,38 +110,11 @@ def match_tbpf_tracks(config):
         trackindices_all.append(idx_track)
         timeindices_all.append(idx_time)
 
-        # Call function to calculate PF stats
-        # Serial
-        if run_parallel == 0:
-            result = matchtbpf_singlefile(
-                filename,
-                file_cloudnumber,
-                file_mergecloudnumber,
-                file_splitcloudnumber,
-                config,
-            )
-            results.append(result)
-        # Parallel
-        elif run_parallel >= 1:
-            result = dask.delayed(matchtbpf_singlefile)(
-                filename,
-                file_cloudnumber,
-                file_mergecloudnumber,
-                file_splitcloudnumber,
-                config,
-            )
-            results.append(result)
-        else:
-            sys.exit('Valid parallelization flag not provided.')
-
-    if run_parallel == 0:
-        final_result = results
-    elif run_parallel >= 1:
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
-    else:
-        sys.exit('Valid parallelization flag not provided.')
+        task_args.append((filename, file_cloudnumber, file_mergecloudnumber, file_splitcloudnumber))
+
+    # Calculate PF stats for each file with the executor set in config (serial/processes/dask)
+    final_result = run_tasks(matchtbpf_singlefile, task_args, config,
+                             static_kwargs={"config": config})
 
 
     #########################################################################################
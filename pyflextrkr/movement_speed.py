@@ -8,9 +8,8 @@ from netCDF4 import Dataset
 import xarray as xr
 from scipy.signal import fftconvolve
 from scipy.interpolate import interp1d
-import dask
-from dask.distributed import wait
 from pyflextrkr.ft_utilities import subset_files_timerange
+from pyflextrkr.ft_executor import run_tasks
 
 def movement_speed(
         config,
@@ -50,7 +49,6 @@ def movement_speed(
     end_basetime = config["end_basetime"]
     tracks_dimname = config["tracks_dimname"]
     times_dimname = config["times_dimname"]
-    run_parallel = config["run_parallel"]
     feature_type = config["feature_type"]
     pixel_radius = config["pixel_radius"]
     lag = config["lag_for_speed"]
@@ -105,28 +103,10 @@ def movement_speed(
     filepairs = list(zip(filelist[0:-lag], filelist[lag::]))
 
 
-    results = []
-    # Serial
-    if run_parallel == 0:
-        for ifile in range(0, nfiles-1):
-            result = movement_of_feature_fft(
-                filepairs[ifile], ntracks,
-                config,
-            )
-            results.append(result)
-        final_result = results
-    # Parallel
-    elif run_parallel >= 1:
-        for ifile in range(0, nfiles-1):
-            result = dask.delayed(movement_of_feature_fft)(
-                filepairs[ifile], ntracks,
-                config,
-            )
-            results.append(result)
-        final_result = dask.compute(*results)
-        wait(final_result)
-    else:
-        sys.exit('Valid parallelization flag not provided')
+    # Calculate movement for each file pair with the executor set in config (serial/processes/dask)
+    task_args = [(filepairs[ifile], ntracks) for ifile in range(0, nfiles-1)]
+    final_result = run_tasks(movement_of_feature_fft, task_args, config,
+                             static_kwargs={"config": config})
 
     move_y, move_x, time_lag, base_time = zip(*final_result)
     move_y = np.array(move_y)
@@ -1,15 +1,11 @@
 import numpy as np
 import time
-import os, sys, glob
+import os, glob
 import logging
 import xarray as xr
 import pandas as pd
-import xesmf as xe
-# import dask
-# from dask.distributed import wait
-from itertools import repeat
-from multiprocessing import Pool
-from pyflextrkr.ft_regrid_func import make_weight_file, make_grid4regridder
+from pyflextrkr.ft_executor import run_tasks, get_executor_name
+from pyflextrkr.ft_regrid_func import make_weight_file, get_regridder
 from pyflextrkr.ftfunctions import olr_to_tb
 from pyflextrkr.ft_utilities import subset_files_timerange
 
@@ -30,7 +26,6 @@ def preprocess_wrf_tb_rainrate(config):
     logger = logging.getLogger(__name__)
     
     # Get inputs from config
-    run_parallel = config['run_parallel']
     n_workers = config['nprocesses']
     indir = config['wrfout_path']
     outdir = config['clouddata_path']
@@ -67,109 +62,53 @@ def preprocess_wrf_tb_rainrate(config):
         # Build Regridder
         weight_filename = make_weight_file(filelist[0], config)
 
-    # Create a list with a pair of WRF filenames that are adjacent in time
-    filepairlist = []
-    for ii in range(0, nfiles-1):
-        ipair = [filelist[ii], filelist[ii+1]]
-        filepairlist.append(ipair)
-    nfilepairs = len(filepairlist)
-    
-    if run_parallel == 0:
-        # Serial version
-        for ifile in range(0, nfilepairs):
-            status = calc_rainrate_tb(filepairlist[ifile], outdir, inbasename, outbasename, config)
-    elif run_parallel == 1:
-        # Parallel version
-        # Dask
-        # results = []
-        # for ifile in range(0, nfilepairs):
-        #     result = dask.delayed(calc_rainrate_tb)(filepairlist[ifile], outdir, inbasename, outbasename, config)
-        #     results.append(result)
-        # final_result = dask.compute(*results)
-        # wait(final_result)
-
-        # Use starmap to unpack the iterables as arguments
-        # For arguments that are the same for each iterable, use itertools "repeat" to duplicate those
-        # Example follows this stackoverflow post
-        # https://stackoverflow.com/questions/5442910/python-multiprocessing-pool-map-for-multiple-arguments
-        # Refer to Pool.starmap:
-        # https://docs.python.org/dev/library/multiprocessing.html#multiprocessing.pool.Pool.starmap
-        pool = Pool(n_workers)
-        pool.starmap(
-            calc_rainrate_tb, 
-            zip(filepairlist, repeat(outdir), repeat(inbasename), repeat(outbasename), repeat(config)),
-        )
-        pool.close()
+    # Split files into contiguous blocks, each block reads its files once
+    # Adjacent blocks share one file (the last file of a block is the first reference file of the next block)
+    npairs = nfiles - 1
+    if get_executor_name(config) == 'serial':
+        nblocks = 1
     else:
-        sys.exit('Valid parallelization flag not set.')
-        
+        nblocks = max(1, min(n_workers, npairs))
+    pair_blocks = np.array_split(np.arange(0, npairs), nblocks)
+    fileblocklist = [filelist[iblock[0]:iblock[-1]+2] for iblock in pair_blocks if len(iblock) > 0]
+    logger.info(f'Number of file blocks: {len(fileblocklist)}')
+
+    # Run each file block with the executor set in config (serial/processes/dask)
+    task_args = [(iblock,) for iblock in fileblocklist]
+    static_kwargs = {
+        "outdir": outdir,
+        "inbasename": inbasename,
+        "outbasename": outbasename,
+        "config": config,
+    }
+    run_tasks(calc_rainrate_tb_block, task_args, config, static_kwargs=static_kwargs)
+
     return
 
 
 #-------------------------------------------------------------------------------------
-def calc_rainrate_tb(filepairnames, outdir, inbasename, outbasename, config):
+def read_wrf_rain_olr(filename, config):
     """
-    Calculates rain rates from a pair of WRF output files and write to netCDF
+    Read times, accumulated precipitation and OLR from a WRF output file.
 
     Args:
-        filepairnames: list
-            A list of filenames in pair
-        outdir: string
-            Output file directory.
-        inbasename: string
-            Input file basename.
-        outbasename: string
-            Output file basename.
+        filename: string
+            WRF output filename.
         config: dictionary
             Dictionary containing config parameters
 
     Returns:
-        status: 0 or 1
-            Returns status = 1 if success.
+        data_dict: dictionary
+            Dictionary containing times strings, basetimes, accumulated precipitation,
+            OLR, XLONG and XLAT.
     """
-
-    logger = logging.getLogger(__name__)
-    status = 0
-
-    regrid_input = config.get('regrid_input', False)
-    write_native = config.get('write_native', False)
     rainrate_method = config.get('rainrate_method', 'standard')
-    
-    # Filenames with full path
-    filein_t1 = filepairnames[0]
-    logger.debug(f'Reading input f1: {filein_t1}')
-
-    filein_t2 = filepairnames[1]
-    logger.debug(f'Reading input f2: {filein_t2}')
-
-    # Get filename
-    fname_t1 = os.path.basename(filein_t1)
-    fname_t2 = os.path.basename(filein_t2)
-
-    # Get basename string position
-    idx0 = fname_t1.find(inbasename)
-    ftime_t2 = fname_t2[idx0+len(inbasename):]
-    # Output filename
-    fileout = f'{outdir}/{outbasename}{ftime_t2}.nc'
-    # Output for native resolution
-    if (regrid_input) & (write_native):
-        outdir_native = f'{outdir}/native/'
-        fileout_native = f'{outdir_native}/{outbasename}{ftime_t2}.nc'
-        # Create output directory
-        os.makedirs(outdir_native, exist_ok=True)
 
-    # Read in WRF data files
-    ds_in = xr.open_mfdataset([filein_t1, filein_t2], concat_dim='Time', combine='nested')
+    ds_in = xr.open_dataset(filename)
     Times = ds_in['Times'].load()
-    XLONG = ds_in['XLONG'][0,:,:].squeeze()
-    XLAT = ds_in['XLAT'][0,:,:].squeeze()
-    ny, nx = np.shape(XLAT)
-    DX = ds_in.attrs['DX']
-    DY = ds_in.attrs['DY']
-    
     ntimes = len(Times)
     Times_str = []
-    basetimes = np.full(ntimes, np.NAN, dtype=float)
+    basetimes = np.full(ntimes, np.nan, dtype=float)
     for tt in range(0, ntimes):
         # Decode bytes to string with UTF-8 encoding, then replace "_" with "T"
         # to make time string: YYYY-MO-DDTHH:MM:SS
@@ -177,48 +116,68 @@ def calc_rainrate_tb(filepairnames, outdir, inbasename, outbasename, config):
         Times_str.append(tstring)
         # Convert time string to Epoch time
         basetimes[tt] = pd.to_datetime(tstring).timestamp()
-    # wrfdatetimes = pd.to_datetime(Times_str)
-
-    # Calculate basetime difference in [seconds]
-    delta_times = np.diff(basetimes)
 
     # Read and compute accumulated precipitation
     if rainrate_method == 'standard':
-        RAINNC = ds_in['RAINNC']
-        RAINC = ds_in['RAINC']
         # Add grid-scale and convective precipitation
-        RAINALL = (RAINNC + RAINC).load()
+        RAINALL = ds_in['RAINNC'].data + ds_in['RAINC'].data
     elif rainrate_method == 'saag':
-        RAINNC = ds_in['RAINNC']
-        I_RAINNC = ds_in['I_RAINNC']
         # The total precipitation accumulation from the initial time is computed (units: mm)
-        RAINALL = (RAINNC + I_RAINNC * 100).load()
-    
-    # Read OLR
-    OLR_orig = ds_in['OLR'].load()
+        RAINALL = ds_in['RAINNC'].data + ds_in['I_RAINNC'].data * 100
+
+    data_dict = {
+        'Times_str': Times_str,
+        'basetimes': basetimes,
+        'RAINALL': RAINALL.astype(np.float32),
+        'OLR': ds_in['OLR'].data.astype(np.float32),
+        'XLONG': ds_in['XLONG'][0,:,:].squeeze().data,
+        'XLAT': ds_in['XLAT'][0,:,:].squeeze().data,
+    }
+    ds_in.close()
+    return data_dict
 
-    # Create an array to store rainrates and brightness temperature
-    rainrate = np.zeros((ntimes-1,ny,nx), dtype=float)
-    OLR = np.zeros((ntimes-1,ny,nx), dtype = float)
 
-    # Loop over all times-1
-    for tt in range(0, ntimes-1):
-        # Calculate rainrate, convert unit to [mm/h]
-        rainrate[tt,:,:] = 3600. * (RAINALL.isel(Time=tt+1).data - RAINALL.isel(Time=tt).data) / delta_times[tt]
-        OLR[tt,:,:] = OLR_orig.isel(Time=tt+1).data
+#-------------------------------------------------------------------------------------
+def calc_rainrate_tb_block(filenames, outdir, inbasename, outbasename, config):
+    """
+    Calculates rain rates from a contiguous block of WRF output files and write to netCDF.
 
-    # Check regridding option
-    if regrid_input:
-        logger.info('Regridding input is requested.')
+    Each file is read once, the accumulated precipitation at the last time of the
+    previous file is kept in memory to calculate rain rate for the next file.
+    Rain rate for each output time is calculated from the adjacent file pair.
+
+    Args:
+        filenames: list
+            A list of WRF filenames adjacent in time.
+        outdir: string
+            Output file directory.
+        inbasename: string
+            Input file basename.
+        outbasename: string
+            Output file basename.
+        config: dictionary
+            Dictionary containing config parameters
+
+    Returns:
+        status: 0 or 1
+            Returns status = 1 if success.
+    """
 
-        weight_filename = config.get('weight_filename')
-        regrid_method = config.get('regrid_method', 'conservative')
+    logger = logging.getLogger(__name__)
+    status = 0
 
-        # Make source & destination grid data for regridder
-        grid_src, grid_dst = make_grid4regridder(filein_t1, config)
-        # Retrieve Regridder
-        regridder = xe.Regridder(grid_src, grid_dst, method=regrid_method, weights=weight_filename)
+    regrid_input = config.get('regrid_input', False)
+    write_native = config.get('write_native', False)
 
+    # Output for native resolution
+    if (regrid_input) & (write_native):
+        outdir_native = f'{outdir}/native/'
+        # Create output directory
+        os.makedirs(outdir_native, exist_ok=True)
+
+    # Retrieve Regridder (built once per worker and reused across files)
+    if regrid_input:
+        regridder, grid_dst = get_regridder(filenames[0], config)
         # Make output coordinates
         x_coord_dst = grid_dst['lon']
         y_coord_dst = grid_dst['lat']
@@ -227,47 +186,81 @@ def calc_rainrate_tb(filepairnames, outdir, inbasename, outbasename, config):
         else:
             x_coord_out = x_coord_dst
             y_coord_out = y_coord_dst
-        # Regrid variables
-        OLR_out = regridder(OLR)
-        rainrate_out = regridder(rainrate)
-    else:
-        # Native resolution variables
-        x_coord_out = XLONG.data
-        y_coord_out = XLAT.data
-        OLR_out = OLR
-        rainrate_out = rainrate
 
-    ds_in.close()
-    
-    # Convert OLR to IR brightness temperature
-    tb = olr_to_tb(OLR)
-    tb_out = olr_to_tb(OLR_out)
-
-    # Write single time frame to netCDF output
-    for tt in range(0, ntimes-1):
+    # Read the first file (reference for the next file)
+    prev_file = filenames[0]
+    logger.debug(f'Reading input: {prev_file}')
+    prev_data = read_wrf_rain_olr(prev_file, config)
+    XLONG = prev_data['XLONG']
+    XLAT = prev_data['XLAT']
+    if not regrid_input:
+        # Native resolution coordinates
+        x_coord_out = XLONG
+        y_coord_out = XLAT
+
+    for filein in filenames[1:]:
+        logger.debug(f'Reading input: {filein}')
+        data = read_wrf_rain_olr(filein, config)
+
+        # Output filename
+        fname_t1 = os.path.basename(prev_file)
+        fname_t2 = os.path.basename(filein)
+        # Get basename string position
+        idx0 = fname_t1.find(inbasename)
+        ftime_t2 = fname_t2[idx0+len(inbasename):]
+        fileout = f'{outdir}/{outbasename}{ftime_t2}.nc'
+        if (regrid_input) & (write_native):
+            fileout_native = f'{outdir_native}/{outbasename}{ftime_t2}.nc'
 
-        # Use the next time to be consitent with output filename
-        _basetime = basetimes[tt+1]
-        _TimeStr = Times_str[tt+1]
-        _tb = tb_out[tt,:,:]
-        _rainrate = rainrate_out[tt,:,:]
+        # Append the last time of the previous file
+        basetimes = np.concatenate([prev_data['basetimes'][-1:], data['basetimes']])
+        RAINALL = np.concatenate([prev_data['RAINALL'][-1:], data['RAINALL']], axis=0)
+        Times_str = prev_data['Times_str'][-1:] + data['Times_str']
+        # Calculate basetime difference in [seconds]
+        delta_times = np.diff(basetimes).astype(np.float32)
 
-        # Write output to file
-        write_netcdf(_TimeStr, _basetime, _rainrate, _tb,
-                     config, filein_t1, filein_t2, fileout, x_coord_out, y_coord_out)
-        logger.info(f'{fileout}')
+        # Calculate rainrate, convert unit to [mm/h]
+        rainrate = np.float32(3600.) * np.diff(RAINALL, axis=0) / delta_times[:, None, None]
+        OLR = data['OLR']
+
+        # Check regridding option
+        if regrid_input:
+            # Regrid variables together
+            regrid_out = regridder(np.stack([OLR, rainrate], axis=0))
+            OLR_out = regrid_out[0]
+            rainrate_out = regrid_out[1]
+        else:
+            OLR_out = OLR
+            rainrate_out = rainrate
 
-        # Write to native resolution file if regrid is requested
+        # Convert OLR to IR brightness temperature
+        tb_out = olr_to_tb(OLR_out)
         if (regrid_input) & (write_native):
-            __tb = tb[tt,:,:]
-            __rainrate = rainrate[tt,:,:]
+            tb = olr_to_tb(OLR)
+
+        # Write single time frame to netCDF output
+        for tt in range(0, len(delta_times)):
+            # Use the next time to be consitent with output filename
+            _basetime = basetimes[tt+1]
+            _TimeStr = Times_str[tt+1]
 
             # Write output to file
-            write_netcdf(_TimeStr, _basetime, __rainrate, __tb,
-                        config, filein_t1, filein_t2, fileout_native, XLONG.data, XLAT.data)
-            logger.info(f'{fileout_native}')
+            write_netcdf(_TimeStr, _basetime, rainrate_out[tt,:,:], tb_out[tt,:,:],
+                         config, prev_file, filein, fileout, x_coord_out, y_coord_out)
+            logger.info(f'{fileout}')
+
+            # Write to native resolution file if regrid is requested
+            if (regrid_input) & (write_native):
+                write_netcdf(_TimeStr, _basetime, rainrate[tt,:,:], tb[tt,:,:],
+                             config, prev_file, filein, fileout_native, XLONG, XLAT)
+                logger.info(f'{fileout_native}')
+
+            status = 1
+
+        # Keep the current file as reference for the next file
+        prev_file = filein
+        prev_data = data
 
-        status = 1
     return (status)
 
 
@@ -346,7 +339,7 @@ def write_netcdf(
     # Specify attributes
     dsout[time_dimname].attrs['long_name'] = 'Epoch time (seconds since 1970-01-01 00:00:00)'
     dsout[time_dimname].attrs['units'] = 'seconds since 1970-01-01 00:00:00'
-    # dsout[time_dimname].attrs['_FillValue'] = np.NaN
+    # dsout[time_dimname].attrs['_FillValue'] = np.nan
     dsout[time_dimname].attrs['tims_string'] = _TimeStr
     # dsout['Times'].attrs['long_name'] = 'WRF-based time'
     dsout[x_coordname].attrs['long_name'] = 'Longitude'
@@ -5,8 +5,7 @@ import glob
 import logging
 import numpy as np
 import xarray as xr
-import dask
-from dask.distributed import wait
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
 
 def regrid_celltracking_mask(config):
@@ -28,7 +27,6 @@ def regrid_celltracking_mask(config):
     in_basename = config['pixeltracking_filebase']
     out_basename = f'regrid_{in_basename}'
     out_dir = in_dir
-    run_parallel = config['run_parallel']
     start_basetime = config["start_basetime"]
     end_basetime = config["end_basetime"]
 
@@ -42,28 +40,62 @@ def regrid_celltracking_mask(config):
         )
     logger.info(f'Number of files to process: {len(in_files)}')
 
-    results = []
-    for ifile in in_files:
-        # Serial
-        if run_parallel == 0:
-            result = regrid_file(ifile, in_basename, out_dir, out_basename, config)
-        # Parallel
-        elif run_parallel >= 1:
-            result = dask.delayed(regrid_file)(ifile, in_basename, out_dir, out_basename, config)
-            results.append(result)
-        else:
-            sys.exit('Valid parallelization flag not provided')
-
-    if run_parallel >= 1:
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
+    # Build the regrid index operator once (all files are on the same grid)
+    regrid_index = None
+    if len(in_files) > 0:
+        ds = xr.open_dataset(in_files[0], decode_times=False, mask_and_scale=False)
+        regrid_index = get_regrid_index(ds.sizes['lat'], ds.sizes['lon'], config.get('regrid_ratio'))
+        ds.close()
+
+    task_args = [(ifile, in_basename, out_dir, out_basename) for ifile in in_files]
+    run_tasks(
+        regrid_file, task_args, config,
+        static_kwargs={"config": config, "regrid_index": regrid_index},
+    )
 
     logger.info('Done with regridding pixel-level files')
     return
 
 
-def regrid_file(in_filename, in_basename, out_dir, out_basename, config):
+def get_regrid_index(ny, nx, regrid_ratio):
+    """
+    Get nearest neighbor indices to regrid pixel level data to a higher resolution.
+
+    The coarse grid mimics subsampling the full grid at a regrid_ratio:1 ratio.
+    The indices are the same as nearest neighbor interpolation with extrapolation
+    (ties go to the lower index).
+
+    Args:
+        ny: int
+            Number of grid points in y direction of the input data.
+        nx: int
+            Number of grid points in x direction of the input data.
+        regrid_ratio: int
+            Ratio of the output resolution to the input resolution.
+
+    Returns:
+        regrid_index: dictionary
+            Dictionary containing input grid indices for each output grid point.
+    """
+    # Create a coordinate to mimic subsampling regrid_ratio:1 ratio of the full coordinate
+    xcoord = (np.linspace(2, nx*regrid_ratio+2, nx, endpoint=False, dtype=int))
+    ycoord = (np.linspace(2, ny*regrid_ratio+2, ny, endpoint=False, dtype=int))
+    # Create a full coordinate
+    xcoord_out = np.arange(0, nx*regrid_ratio, 1)
+    ycoord_out = np.arange(0, ny*regrid_ratio, 1)
+    # Nearest input grid point: compare with the mid-points between input grid points
+    xindex = np.searchsorted((xcoord[1:] + xcoord[:-1]) / 2, xcoord_out, side='left')
+    yindex = np.searchsorted((ycoord[1:] + ycoord[:-1]) / 2, ycoord_out, side='left')
+    regrid_index = {
+        'xindex': xindex,
+        'yindex': yindex,
+        'xcoord_out': xcoord_out,
+        'ycoord_out': ycoord_out,
+    }
+    return regrid_index
+
+
+def regrid_file(in_filename, in_basename, out_dir, out_basename, config, regrid_index=None):
     """
     Regrid pixel level masks for a given input file.
 
@@ -78,6 +110,8 @@ def regrid_file(in_filename, in_basename, out_dir, out_basename, config):
             Output file basename.
         config: dictionary
             Dictionary containing config parameters.
+        regrid_index: dictionary, optional, default=None
+            Regrid indices from get_regrid_index. Computed from the input file if not provided.
 
     Returns:
         out_filename: string
@@ -123,79 +157,38 @@ def regrid_file(in_filename, in_basename, out_dir, out_basename, config):
     # Read input data
     ds = xr.open_dataset(in_filename, decode_times=False, mask_and_scale=False)
     time_coord = ds['time']
-    ny, nx = ds.sizes['lat'], ds.sizes['lon']
-    # Create a coordinate to mimic subsampling regrid_ratio:1 ratio of the full coordinate
-    # regrid_ratio = 5
-    xcoord = (np.linspace(2, nx*regrid_ratio+2, nx, endpoint=False, dtype=int))
-    ycoord = (np.linspace(2, ny*regrid_ratio+2, ny, endpoint=False, dtype=int))
-    # Replace the input data coordinate
-    ds = ds.assign_coords({'lat':ycoord, 'lon':xcoord})
-
-    # Create a full coordinate
-    xcoord_out = np.arange(0, nx*regrid_ratio, 1)
-    ycoord_out = np.arange(0, ny*regrid_ratio, 1)
-
-    # Get variables for regridding
-    tracknumber = ds['tracknumber']
-    # tracknumber_cmask = ds['tracknumber_cmask']
-    track_status = ds['track_status']
-    feature_number = ds['feature_number']
-    merge_tracknumber = ds['merge_tracknumber']
-    split_tracknumber = ds['split_tracknumber']
-    conv_core = ds['conv_core']
-    conv_mask = ds['conv_mask']
-    # comp_ref = ds['comp_ref']
-    dbz_comp = ds['dbz_comp']
-    dbz_lowlevel = ds['dbz_lowlevel']
-    echotop10 = ds['echotop10']
-
-    # Remap to the full coordinate
-    # Mask variables
-    tracknumber_out = tracknumber.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    # tracknumber_cmask_out = tracknumber_cmask.interp(
-    #     lon=xcoord_out, lat=ycoord_out, method='nearest', 
-    #     assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    # ).data.astype(int)
-    track_status_out = track_status.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    feature_number_out = feature_number.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    merge_tracknumber_out = merge_tracknumber.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    split_tracknumber_out = split_tracknumber.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    conv_core_out = conv_core.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
-    conv_mask_out = conv_mask.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data.astype(int)
+    if regrid_index is None:
+        regrid_index = get_regrid_index(ds.sizes['lat'], ds.sizes['lon'], regrid_ratio)
+    xindex = regrid_index['xindex']
+    yindex = regrid_index['yindex']
+    xcoord_out = regrid_index['xcoord_out']
+    ycoord_out = regrid_index['ycoord_out']
+
+    # Mask variables (integer outputs)
+    mask_varnames = [
+        'tracknumber', 'track_status', 'feature_number',
+        'merge_tracknumber', 'split_tracknumber', 'conv_core', 'conv_mask',
+    ]
     # Radar variables
-    dbz_comp_out = dbz_comp.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data
-    dbz_lowlevel_out = dbz_lowlevel.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data
-    echotop10_out = echotop10.interp(
-        lon=xcoord_out, lat=ycoord_out, method='nearest', 
-        assume_sorted=True, kwargs={"fill_value": "extrapolate"},
-    ).data
+    radar_varnames = ['dbz_comp', 'dbz_lowlevel', 'echotop10']
+
+    # Remap to the full coordinate with nearest neighbor gathers,
+    # variables with the same data type are stacked and gathered together
+    var_groups = {}
+    for ivar in mask_varnames + radar_varnames:
+        var_groups.setdefault(ds[ivar].dtype, []).append(ivar)
+    out_dict = {}
+    for varnames in var_groups.values():
+        stacked = np.stack([ds[ivar].data for ivar in varnames], axis=0)
+        stacked_out = stacked[..., yindex[:, None], xindex[None, :]]
+        for ii, ivar in enumerate(varnames):
+            out_dict[ivar] = stacked_out[ii]
+    for ivar in mask_varnames:
+        out_dict[ivar] = out_dict[ivar].astype(int)
+    for ivar in radar_varnames:
+        # Integer radar variables are returned as float (same as interpolation)
+        if out_dict[ivar].dtype.kind in 'iub':
+            out_dict[ivar] = out_dict[ivar].astype(float)
 
     # Make output filename
     nleadingchar = len(f'{in_basename}')
@@ -209,17 +202,17 @@ def regrid_file(in_filename, in_basename, out_dir, out_basename, config):
         "longitude": (["lat", "lon"], xcoord_2d.data, xcoord_attrs),
         "latitude": (["lat", "lon"], ycoord_2d.data, ycoord_attrs),
         # "nclouds": (["time"], ds['nclouds'].data, ds['nclouds'].attrs),
-        "dbz_comp": (["time", "lat", "lon"], dbz_comp_out, dbz_comp.attrs),
-        "dbz_lowlevel": (["time", "lat", "lon"], dbz_lowlevel_out, dbz_lowlevel.attrs),
-        "conv_core": (["time", "lat", "lon"], conv_core_out, conv_core.attrs),
-        "conv_mask": (["time", "lat", "lon"], conv_mask_out, conv_mask.attrs),
-        "tracknumber": (["time", "lat", "lon"], tracknumber_out, tracknumber.attrs),
+        "dbz_comp": (["time", "lat", "lon"], out_dict["dbz_comp"], ds["dbz_comp"].attrs),
+        "dbz_lowlevel": (["time", "lat", "lon"], out_dict["dbz_lowlevel"], ds["dbz_lowlevel"].attrs),
+        "conv_core": (["time", "lat", "lon"], out_dict["conv_core"], ds["conv_core"].attrs),
+        "conv_mask": (["time", "lat", "lon"], out_dict["conv_mask"], ds["conv_mask"].attrs),
+        "tracknumber": (["time", "lat", "lon"], out_dict["tracknumber"], ds["tracknumber"].attrs),
         # "tracknumber_cmask": (["time", "lat", "lon"], tracknumber_cmask_out, tracknumber_cmask.attrs),
-        "track_status": (["time", "lat", "lon"], track_status_out, track_status.attrs),
-        "feature_number": (["time", "lat", "lon"], feature_number_out, feature_number.attrs),
-        "merge_tracknumber": (["time", "lat", "lon"], merge_tracknumber_out, merge_tracknumber.attrs),
-        "split_tracknumber": (["time", "lat", "lon"], split_tracknumber_out, split_tracknumber.attrs),
-        "echotop10": (["time", "lat", "lon"], echotop10_out, echotop10.attrs),
+        "track_status": (["time", "lat", "lon"], out_dict["track_status"], ds["track_status"].attrs),
+        "feature_number": (["time", "lat", "lon"], out_dict["feature_number"], ds["feature_number"].attrs),
+        "merge_tracknumber": (["time", "lat", "lon"], out_dict["merge_tracknumber"], ds["merge_tracknumber"].attrs),
+        "split_tracknumber": (["time", "lat", "lon"], out_dict["split_tracknumber"], ds["split_tracknumber"].attrs),
+        "echotop10": (["time", "lat", "lon"], out_dict["echotop10"], ds["echotop10"].attrs),
         # "echotop20": (["time", "lat", "lon"], echotop20),
         # "echotop30": (["time", "lat", "lon"], echotop30),
         # "echotop40": (["time", "lat", "lon"], echotop40),
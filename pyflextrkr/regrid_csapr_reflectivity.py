@@ -1,13 +1,11 @@
 import glob
 import os
-import sys
 import time
 import logging
 import numpy as np
 from scipy import ndimage
 import xarray as xr
-import dask
-from dask.distributed import wait
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
 
 def create_semi_symmetric_array(size):
@@ -53,7 +51,6 @@ def regrid_csapr_reflectivity(config):
     in_basename = config['rawdatabasename']
     out_dir = config["clouddata_path"]
     out_basename = config['databasename']
-    run_parallel = config['run_parallel']
     start_basetime = config["start_basetime"]
     end_basetime = config["end_basetime"]
     time_format = config["time_format"]
@@ -74,22 +71,8 @@ def regrid_csapr_reflectivity(config):
     nfiles = len(in_files)
     logger.info(f"Total number of files to process: {nfiles}")
 
-    results = []
-    for ifile in in_files:
-        # Serial
-        if run_parallel == 0:
-            result = regrid_file(ifile, in_basename, out_dir, out_basename, config)
-        # Parallel
-        elif run_parallel >= 1:
-            result = dask.delayed(regrid_file)(ifile, in_basename, out_dir, out_basename, config)
-            results.append(result)
-        else:
-            sys.exit('Valid parallelization flag not provided')
-
-    if run_parallel >= 1:
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
+    task_args = [(ifile, in_basename, out_dir, out_basename) for ifile in in_files]
+    run_tasks(regrid_file, task_args, config, static_kwargs={"config": config})
 
     logger.info('Done with regridding reflectivity files')
     return
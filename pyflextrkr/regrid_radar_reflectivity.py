@@ -1,13 +1,11 @@
 import glob
 import os
-import sys
 import time
 import logging
 import numpy as np
 from scipy import ndimage
 import xarray as xr
-import dask
-from dask.distributed import wait
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
 
 def create_semi_symmetric_array(size):
@@ -53,7 +51,6 @@ def regrid_radar_reflectivity(config):
     in_basename = config['rawdatabasename']
     out_dir = config["clouddata_path"]
     out_basename = config['databasename']
-    run_parallel = config['run_parallel']
     start_basetime = config["start_basetime"]
     end_basetime = config["end_basetime"]
     time_format = config["time_format"]
@@ -74,28 +71,62 @@ def regrid_radar_reflectivity(config):
     nfiles = len(in_files)
     logger.info(f"Total number of files to process: {nfiles}")
 
-    results = []
-    for ifile in in_files:
-        # Serial
-        if run_parallel == 0:
-            result = regrid_file(ifile, in_basename, out_dir, out_basename, config)
-        # Parallel
-        elif run_parallel >= 1:
-            result = dask.delayed(regrid_file)(ifile, in_basename, out_dir, out_basename, config)
-            results.append(result)
-        else:
-            sys.exit('Valid parallelization flag not provided')
-
-    if run_parallel >= 1:
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
+    task_args = [(ifile, in_basename, out_dir, out_basename) for ifile in in_files]
+    run_tasks(regrid_file, task_args, config, static_kwargs={"config": config})
 
     logger.info('Done with regridding reflectivity files')
     return
 
 
-def convolve_reflectivity(in_reflectivity, kernel):
+def strided_convolve(in_var, kernel, start_idx, regrid_ratio):
+    """
+    Evaluate ndimage.convolve (mode='constant', cval=0) only at subsampled points.
+
+    The output is the same as ndimage.convolve(in_var, kernel)[..., start_idx::regrid_ratio, start_idx::regrid_ratio],
+    but only the retained points are computed. The kernel weights are accumulated in the
+    same order and precision as ndimage.convolve.
+
+    Args:
+        in_var: np.array
+            Input variable array, can be either 2D or 3D.
+        kernel: np.array
+            Kernel for weights, same number of dimensions as in_var.
+            Leading (non y/x) kernel dimensions must have size 1.
+        start_idx: int
+            Index of the first retained point in y and x.
+        regrid_ratio: int
+            Subsampling interval in y and x.
+
+    Returns:
+        out_var: np.array
+            Convolved variable array at the retained points.
+    """
+    ny, nx = in_var.shape[-2:]
+    ky, kx = kernel.shape[-2:]
+    kernel2d = kernel.reshape(ky, kx)
+    # Index of retained points
+    yidx = np.arange(start_idx, ny, regrid_ratio)
+    xidx = np.arange(start_idx, nx, regrid_ratio)
+    # Pad y/x edges with zeros (same as mode='constant', cval=0.0)
+    pad = [(0, 0)] * (in_var.ndim - 2) + [(ky, ky), (kx, kx)]
+    in_pad = np.pad(in_var, pad, mode='constant', constant_values=0)
+
+    out_var = np.zeros(in_var.shape[:-2] + (len(yidx), len(xidx)), dtype=np.float64)
+    # Convolution flips the kernel: kernel element [jy, jx] weights input offset [ky//2 - jy, kx//2 - jx]
+    # Loop over input offsets in increasing order (same accumulation order as ndimage)
+    for jy in range(ky - 1, -1, -1):
+        for jx in range(kx - 1, -1, -1):
+            weight = kernel2d[jy, jx]
+            if weight == 0:
+                continue
+            iy = yidx + ky + (ky // 2 - jy)
+            ix = xidx + kx + (kx // 2 - jx)
+            out_var += in_pad[..., iy[:, None], ix[None, :]] * np.float64(weight)
+    # Output has the same type as input (same as ndimage.convolve)
+    return out_var.astype(in_var.dtype)
+
+
+def convolve_reflectivity(in_reflectivity, kernel, start_idx=0, regrid_ratio=None):
     """
     Apply convolution to reflectivity within a moving kernel.
     This is equivalent to averaging reflectivity within a moving window.
@@ -105,6 +136,10 @@ def convolve_reflectivity(in_reflectivity, kernel):
             Input reflectivity array, can be either 2D or 3D.
         kernel: np.array
             Kernel for weights.
+        start_idx: int, optional, default=0
+            Index of the first retained point in y and x (used with regrid_ratio).
+        regrid_ratio: int, optional, default=None
+            If provided, only every regrid_ratio-th point in y and x is computed and returned.
     
     Returns:
         out_reflectivity: np.array
@@ -116,22 +151,28 @@ def convolve_reflectivity(in_reflectivity, kernel):
     mask_goodvalues = (~np.isnan(in_reflectivity)).astype(float)
 
     # Apply convolution filter
-    bkg_linrefl = ndimage.convolve(linrefl, kernel, mode='constant', cval=0.0)
-    numPixs = ndimage.convolve(mask_goodvalues, kernel, mode='constant', cval=0.0)
+    if regrid_ratio is None:
+        bkg_linrefl = ndimage.convolve(linrefl, kernel, mode='constant', cval=0.0)
+        numPixs = ndimage.convolve(mask_goodvalues, kernel, mode='constant', cval=0.0)
+    else:
+        # Only compute retained points
+        bkg_linrefl = strided_convolve(linrefl, kernel, start_idx, regrid_ratio)
+        numPixs = strided_convolve(mask_goodvalues, kernel, start_idx, regrid_ratio)
+        mask_goodvalues = mask_goodvalues[..., start_idx::regrid_ratio, start_idx::regrid_ratio]
     # Mask missing data area
     bkg_linrefl[mask_goodvalues==0] = 0
     numPixs[mask_goodvalues==0] = 0
 
     # Calculate average linear reflectivity and convert to log values
-    out_reflectivity = np.full(in_reflectivity.shape, np.NaN, dtype=np.float32)
+    out_reflectivity = np.full(bkg_linrefl.shape, np.nan, dtype=np.float32)
     out_reflectivity[numPixs>0] = 10.0 * np.log10(bkg_linrefl[numPixs>0] / numPixs[numPixs>0])
 
     # Remove pixels with 0 number of pixels
-    out_reflectivity[mask_goodvalues==0] = np.NaN
+    out_reflectivity[mask_goodvalues==0] = np.nan
     
     return out_reflectivity
 
-def convolve_var(in_var, kernel):
+def convolve_var(in_var, kernel, start_idx=0, regrid_ratio=None):
     """
     Apply convolution to a variable within a moving kernel.
 
@@ -140,6 +181,10 @@ def convolve_var(in_var, kernel):
             Input variable array, can be either 2D or 3D.
         kernel: np.array
             Kernel for weights.
+        start_idx: int, optional, default=0
+            Index of the first retained point in y and x (used with regrid_ratio).
+        regrid_ratio: int, optional, default=None
+            If provided, only every regrid_ratio-th point in y and x is computed and returned.
     
     Returns:
         out_var: np.array
@@ -149,18 +194,24 @@ def convolve_var(in_var, kernel):
     mask_goodvalues = (~np.isnan(in_var)).astype(float)
 
     # Apply convolution filter
-    bkg_var = ndimage.convolve(in_var, kernel, mode='constant', cval=0.0)
-    numPixs = ndimage.convolve(mask_goodvalues, kernel, mode='constant', cval=0.0)
+    if regrid_ratio is None:
+        bkg_var = ndimage.convolve(in_var, kernel, mode='constant', cval=0.0)
+        numPixs = ndimage.convolve(mask_goodvalues, kernel, mode='constant', cval=0.0)
+    else:
+        # Only compute retained points
+        bkg_var = strided_convolve(in_var, kernel, start_idx, regrid_ratio)
+        numPixs = strided_convolve(mask_goodvalues, kernel, start_idx, regrid_ratio)
+        mask_goodvalues = mask_goodvalues[..., start_idx::regrid_ratio, start_idx::regrid_ratio]
     # Mask missing data area
     bkg_var[mask_goodvalues==0] = 0
     numPixs[mask_goodvalues==0] = 0
 
     # Calculate average linear reflectivity and convert to log values
-    out_var = np.full(in_var.shape, np.NaN, dtype=np.float32)
+    out_var = np.full(bkg_var.shape, np.nan, dtype=np.float32)
     out_var[numPixs>0] = bkg_var[numPixs>0] / numPixs[numPixs>0]
 
     # Remove pixels with 0 number of pixels
-    out_var[mask_goodvalues==0] = np.NaN
+    out_var[mask_goodvalues==0] = np.nan
 
     return out_var
 
@@ -221,11 +272,8 @@ def regrid_file(in_filename, in_basename, out_dir, out_basename, config):
 
     # Make a 3D kernel
     kernel3d = kernel[None,:,:]
-    # Call convlution function
-    REFL_conv = convolve_reflectivity(REFL.data, kernel3d)
-
-    # Subsample every X grid points
-    REFL_reg = REFL_conv[:,start_idx::regrid_ratio,start_idx::regrid_ratio]
+    # Call convlution function, only compute every X grid points
+    REFL_reg = convolve_reflectivity(REFL.data, kernel3d, start_idx=start_idx, regrid_ratio=regrid_ratio)
     # Check lat/lon array dimension
     if longitude.ndim == 1:
         longitude_reg = longitude.data[start_idx::regrid_ratio]
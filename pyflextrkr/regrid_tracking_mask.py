@@ -1,13 +1,11 @@
 import numpy as np
 import time
-import os, sys, glob
+import os, glob
 import logging
 import xarray as xr
-import xesmf as xe
-import dask
-from dask.distributed import wait
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.ft_utilities import subset_files_timerange
-from pyflextrkr.ft_regrid_func import make_weight_file, make_grid4regridder
+from pyflextrkr.ft_regrid_func import make_weight_file, get_regridder
 
 #-------------------------------------------------------------------------------------
 def regrid_tracking_mask(
@@ -39,7 +37,6 @@ def regrid_tracking_mask(
     logger = logging.getLogger(__name__)
 
     # Get inputs from config
-    run_parallel = config['run_parallel']
     n_workers = config['nprocesses']
     startdate = config["startdate"]
     enddate = config["enddate"]
@@ -105,19 +102,8 @@ def regrid_tracking_mask(
     # Build Regridder
     weight_filename_rev = make_weight_file(inputfiles[0], config_regrid)
 
-    if run_parallel == 0:
-        # Serial
-        for ifile in range(0, nfiles):
-            status = regrid_mask(inputfiles[ifile], pixeltracking_outpath, config_regrid)
-
-    elif run_parallel >= 1:
-        # Parallel
-        results = []
-        for ifile in range(0, nfiles):
-            result = dask.delayed(regrid_mask)(inputfiles[ifile], pixeltracking_outpath, config_regrid)
-            results.append(result)
-        final_result = dask.compute(*results)
-        wait(final_result)
+    task_args = [(inputfiles[ifile], pixeltracking_outpath) for ifile in range(0, nfiles)]
+    run_tasks(regrid_mask, task_args, config, static_kwargs={"config_regrid": config_regrid})
     # import pdb; pdb.set_trace()
     return
 
@@ -142,8 +128,6 @@ def regrid_mask(inputfile, outdir, config_regrid):
 
     logger = logging.getLogger(__name__)
 
-    weight_filename = config_regrid.get('weight_filename')
-    regrid_method = config_regrid.get('regrid_method')
     regrid_mask_varnames = config_regrid.get('regrid_mask_varnames')
 
     # If regrid_mask_varnames is not specified, regrid variable 'tracknumber'
@@ -154,18 +138,35 @@ def regrid_mask(inputfile, outdir, config_regrid):
     fname = os.path.basename(inputfile)
     outfilename = f'{outdir}/{fname}'
 
-    # Make source & destination grid data for regridder
-    grid_src, grid_dst = make_grid4regridder(inputfile, config_regrid)
-    # Retrieve Regridder
-    regridder = xe.Regridder(grid_src, grid_dst, method=regrid_method, weights=weight_filename)
+    # Retrieve Regridder (built once per worker and reused across files)
+    regridder, grid_dst = get_regridder(inputfile, config_regrid)
 
     # Read input data
     ds_in = xr.open_dataset(inputfile, mask_and_scale=False)
 
+    # Group variables with the same data type and dimensions,
+    # so that each group is regridded in a single call
+    var_groups = {}
+    for ivar in regrid_mask_varnames:
+        var_groups.setdefault((ds_in[ivar].dtype, ds_in[ivar].dims), []).append(ivar)
+
     # Regrid variables and put them in a dictionary
     var_dict = {}
-    for ivar in regrid_mask_varnames:
-        var_dict[ivar] = regridder(ds_in[ivar], keep_attrs=True)
+    for varnames in var_groups.values():
+        if len(varnames) == 1:
+            var_dict[varnames[0]] = regridder(ds_in[varnames[0]], keep_attrs=True)
+        else:
+            # Stack variables and regrid them together
+            stacked = xr.concat([ds_in[ivar] for ivar in varnames], dim='regrid_var')
+            stacked_out = regridder(stacked, keep_attrs=True)
+            for ii, ivar in enumerate(varnames):
+                # Replace the attributes carried over from the first stacked variable
+                # with the variable's own (e.g., units, _FillValue)
+                var_out = stacked_out.isel(regrid_var=ii)
+                var_out.attrs = dict(ds_in[ivar].attrs)
+                var_dict[ivar] = var_out
+    # Keep the variable order
+    var_dict = {ivar: var_dict[ivar] for ivar in regrid_mask_varnames}
  
     # Output coordinates
     x_coord = grid_dst['lon']
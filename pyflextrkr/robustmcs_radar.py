@@ -60,99 +60,41 @@ def define_robust_mcs_radar(config):
     pf_sfarea = ds_pf["pf_sfarea"].data
     pf_corearea = ds_pf["pf_corearea"].data
     pf_coremajoraxis = ds_pf["pf_coremajoraxis"].data
-    pf_ccaspectratio = ds_pf["pf_coreaspectratio"].data
     fillval = ds_pf["mcs_status"].attrs["_FillValue"]
     fillval_f = ds_pf["pf_area"].attrs["_FillValue"]
     time_res = float(ds_pf.attrs["time_resolution_hour"])
 
     ##################################################
     # Initialize matrices
-    trackid_mcs = []
-    trackid_nonmcs = []
-
     # pf_mcstype = np.full(ntracks, fillval, dtype=int)
     pf_mcsstatus = np.full((ntracks, ntimes), fillval, dtype=int)
     #pf_cctype = np.full((ntracks, ntimes), fillval, dtype=int)
 
-    ###################################################
-    # Loop through each track
-    for nt in range(0, ntracks):
-        logger.debug(f"Track #: {nt}")
-
-        ############################################
-        # Isolate data from this track
-        ilength = np.copy(ir_trackduration[nt]).astype(int)
-
-        # Get the largest precipitation (1st entry in 3rd dimension)
-        ipf_majoraxis = np.copy(pf_majoraxis[nt, 0:ilength, 0])
-        ipf_area = np.copy(pf_area[nt, 0:ilength, 0])
-        ipf_cc45area = np.copy(pf_cc45area[nt, 0:ilength, 0])
-        ipf_ccmajoraxis = np.copy(pf_coremajoraxis[nt, 0:ilength, 0])
-        ipf_ccaspectratio = np.copy(pf_ccaspectratio[nt, 0:ilength, 0])
-
-        ######################################################
-        # Apply radar defined MCS criteria
-        # PF major axis length > thresh and contains convective echo >= 45 dbZ
-        ipfmcs = np.where(
-                (ipf_majoraxis >= mcs_pf_majoraxis_thresh)
-                # & (ipf_majoraxis <= max_pf_majoraxis_thresh)
-                & (ipf_cc45area > 0)
-            )[0]
-        nipfmcs = len(ipfmcs)
-
-        if nipfmcs > 0:
-            # Apply duration threshold to entire time period
-            if (nipfmcs * time_res) > mcs_pf_durationthresh:
-
-                # Find continuous duration indices
-                groups = np.split(ipfmcs, np.where(np.diff(ipfmcs) > mcs_pf_gap)[0] + 1)
-                nbreaks = len(groups)
-
-                # Loop over each sub-period "group"
-                for igroup in range(0, nbreaks):
-
-                    ############################################################
-                    # Determine if each group satisfies duration threshold
-                    igroup_indices = np.array(np.copy(groups[igroup][:]))
-                    nigroup = len(igroup_indices)
-
-                    # Duration length: group's last index - first index + 1
-                    igroup_duration = np.multiply(
-                        (groups[igroup][-1] - groups[igroup][0] + 1), time_res
-                    )
-
-                    # Group satisfies duration threshold
-                    if igroup_duration >= mcs_pf_durationthresh:
-
-                        # Get radar variables for this group
-                        igroup_pfmajoraxis = np.copy(ipf_majoraxis[igroup_indices])
-                        igroup_ccaspectratio = np.copy(ipf_ccaspectratio[igroup_indices])
-
-                        # Label this period as MCS
-                        pf_mcsstatus[nt, igroup_indices] = 1
-                        logger.debug("MCS")
-
-                        ## Determine type of mcs (squall or non-squall)
-                        # isquall = np.array(np.where(igroup_ccaspectratio > aspectratiothresh))[0, :]
-                        # nisquall = len(isquall)
-
-                        # if nisquall > 0:
-                        #    # Label as squall
-                        #    pf_mcstype[nt] = 1
-                        #    pf_cctype[nt, igroup_indices[isquall]] = 1
-                        # else:
-                        #    # Label as non-squall
-                        #    pf_mcstype[nt] = 2
-                        #    pf_cctype[nt, igroup_indices[isquall]] = 2
-                    else:
-                        logger.debug("Not MCS")
-
-            # Group does not satisfy duration threshold
-            else:
-                trackid_nonmcs = np.append(trackid_nonmcs, int(nt))
-                logger.debug("Not MCS")
-        else:
-            logger.debug("Not MCS")
+    ######################################################
+    # Apply radar defined MCS criteria to all tracks at once
+    # Only times within each track duration are considered
+    track_length = ir_trackduration.astype(int)
+    in_track = np.arange(0, ntimes)[None, :] < track_length[:, None]
+    # Get the largest precipitation (1st entry in 3rd dimension)
+    # PF major axis length > thresh and contains convective echo >= 45 dbZ
+    pfmcs_mask = (
+        (pf_majoraxis[:, :, 0] >= mcs_pf_majoraxis_thresh)
+        # & (pf_majoraxis[:, :, 0] <= max_pf_majoraxis_thresh)
+        & (pf_cc45area[:, :, 0] > 0)
+        & in_track
+    )
+    # Find continuous duration periods (allowing gaps up to mcs_pf_gap)
+    pos_row, pos_time, run_id, run_row, run_first, run_second, run_last, run_count = \
+        get_mask_runs(pfmcs_mask, mcs_pf_gap)
+    # Apply duration threshold to entire time period
+    npfmcs = np.bincount(pos_row, minlength=ntracks)
+    track_qualify = (npfmcs * time_res) > mcs_pf_durationthresh
+    # Duration length: run's last index - first index + 1
+    run_duration = np.multiply((run_last - run_first + 1), time_res)
+    # Label the periods satisfying duration threshold as MCS
+    run_mcs = track_qualify[run_row] & (run_duration >= mcs_pf_durationthresh)
+    is_mcs = run_mcs[run_id]
+    pf_mcsstatus[pos_row[is_mcs], pos_time[is_mcs]] = 1
 
     # Find track indices that are robust MCS
     TEMP_mcsstatus = np.copy(pf_mcsstatus).astype(float)
@@ -198,195 +140,111 @@ def define_robust_mcs_radar(config):
     ilongmcs = np.array(np.where(lifetime >= mcs_lifecycle_thresh))[0, :]
     nlongmcs = len(ilongmcs)
 
+    # Initialize arrays
+    cycle_complete = np.full(nmcs, fillval, dtype=int)
+    cycle_stage = np.full((nmcs, ntimes), fillval, dtype=int)
+    cycle_index = np.full((nmcs, 5), fillval, dtype=int)
+
     if nlongmcs > 0:
-        # Initialize arrays
-        cycle_complete = np.full(nmcs, fillval, dtype=int)
-        cycle_stage = np.full((nmcs, ntimes), fillval, dtype=int)
-        cycle_index = np.full((nmcs, 5), fillval, dtype=int)
-
-        # TODO: port MCS lifecycle stage definition codes
-        # import matplotlib.pyplot as plt
-        # import pdb;
-        # pdb.set_trace()
-
-        #mcs_basetime = np.empty((nmcs, ntimes), dtype="datetime64[s]")
-
-        # Loop through each mcs
-        for ilm in range(0, nlongmcs):
-            # Initialize arrays
-            ilm_index = np.ones(5, dtype=int) * fillval
-            ilm_cycle = np.ones(ntimes, dtype=int) * fillval
-
-            # Isolate data from this track
-            ilm_irtracklength = np.copy(ir_trackduration[ilongmcs[ilm]]).astype(int)
-            ilm_pfccmajoraxis = np.copy(pf_coremajoraxis[ilongmcs[ilm], 0:ilm_irtracklength, :])
-            ilm_pfccarea = np.copy(pf_corearea[ilongmcs[ilm], 0:ilm_irtracklength, :])
-            ilm_meansfarea = np.sum(np.copy(pf_sfarea[ilongmcs[ilm], 0:ilm_irtracklength, :]), axis=1)
-            ilm_pfarea = np.copy(pf_area[ilongmcs[ilm], 0:ilm_irtracklength, 0])
-
-            ilm_maxpfccmajoraxis = np.nanmax(ilm_pfccmajoraxis, axis=1)
-            ilm_maxpfccarea = np.nanmax(ilm_pfccarea, axis=1)
-
-            #TEMP_basetime = np.array(
-            #        [
-            #            pd.to_datetime(
-            #                ds_pf["basetime"][
-            #                    trackid_mcs[ilongmcs[ilm]], 0:ilm_irtracklength
-            #                ].data,
-            #                unit="s",
-            #            )
-            #        ]
-            #)
-            #mcs_basetime[ilm, 0:ilm_irtracklength] = TEMP_basetime
-
-            ##################################################################
-            # Find indices of when convective line present and absent and when stratiform present
-
-            # Find times with convective core area > 0
-            iccarea = np.array(np.where(ilm_maxpfccarea > 0))[0, :]
-            iccarea_groups = np.split(iccarea, np.where(np.diff(iccarea) > 2)[0] + 1)
-            if len(iccarea) > 0 and len(iccarea_groups) > 1:
-                grouplength = np.empty(len(iccarea_groups))
-                for igroup in range(0, len(iccarea_groups)):
-                    grouplength[igroup] = len(iccarea_groups[igroup][:])
-                maxgroup = np.nanargmax(grouplength)
-                iccarea = iccarea_groups[maxgroup][:]
-            elif len(iccarea) > 0:
-                iccarea = np.arange(iccarea[0], iccarea[-1] + 1)
-            nccarea = len(iccarea)
-
-            # Find times with convective major axis length greater than 100 km
-            iccline = np.array(np.where(ilm_maxpfccmajoraxis > 100))[0, :]
-            iccline_groups = np.split(iccline, np.where(np.diff(iccline) > 2)[0] + 1)
-            if len(iccline) > 0 and len(iccline_groups) > 1:
-                grouplength = np.empty(len(iccline_groups))
-                for igroup in range(0, len(iccline_groups)):
-                    grouplength[igroup] = len(iccline_groups[igroup][:])
-                maxgroup = np.nanargmax(grouplength)
-                iccline = iccline_groups[maxgroup][:]
-            elif len(iccline) > 0:
-                iccline = np.arange(iccline[0], iccline[-1] + 1)
-            nccline = len(iccline)
-
-            # Find times with convective major axis length greater than 100 km
-            # and stratiform area greater than the median amount of stratiform
-            # ilm_meansfarea[ilm_meansfarea == fillvalue] = np.nan
-            # print(ilm_maxpfccmajoraxis.shape)
-            # print(ilm_meansfarea.shape)
-            isfarea = np.array(
-                np.where((ilm_maxpfccmajoraxis > 100) &
-                         (ilm_meansfarea > np.nanmean(ilm_meansfarea)))
-            )[0, :]
-            isfarea_groups = np.split(isfarea, np.where(np.diff(isfarea) > 2)[0] + 1)
-            if len(isfarea) > 0 and len(isfarea_groups) > 1:
-                grouplength = np.empty(len(isfarea_groups))
-                for igroup in range(0, len(isfarea_groups)):
-                    grouplength[igroup] = len(isfarea_groups[igroup][:])
-                maxgroup = np.nanargmax(grouplength)
-                isfarea = isfarea_groups[maxgroup][:]
-            elif len(isfarea) > 0:
-                isfarea = np.arange(isfarea[0], isfarea[-1] + 1)
-            nsfarea = len(isfarea)
-
-            # Find times with convective major axis length less than 100 km
-            #if nsfarea > 0:
-            #    inoccline = np.array(np.where(ilm_maxpfccmajoraxis < 100))[0, :]
-            #    inoccline = inoccline[
-            #            np.where((inoccline > isfarea[-1]) & (inoccline > iccline[-1]))
-            #    ]
-            #    inoccline_groups = np.split(
-            #            inoccline, np.where(np.diff(inoccline) > 2)[0] + 1
-            #    )
-            #    if len(inoccline) > 0 and len(inoccline_groups) > 1:
-            #        grouplength = np.empty(len(inoccline_groups))
-            #        for igroup in range(0, len(inoccline_groups)):
-            #            grouplength[igroup] = len(inoccline_groups[igroup][:])
-            #        maxgroup = np.nanargmax(grouplength)
-            #        inoccline = inoccline_groups[maxgroup][:]
-            #    elif len(inoccline) > 0:
-            #        inoccline = np.arange(inoccline[0], inoccline[-1] + 1)
-            #    nnoccline = len(inoccline)
-
-            ###############################################################################
-            # Classify cloud only stage
-
-            # Cloud only stage
-            if nccarea > 0:
-                # If first convective time is after the first cloud time,
-                # label all hours before the convective core appearance time as pre-convective
-                if iccarea[0] > 0 and iccarea[0] < ilm_irtracklength - 1:
-                    # Start of cloud only
-                    ilm_index[0] = 0
-                    # Time period of cloud only
-                    ilm_cycle[0 : iccarea[0]] = 1
-                # Start of unorganized convective cells
-                ilm_index[1] = iccarea[0]
-
-            # If convective line exists
-            if nccline > 1:
-                # If the convective line occurs after the first storm time
-                # (use second index since convective line must be around for one hour prior to classifying as genesis)
-                # Label when convective cores first appear, but are not organized into a line
-                if iccline[1] > iccarea[0]:
-                    # Start of organized convection
-                    ilm_index[2] = iccline[1]
-                    # Time period of unorganzied convective cells
-                    ilm_cycle[iccarea[0] : iccline[1]] = 2
-                else:
-                    logger.warning(f"Lifecycle cannot be properly defined for track: {int(ilongmcs[ilm])}")
-
-                if nsfarea > 0:
-                    # Label MCS genesis.
-                    # Test if stratiform area time is two time steps after the convective line
-                    # and two time steps before the last time of the cloud track
-                    if isfarea[0] > iccline[1] + 2:
-                        # Start of mature MCS
-                        ilm_index[3] = isfarea[0]
-                        # Time period of organized cells before mature
-                        ilm_cycle[iccline[1] : isfarea[0]] = 3
-                        # Time period of mature MCS
-                        ilm_cycle[isfarea[0] : isfarea[-1] + 1] = 4
-                    else:
-                        matureindex = isfarea[np.array(np.where(isfarea == iccline[1] + 2))[0, :]]
-                        if len(matureindex) > 0:
-                            ilm_index[3] = np.copy(matureindex[0])
-                            # Time period of organized cells before mature
-                            ilm_cycle[iccline[1] : matureindex[0]] = 3
-                            # Time period of mature MCS
-                            ilm_cycle[matureindex[0] : isfarea[-1] + 1] = 4
-
-                            # if isfarea[0] > iccline[1] + 2
-                            #    ilm_index[3] = isfarea[0] # Start of mature MCS
-                            #    ilm_cycle[iccline[1]:isfarea[0]] = 3 # Time period of organized cells before maturation
-                            #    ilm_cycle[isfarea[0]:isfarea[-1]+1] = 4 # Time period of mature mcs
-                            # else:
-                            #    if nsfarea > 3:
-                            #        ilm_index[3] = isfarea[3] # Start of mature MCS
-                            #        ilm_cycle[iccline[1]:isfarea[3]] = 3 # Time period of organized cells before maturation
-                            #        ilm_cycle[isfarea[3]:isfarea[-1]+1] = 4 # Time period of mature MCS
-                            # Label dissipating times. Buy default this is all times after the mature stage
-                    if isfarea[-1] < ilm_irtracklength - 1:
-                        # If nsfarea > 0, the dissipation stage can be defined
-                        ilm_index[4] = isfarea[-1] + 1
-                        # Time period of dissipation
-                        ilm_cycle[isfarea[-1] + 1 : ilm_irtracklength] = 5
-
-            ############################################################
-            # Final life cycle processing
-            istage = np.array(np.where(ilm_cycle >= 0))[0, :]
-            nstage = len(istage)
-
-            if nstage > 0:
-                cyclepresent = np.copy(ilm_cycle[istage])
-                uniquecycle = np.unique(cyclepresent)
-
-                # Label as complete cycle if 1-4 present
-                if len(uniquecycle) >= 4:
-                    cycle_complete[ilongmcs[ilm]] = 1
-
-                # Save data
-                cycle_stage[ilongmcs[ilm], :] = np.copy(ilm_cycle)
-                cycle_index[ilongmcs[ilm], :] = np.copy(ilm_index)
+        # Isolate data from the long MCS tracks
+        ilm_irtracklength = ir_trackduration[ilongmcs].astype(int)
+        time_idx = np.arange(0, ntimes)[None, :]
+        ilm_intrack = time_idx < ilm_irtracklength[:, None]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            ilm_maxpfccmajoraxis = np.nanmax(pf_coremajoraxis[ilongmcs, :, :], axis=2)
+            ilm_maxpfccarea = np.nanmax(pf_corearea[ilongmcs, :, :], axis=2)
+            ilm_meansfarea = np.sum(pf_sfarea[ilongmcs, :, :], axis=2)
+            # Mean stratiform area within each track duration
+            # (computed together for tracks with the same duration)
+            ilm_meansfarea_avg = np.full(nlongmcs, np.nan, dtype=ilm_meansfarea.dtype)
+            for ilength in np.unique(ilm_irtracklength):
+                idx = ilm_irtracklength == ilength
+                ilm_meansfarea_avg[idx] = np.nanmean(ilm_meansfarea[idx, 0:ilength], axis=1)
+
+        ##################################################################
+        # Find indices of when convective line present and absent and when stratiform present
+
+        # Find times with convective core area > 0
+        iccarea_mask = (ilm_maxpfccarea > 0) & ilm_intrack
+        nccarea, iccarea_first, _, _, _ = get_longest_runs(iccarea_mask, 2)
+
+        # Find times with convective major axis length greater than 100 km
+        iccline_mask = (ilm_maxpfccmajoraxis > 100) & ilm_intrack
+        nccline, _, iccline_second, _, _ = get_longest_runs(iccline_mask, 2)
+
+        # Find times with convective major axis length greater than 100 km
+        # and stratiform area greater than the mean amount of stratiform
+        isfarea_mask = (ilm_maxpfccmajoraxis > 100) & \
+                       (ilm_meansfarea > ilm_meansfarea_avg[:, None]) & ilm_intrack
+        nsfarea, isfarea_first, _, isfarea_last, isfarea_filled = get_longest_runs(isfarea_mask, 2)
+
+        ###############################################################################
+        # Classify cloud only stage
+        ilm_index = np.full((nlongmcs, 5), fillval, dtype=int)
+        ilm_cycle = np.full((nlongmcs, ntimes), fillval, dtype=int)
+
+        # Cloud only stage
+        has_ccarea = nccarea > 0
+        # If first convective time is after the first cloud time,
+        # label all hours before the convective core appearance time as pre-convective
+        idx = has_ccarea & (iccarea_first > 0) & (iccarea_first < ilm_irtracklength - 1)
+        # Start of cloud only
+        ilm_index[idx, 0] = 0
+        # Time period of cloud only
+        ilm_cycle[idx[:, None] & (time_idx < iccarea_first[:, None])] = 1
+        # Start of unorganized convective cells
+        ilm_index[has_ccarea, 1] = iccarea_first[has_ccarea]
+
+        # If convective line exists
+        # (use second index since convective line must be around for one hour prior to classifying as genesis)
+        has_ccline = nccline > 1
+        # Label when convective cores first appear, but are not organized into a line
+        idx = has_ccline & has_ccarea & (iccline_second > iccarea_first)
+        # Start of organized convection
+        ilm_index[idx, 2] = iccline_second[idx]
+        # Time period of unorganzied convective cells
+        ilm_cycle[idx[:, None] & (time_idx >= iccarea_first[:, None]) & (time_idx < iccline_second[:, None])] = 2
+        for itrack in ilongmcs[has_ccline & ~idx]:
+            logger.warning(f"Lifecycle cannot be properly defined for track: {int(itrack)}")
+
+        # Label MCS genesis.
+        # Test if stratiform area time is two time steps after the convective line
+        # and two time steps before the last time of the cloud track
+        has_sfarea = has_ccline & (nsfarea > 0)
+        sf_after = has_sfarea & (isfarea_first > iccline_second + 2)
+        # Otherwise the mature stage starts two time steps after the convective line if stratiform is present then
+        matureindex = iccline_second + 2
+        matureindex_clip = np.clip(matureindex, 0, ntimes - 1)
+        sf_at_mature = has_sfarea & ~sf_after & \
+                       (matureindex >= isfarea_first) & (matureindex <= isfarea_last) & \
+                       (isfarea_filled | isfarea_mask[np.arange(0, nlongmcs), matureindex_clip])
+        matureindex = np.where(sf_after, isfarea_first, matureindex)
+        idx = sf_after | sf_at_mature
+        # Start of mature MCS
+        ilm_index[idx, 3] = matureindex[idx]
+        # Time period of organized cells before mature
+        ilm_cycle[idx[:, None] & (time_idx >= iccline_second[:, None]) & (time_idx < matureindex[:, None])] = 3
+        # Time period of mature MCS
+        ilm_cycle[idx[:, None] & (time_idx >= matureindex[:, None]) & (time_idx <= isfarea_last[:, None])] = 4
+        # Label dissipating times. By default this is all times after the mature stage
+        idx = has_sfarea & (isfarea_last < ilm_irtracklength - 1)
+        ilm_index[idx, 4] = isfarea_last[idx] + 1
+        # Time period of dissipation
+        ilm_cycle[idx[:, None] & (time_idx > isfarea_last[:, None]) & (time_idx < ilm_irtracklength[:, None])] = 5
+
+        ############################################################
+        # Final life cycle processing
+        has_stage = np.any(ilm_cycle >= 0, axis=1)
+        # Label as complete cycle if 1-4 present
+        nuniquecycle = np.zeros(nlongmcs, dtype=int)
+        for istage in range(1, 6):
+            nuniquecycle += np.any(ilm_cycle == istage, axis=1)
+        cycle_complete[ilongmcs[has_stage & (nuniquecycle >= 4)]] = 1
+
+        # Save data
+        cycle_stage[ilongmcs[has_stage], :] = ilm_cycle[has_stage, :]
+        cycle_index[ilongmcs[has_stage], :] = ilm_index[has_stage, :]
 
     # Subset robust MCS tracks from PF dataset
     # Note: the tracks_dimname cannot be used here as Xarray does not seem to have
@@ -489,3 +347,99 @@ def define_robust_mcs_radar(config):
     logger.info(f"{statistics_outfile}")
 
     return statistics_outfile
+
+
+def get_mask_runs(mask, gap):
+    """
+    Find runs of True values along the times (last) dimension of a 2D mask.
+
+    Consecutive True values separated by no more than gap time steps belong to the same run.
+
+    Args:
+        mask: np.array
+            Boolean array [tracks, times].
+        gap: int
+            Maximum time index difference between consecutive True values in a run.
+
+    Returns:
+        pos_row: np.array
+            Track index of each True value.
+        pos_time: np.array
+            Time index of each True value.
+        run_id: np.array
+            Run index of each True value.
+        run_row: np.array
+            Track index of each run.
+        run_first: np.array
+            First time index of each run.
+        run_second: np.array
+            Second time index of each run (same as run_first for single-value runs).
+        run_last: np.array
+            Last time index of each run.
+        run_count: np.array
+            Number of True values in each run.
+    """
+    pos_row, pos_time = np.nonzero(mask)
+    # A new run starts at each new track or when the time difference exceeds gap
+    run_start = np.ones(len(pos_row), dtype=bool)
+    run_start[1:] = (pos_row[1:] != pos_row[:-1]) | (np.diff(pos_time) > gap)
+    run_id = np.cumsum(run_start) - 1
+    start = np.nonzero(run_start)[0]
+    run_count = np.diff(np.append(start, len(pos_row)))
+    run_row = pos_row[start]
+    run_first = pos_time[start]
+    run_last = pos_time[start + run_count - 1]
+    run_second = pos_time[start + np.minimum(run_count - 1, 1)]
+    return pos_row, pos_time, run_id, run_row, run_first, run_second, run_last, run_count
+
+
+def get_longest_runs(mask, gap):
+    """
+    Find the longest run of True values for each track.
+
+    If a track has multiple runs, the run with the most True values (the earliest if tied) is kept.
+    If a track has a single run, the run is filled between its first and last time.
+
+    Args:
+        mask: np.array
+            Boolean array [tracks, times].
+        gap: int
+            Maximum time index difference between consecutive True values in a run.
+
+    Returns:
+        nvalues: np.array
+            Number of times in the longest run (0 if no run).
+        first: np.array
+            First time index of the longest run.
+        second: np.array
+            Second time index of the longest run.
+        last: np.array
+            Last time index of the longest run.
+        filled: np.array
+            Flag indicating the run is filled between first and last time.
+    """
+    ntracks = mask.shape[0]
+    _, _, _, run_row, run_first, run_second, run_last, run_count = get_mask_runs(mask, gap)
+    nruns = np.bincount(run_row, minlength=ntracks)
+
+    # Sort runs by track, then by decreasing count (stable sort keeps the earliest run if tied)
+    order = np.lexsort((-run_count, run_row))
+    first_in_track = np.ones(len(order), dtype=bool)
+    first_in_track[1:] = run_row[order[1:]] != run_row[order[:-1]]
+    longest = order[first_in_track]
+    itracks = run_row[longest]
+
+    nvalues = np.zeros(ntracks, dtype=int)
+    first = np.zeros(ntracks, dtype=int)
+    second = np.zeros(ntracks, dtype=int)
+    last = np.zeros(ntracks, dtype=int)
+    nvalues[itracks] = run_count[longest]
+    first[itracks] = run_first[longest]
+    second[itracks] = run_second[longest]
+    last[itracks] = run_last[longest]
+
+    # Fill the single run between the first and last time
+    filled = nruns == 1
+    nvalues[filled] = last[filled] - first[filled] + 1
+    second[filled] = first[filled] + 1
+    return nvalues, first, second, last, filled
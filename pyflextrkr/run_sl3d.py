@@ -4,7 +4,8 @@ import xarray as xr
 import logging
 import time
 import dask
-from dask.distributed import Client, LocalCluster, wait
+from dask.distributed import Client, LocalCluster
+from pyflextrkr.ft_executor import run_tasks, get_executor_name
 from pyflextrkr.sl3d_func import gridrad_sl3d
 from pyflextrkr.ft_utilities import load_config
 from pyflextrkr.echotop_func import echotop_height
@@ -246,7 +247,6 @@ if __name__=='__main__':
     config_file = sys.argv[1]
     config = load_config(config_file)
     # Get inputs from config
-    run_parallel = config['run_parallel']
     n_workers = config['nprocesses']
     indir = config['clouddata_path']
     inbasename = config['regrid_basename']
@@ -256,7 +256,7 @@ if __name__=='__main__':
     nfiles = len(filelist)
     logger.info(f'Number of files: {nfiles}')
 
-    if config['run_parallel'] == 1:
+    if get_executor_name(config) == 'dask':
         # Set Dask temporary directory for workers
         dask_tmp_dir = config.get("dask_tmp_dir", "./")
         dask.config.set({'temporary-directory': dask_tmp_dir})
@@ -264,17 +264,6 @@ if __name__=='__main__':
         cluster = LocalCluster(n_workers=n_workers, threads_per_worker=1)
         client = Client(cluster)
 
-    # Serial
-    if run_parallel == 0:
-        for ifile in range(0, nfiles):
-            result = process_file(filelist[ifile], config)
-    # Parallel
-    elif run_parallel >= 1:
-        results = []
-        for ifile in range(0, nfiles):
-            result = dask.delayed(process_file)(filelist[ifile], config)
-            results.append(result)
-        final_result = dask.compute(*results)
-        wait(final_result)
-    else:
-        sys.exit('Valid parallelization flag not provided')
+    # Process each file with the executor set in config (serial/processes/dask)
+    run_tasks(process_file, [(ifile,) for ifile in filelist], config,
+              static_kwargs={"config": config})
@@ -3,6 +3,7 @@ import math
 from scipy import ndimage
 import warnings
 from pyflextrkr.echotop_func import echotop_height
+from pyflextrkr.tiling_func import map_tiles
 
 def run_sl3d(ds, config):
     """
@@ -232,6 +233,8 @@ def gridrad_sl3d(data, config, **kwargs):
     updraft_ReflGradiant_MaxHeight = config.get('updraft_ReflGradiant_MaxHeight', 7.0)
     # Composite reflectivity threshold [dBZ] to be updraft
     updraft_CompRefl_Thresh = config.get('updraft_CompRefl_Thresh', 40.0)
+    # Number of threads to compute the peakedness median filters (one level per thread)
+    sl3d_nthreads = config.get('sl3d_nthreads', 1)
 
     # Extract dimension sizes for ease
     nx = data['x']['n']
@@ -268,21 +271,8 @@ def gridrad_sl3d(data, config, **kwargs):
     zzz = data['z']['values'].reshape(nz, 1, 1).repeat(ny,axis=1).repeat(nx, axis=2)
 
     # Find index of 3, 4, 5, and 9 km altitude
-    if (data['z']['values'][0] > 3.0) : k3km = -1
-    if (data['z']['values'][0] > 4.0) : k4km = -1
-    if (data['z']['values'][0] > 5.0) : k5km = -1
-    if (data['z']['values'][0] > 9.0) : k9km = -1
-
-    if (data['z']['values'][nz-1] <= 3.0) : k3km = nz-1
-    if (data['z']['values'][nz-1] <= 4.0) : k4km = nz-1
-    if (data['z']['values'][nz-1] <= 5.0) : k5km = nz-1
-    if (data['z']['values'][nz-1] <= 9.0) : k9km = nz-1
-
-    for zindex in range (0, nz-1):
-        if (data['z']['values'][zindex] <= 3.0 and data['z']['values'][zindex+1] > 3.0): k3km = zindex
-        if (data['z']['values'][zindex] <= 4.0 and data['z']['values'][zindex+1] > 4.0): k4km = zindex
-        if (data['z']['values'][zindex] <= 5.0 and data['z']['values'][zindex+1] > 5.0): k5km = zindex
-        if (data['z']['values'][zindex] <= 9.0 and data['z']['values'][zindex+1] > 9.0): k9km = zindex
+    # (last level <= the altitude, -1 if the lowest level is above the altitude)
+    k3km, k4km, k5km, k9km = (np.searchsorted(data['z']['values'], [3.0, 4.0, 5.0, 9.0], side='right') - 1).tolist()
 
     # Set coefficients for 50th percentile melting level climatology in the U.S.
     a = [7.072, 7.896, 8.558, 7.988, 7.464, 6.728, 6.080, 6.270, 6.786, 8.670, 8.892, 7.936]
@@ -350,8 +340,8 @@ def gridrad_sl3d(data, config, **kwargs):
     # Create array to compute peakedness in lowest 9 km altitude layer
     peak = np.full((k9km+1,ny,nx), np.NaN, dtype=data['Z_H']['values'].dtype)
 
-    # Loop over the lowest 9 km levels
-    for k in range(0, k9km+1):
+    # Filter the lowest 9 km levels concurrently
+    def peak_one(k):
         tmp = data['Z_H']['values'][k,:,:]
 
         # According to this thread: 
@@ -359,7 +349,11 @@ def gridrad_sl3d(data, config, **kwargs):
         # scipy.ndimage.median_filter v1.7 (same as skimage.filters.median v0.17) above ignores NaN
         # But it produces incorrect values at the edge of the domain
         # These values will be removed at the end of the code
-        peak[k,:,:] = tmp - ndimage.median_filter(tmp, size=nsearch)
+        return tmp - ndimage.median_filter(tmp, size=nsearch)
+
+    results = map_tiles(peak_one, range(0, k9km+1), sl3d_nthreads)
+    for k, result in enumerate(results):
+        peak[k,:,:] = result
 
     # Compute peakedness threshold for reflectivity value
     tmp = 10.0 - ((data['Z_H']['values'][0:k9km+1,:,:])**2) / 337.5
@@ -1,7 +1,62 @@
 import numpy as np
 from scipy import ndimage, signal
+from pyflextrkr.tiling_func import filter_tiled
 
-def background_intensity(refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method):
+def disk_sum_rowspan(data, mask):
+    """
+    Sum data over a disk footprint using row spans of per-row prefix sums.
+
+    The disk is decomposed into one horizontal span per kernel row, each span sum is the difference
+    of two per-row prefix sums, so the cost is O(r) per pixel instead of O(r^2) for a direct convolution.
+    Equivalent to ndimage.convolve(data, mask, mode='constant', cval=0.0) for each 2D field.
+
+    Args:
+        data: np.ndarray
+            Array with the 2D fields on the last two dimensions (e.g., [nfield, ny, nx]).
+        mask: np.ndarray(bool)
+            Disk footprint (2D), symmetric with a contiguous span on each row.
+
+    Returns:
+        out: np.ndarray
+            Disk sums, same shape and dtype as data.
+    """
+    nx = data.shape[-1]
+    rad_y = mask.shape[0] // 2
+    rad_x = mask.shape[1] // 2
+    # Half-width of the span on each kernel row (-1 for empty rows)
+    halfwidths = (np.count_nonzero(mask, axis=1) - 1) // 2
+
+    # Per-row prefix sums, padded with the edge values so that spans are clipped at the domain edges
+    # Prefix sums are accumulated in float64 to avoid round-off in the span differences
+    csum = np.zeros(data.shape[:-1] + (nx + 2 * rad_x + 1,), dtype=np.float64)
+    np.cumsum(data, axis=-1, dtype=np.float64, out=csum[..., rad_x + 1:rad_x + 1 + nx])
+    csum[..., rad_x + 1 + nx:] = csum[..., rad_x + nx:rad_x + nx + 1]
+
+    out = np.zeros(data.shape, dtype=data.dtype)
+    span = np.zeros(data.shape, dtype=data.dtype)
+    span_width = None
+    for iy in range(rad_y + 1):
+        width = halfwidths[rad_y + iy]
+        if width < 0:
+            continue
+        # Span sums only change when the half-width changes
+        if width != span_width:
+            np.subtract(
+                csum[..., rad_x + width + 1:rad_x + width + 1 + nx],
+                csum[..., rad_x - width:rad_x - width + nx],
+                out=span,
+            )
+            span_width = width
+        # Add the span sums of the rows above and below
+        if iy == 0:
+            out += span
+        else:
+            out[..., iy:, :] += span[..., :-iy, :]
+            out[..., :-iy, :] += span[..., iy:, :]
+    return out
+
+
+def background_intensity(refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method, tile_dict=None):
     """
     Calculate background reflectivity intensity
     ----------
@@ -14,7 +69,10 @@ def background_intensity(refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method
     bkg_rad: float
         Background radius value to calculate reflectivity intensity (meters)
     convolve_method: string, optional
-        Choose which convolution method to use in Scipy: 'ndimage' (default), or 'signal'
+        Choose which convolution method to use: 'ndimage' (default), 'signal' (Scipy),
+        or 'rowspan' (exact disk sums from per-row prefix sums in float32, fastest for large radius)
+    tile_dict: dictionary, optional
+        Tiling parameters (from get_tile_dict). If provided, the 'ndimage' convolution is done tile by tile.
 
     Returns
     ----------
@@ -39,15 +97,26 @@ def background_intensity(refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method
     linrefl = np.zeros(refl.shape)
     linrefl[mask_goodvalues==1] = 10. ** (refl[mask_goodvalues==1] / 10.)
     # Apply convolution filter
-    if convolve_method == 'ndimage':
+    if (convolve_method == 'ndimage') & (tile_dict is None):
         # Use Scipy.ndimage
         bkg_linrefl = ndimage.convolve(linrefl, mask, mode='constant', cval=0.0)
         numPixs = ndimage.convolve(mask_goodvalues, mask, mode='constant', cval=0.0)
+    if (convolve_method == 'ndimage') & (tile_dict is not None):
+        # Use Scipy.ndimage tile by tile, the halo covers the background radius
+        halo = max(bkg_rad_x, bkg_rad_y) + 1
+        convolve_disk = lambda x: ndimage.convolve(x, mask, mode='constant', cval=0.0)
+        bkg_linrefl = filter_tiled(convolve_disk, linrefl, tile_dict, halo)
+        numPixs = filter_tiled(convolve_disk, mask_goodvalues, tile_dict, halo)
     if convolve_method == 'signal':
         # Use Scipy.signal convolve, by setting method='auto',
         # it automatically chooses direct or Fourier method based on an estimate of which is faster (default)
         bkg_linrefl = signal.convolve(linrefl, mask, mode='same', method='auto')
         numPixs = signal.convolve(mask_goodvalues, mask, mode='same', method='auto')
+    if convolve_method == 'rowspan':
+        # Sum the linear reflectivity and the number of good pixels within the disk in a single pass
+        disk_sums = disk_sum_rowspan(np.stack([linrefl, mask_goodvalues]).astype(np.float32), mask)
+        bkg_linrefl = disk_sums[0]
+        numPixs = disk_sums[1]
     # Mask bad values
     bkg_linrefl[mask_goodvalues==0] = 0
     numPixs[mask_goodvalues==0] = 0
@@ -477,7 +546,7 @@ def steiner_classification(
     weakEchoThres: float
         Reflectivity threshold to define weak echo (Ze < weakEchoThres is weak echo)
     convolve_method: string, optional
-        Choose which convolution method to use in Scipy: 'ndimage' (default), or 'signal'
+        Choose which convolution method to use: 'ndimage' (default), 'signal', or 'rowspan'
 
     Returns:
     ========
@@ -540,6 +609,7 @@ def mod_steiner_classification(
         remove_smallcells=False,
         return_diag=False,
         convolve_method='ndimage',
+        tile_dict=None,
 ):
     """
     Modified Steiner et al. (1995) algorithm for echo classification using the reflectivity field
@@ -585,7 +655,9 @@ def mod_steiner_classification(
     return_diag: bool, optional
         A flag to return more fields for diagnostic purpose (default False)
     convolve_method: string, optional
-        Choose which convolution method to use in Scipy: 'ndimage' (default), or 'signal'
+        Choose which convolution method to use: 'ndimage' (default), 'signal', or 'rowspan'
+    tile_dict: dictionary, optional
+        Tiling parameters to calculate background reflectivity tile by tile (default None)
 
     Returns:
     ===========
@@ -597,7 +669,9 @@ def mod_steiner_classification(
         Dilated convetive core, same size as refl
     """
     # Calculate background reflectivity
-    refl_bkg = background_intensity(refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method=convolve_method)
+    refl_bkg = background_intensity(
+        refl, mask_goodvalues, dx, dy, bkg_rad, convolve_method=convolve_method, tile_dict=tile_dict,
+    )
 
     # If refl below truncZconvThres, use peakedness criteria
     peak = peakedness(refl_bkg, mask_goodvalues, minZdiff, absConvThres)
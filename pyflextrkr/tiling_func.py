@@ -0,0 +1,282 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from pyflextrkr.ftfunctions import grow_cells
+
+def get_tile_dict(config):
+    """
+    Get domain tiling parameters from config.
+
+    Args:
+        config: dictionary
+            Dictionary containing config parameters.
+
+    Returns:
+        tile_dict: dictionary
+            Dictionary containing tiling parameters, None if tiling is not enabled.
+    """
+    tile_size = config.get("tile_size", None)
+    if tile_size is None:
+        return None
+    tile_dict = {
+        "tile_size": tile_size,
+        "halo": config.get("tile_halo", 0),
+        "nworkers": config.get("tile_nworkers", 1),
+        "wrap_x": config.get("tile_wrap_x", False),
+    }
+    return tile_dict
+
+
+def get_tile_slices(shape, tile_size):
+    """
+    Split a 2D domain into tiles.
+
+    Args:
+        shape: tuple
+            Domain shape (ny, nx).
+        tile_size: list
+            Tile size [ny_tile, nx_tile] in number of pixels.
+
+    Returns:
+        tiles: list
+            List of (y slice, x slice) for each tile.
+    """
+    ny, nx = shape
+    ny_tile = max(1, min(int(tile_size[0]), ny))
+    nx_tile = max(1, min(int(tile_size[1]), nx))
+    tiles = []
+    for y0 in range(0, ny, ny_tile):
+        for x0 in range(0, nx, nx_tile):
+            tiles.append((slice(y0, min(y0 + ny_tile, ny)), slice(x0, min(x0 + nx_tile, nx))))
+    return tiles
+
+
+def map_tiles(func, args_list, nworkers):
+    """
+    Apply a function to a list of tile arguments with a thread pool.
+
+    Args:
+        func: function
+            Function to apply.
+        args_list: list
+            List of arguments for each tile.
+        nworkers: int
+            Number of threads.
+
+    Returns:
+        results: list
+            Results in the same order as args_list.
+    """
+    if nworkers > 1:
+        with ThreadPoolExecutor(max_workers=nworkers) as executor:
+            results = list(executor.map(func, args_list))
+    else:
+        results = [func(args) for args in args_list]
+    return results
+
+
+def filter_tiled(func, data, tile_dict, halo):
+    """
+    Apply a local 2D filter tile by tile.
+
+    Each tile is filtered with a surrounding halo and only the tile interior is kept,
+    so the output is identical to func(data) as long as the halo covers the filter footprint.
+    Tiles touching the domain edges are clipped to the domain (same edge handling as func),
+    unless wrap_x is set, in which case the x direction is treated as periodic.
+
+    Args:
+        func: function
+            Filter function taking a 2D array and returning an array of the same shape.
+        data: np.ndarray
+            2D input array.
+        tile_dict: dictionary
+            Dictionary containing tiling parameters.
+        halo: int
+            Minimum halo width [pixel] needed by the filter.
+
+    Returns:
+        out: np.ndarray
+            Filtered 2D array.
+    """
+    ny, nx = data.shape
+    halo = max(int(halo), int(tile_dict["halo"]))
+    wrap_x = tile_dict["wrap_x"]
+    tiles = get_tile_slices(data.shape, tile_dict["tile_size"])
+
+    def filter_one(tile):
+        ys, xs = tile
+        y0, y1 = max(ys.start - halo, 0), min(ys.stop + halo, ny)
+        if wrap_x:
+            xidx = np.arange(xs.start - halo, xs.stop + halo) % nx
+            xoff = halo
+        else:
+            x0, x1 = max(xs.start - halo, 0), min(xs.stop + halo, nx)
+            xidx = slice(x0, x1)
+            xoff = xs.start - x0
+        window = func(data[y0:y1, xidx])
+        return window[ys.start - y0:ys.stop - y0, xoff:xoff + (xs.stop - xs.start)]
+
+    results = map_tiles(filter_one, tiles, tile_dict["nworkers"])
+    out = np.empty(data.shape, dtype=results[0].dtype)
+    for tile, result in zip(tiles, results):
+        out[tile] = result
+    return out
+
+
+def label_tiled(mask, tile_dict, structure=None):
+    """
+    Label connected regions tile by tile and stitch labels across tile seams.
+
+    Labels are renumbered in the order of their first pixel in the domain,
+    so the result is identical to ndimage.label(mask, structure).
+    If wrap_x is set, regions touching the left and right domain edges are also connected.
+
+    Args:
+        mask: np.ndarray
+            2D binary array to label.
+        tile_dict: dictionary
+            Dictionary containing tiling parameters.
+        structure: np.ndarray, optional, default=None
+            Connectivity structure (same as ndimage.label).
+
+    Returns:
+        labels: np.ndarray(int)
+            Labeled array.
+        nlabels: int
+            Number of labeled regions.
+    """
+    ny, nx = mask.shape
+    if structure is None:
+        structure = ndimage.generate_binary_structure(2, 1)
+    structure = np.asarray(structure, dtype=bool)
+    tiles = get_tile_slices(mask.shape, tile_dict["tile_size"])
+
+    def label_one(tile):
+        tile_label, tile_nlabels = ndimage.label(mask[tile], structure=structure)
+        # Flat index (in the full domain) of the first pixel of each label
+        flat = tile_label.ravel()
+        uniq, first_idx = np.unique(flat, return_index=True)
+        first_idx = first_idx[uniq > 0]
+        iy, ix = np.unravel_index(first_idx, tile_label.shape)
+        first_pixel = (iy + tile[0].start) * nx + (ix + tile[1].start)
+        return tile_label, tile_nlabels, first_pixel
+
+    results = map_tiles(label_one, tiles, tile_dict["nworkers"])
+
+    # Put tile labels into the domain with unique offsets
+    labels = np.zeros(mask.shape, dtype=int)
+    first_pixel = [np.zeros(1, dtype=int)]
+    offset = 0
+    for tile, (tile_label, tile_nlabels, tile_first) in zip(tiles, results):
+        labels[tile] = np.where(tile_label > 0, tile_label + offset, 0)
+        first_pixel.append(tile_first)
+        offset += tile_nlabels
+    nlabels_tile = offset
+    first_pixel = np.concatenate(first_pixel)
+    if nlabels_tile == 0:
+        return labels, 0
+
+    # Collect label pairs that touch across tile seams
+    # (and across the x domain edges for periodic domain)
+    ybounds = sorted(set([tile[0].start for tile in tiles if tile[0].start > 0]))
+    xbounds = sorted(set([tile[1].start for tile in tiles if tile[1].start > 0]))
+    dx_links = [dd - 1 for dd in range(3) if structure[0, dd]]
+    dy_links = [dd - 1 for dd in range(3) if structure[dd, 0]]
+    pairs_a = []
+    pairs_b = []
+    for yb in ybounds:
+        for dd in dx_links:
+            upper = labels[yb - 1, max(0, -dd):nx - max(0, dd)]
+            lower = labels[yb, max(0, dd):nx - max(0, -dd)]
+            pairs_a.append(upper)
+            pairs_b.append(lower)
+    xb_list = list(xbounds)
+    if tile_dict["wrap_x"] and (nx > 1):
+        xb_list.append(0)
+    for xb in xb_list:
+        for dd in dy_links:
+            left = labels[max(0, -dd):ny - max(0, dd), xb - 1]
+            right = labels[max(0, dd):ny - max(0, -dd), xb]
+            pairs_a.append(left)
+            pairs_b.append(right)
+    if len(pairs_a) > 0:
+        pairs_a = np.concatenate(pairs_a)
+        pairs_b = np.concatenate(pairs_b)
+        linked = (pairs_a > 0) & (pairs_b > 0)
+        pairs_a = pairs_a[linked]
+        pairs_b = pairs_b[linked]
+    else:
+        pairs_a = np.zeros(0, dtype=int)
+        pairs_b = np.zeros(0, dtype=int)
+
+    # Merge tile labels connected across seams
+    graph = coo_matrix(
+        (np.ones(len(pairs_a), dtype=np.int8), (pairs_a, pairs_b)),
+        shape=(nlabels_tile + 1, nlabels_tile + 1),
+    )
+    ncomp, comp = connected_components(graph, directed=False)
+    # Renumber merged regions by the first pixel in the domain (same order as ndimage.label)
+    comp_first = np.full(ncomp, mask.size, dtype=int)
+    np.minimum.at(comp_first, comp[1:], first_pixel[1:])
+    comp_first[comp[0]] = -1
+    order = np.argsort(comp_first, kind="stable")
+    comp_number = np.empty(ncomp, dtype=int)
+    comp_number[order] = np.arange(ncomp)
+    lut = comp_number[comp]
+    lut[0] = 0
+    nlabels = int(lut.max())
+    labels = lut[labels]
+    return labels, nlabels
+
+
+def grow_cells_tiled(grid, tile_dict):
+    """
+    Grow seeded regions with grow_cells, processing each growable region independently.
+
+    The growable area (grid >= 0) is split into 8-connected regions that do not interact,
+    and grow_cells is run on each region's bounding box. The seeds and their order are the
+    same as in grow_cells on the full grid, so the result is identical.
+
+    Args:
+        grid: np.array
+            Array containing labeled seeded regions (values > 0).
+            Areas for growing = 0, areas excluded = -1.
+        tile_dict: dictionary
+            Dictionary containing tiling parameters.
+
+    Returns:
+        grid: np.array
+            Array containing labels after growth.
+    """
+    # Seeds used by grow_cells on the full grid
+    # (grow_cells counts seeds with np.count_nonzero on the row indices, keep the same seed list)
+    seed_points = np.where(grid > 0)
+    nseeds = np.count_nonzero(seed_points[0])
+    seed_flag = np.zeros(grid.shape, dtype=bool)
+    seed_flag[seed_points[0][:nseeds], seed_points[1][:nseeds]] = True
+
+    # Label independent growable regions
+    region_number, nregions = label_tiled(
+        grid >= 0, tile_dict, structure=ndimage.generate_binary_structure(2, 2),
+    )
+    if nregions == 0:
+        return grid
+    region_slices = ndimage.find_objects(region_number)
+    # Only regions with seeds can grow
+    region_has_seed = np.zeros(nregions + 1, dtype=bool)
+    region_has_seed[region_number[seed_flag]] = True
+
+    def grow_one(iregion):
+        bbox = region_slices[iregion - 1]
+        in_region = region_number[bbox] == iregion
+        subgrid = np.where(in_region, grid[bbox], -1)
+        subseeds = np.where(seed_flag[bbox] & in_region)
+        return bbox, in_region, grow_cells(subgrid, seed_points=subseeds)
+
+    grow_regions = np.nonzero(region_has_seed)[0]
+    results = map_tiles(grow_one, grow_regions, tile_dict["nworkers"])
+    for bbox, in_region, subgrid in results:
+        grid[bbox][in_region] = subgrid[in_region]
+    return grid
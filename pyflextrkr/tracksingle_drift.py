@@ -4,7 +4,6 @@ import sys
 import xarray as xr
 import pandas as pd
 import time
-import scipy.ndimage as ndi
 import logging
 
 def trackclouds(
@@ -12,6 +11,7 @@ def trackclouds(
     cloudid_basetimepairs,
     config,
     drift_data=None,
+    cloudid_frames=None,
 ):
     """
     Track clouds in successive pairs of cloudid files.
@@ -24,7 +24,12 @@ def trackclouds(
         config: dictionary
             Dictionary containing config parameters
         drift_data: tuple, optional. Default: None.
-            Drift data (datetime_string, xdrift, ydrift)
+            Drift data (datetime_string, xdrift, ydrift).
+            xdrift/ydrift are integers for domain mean drift,
+            or 2D arrays [tile_y, tile_x] for drift in each advection tile.
+        cloudid_frames: tuple, optional. Default: None.
+            Reference and new frames already in memory (from load_cloudid_frame).
+            If provided, the cloudid files are not read again.
 
     Returns:
         track_outfile: string
@@ -85,27 +90,19 @@ def trackclouds(
 
         ##############################################################
         # Load cloudid file from before, called reference file
+        # and next cloudid file, called new file
         logger.debug(reference_filedatetime)
-
-        # Open file
-        reference_data = xr.open_dataset(
-            reference_file, mask_and_scale=False, decode_times=False, chunks=-1,
-        )
-        reference_convcold_cloudnumber = reference_data[feature_varname].load().data
-        nreference = reference_data[nfeature_varname].load().data
-        reference_data.close()
-
-        ##########################################################
-        # Load next cloudid file, called new file
         logger.debug(f"new_filedattime: {new_filedatetime}")
-
-        # Open file
-        new_data = xr.open_dataset(
-            new_file, mask_and_scale=False, decode_times=False, chunks=-1,
-        )
-        new_convcold_cloudnumber = new_data[feature_varname].load().data
-        nnew = new_data[nfeature_varname].load().data
-        new_data.close()
+        if cloudid_frames is None:
+            reference_data = load_cloudid_frame(reference_file, config)
+            new_data = load_cloudid_frame(new_file, config)
+        else:
+            # Use frames kept in memory by the caller
+            reference_data, new_data = cloudid_frames
+        reference_convcold_cloudnumber = reference_data[feature_varname]
+        nreference = reference_data[nfeature_varname]
+        new_convcold_cloudnumber = new_data[feature_varname]
+        nnew = new_data[nfeature_varname]
 
         # Convert float type to int, missing value to 0
         # This should not be needed when setting mask_and_scale=False
@@ -114,14 +111,24 @@ def trackclouds(
         new_convcold_cloudnumber[np.isnan(new_convcold_cloudnumber)] = 0
         new_convcold_cloudnumber = new_convcold_cloudnumber.astype("int")
 
+        # Array used to find overlaps with the reference clouds
+        new_overlap_cloudnumber = new_convcold_cloudnumber
         if drift_data is not None:
             # Compare drift datetime with reference datetime
             if reference_filedatetime == datetime_drift:
-
-                # Shift the reference cloudnumber and replace the original
-                reference_convcold_cloudnumber = ndi.shift(
-                    reference_convcold_cloudnumber, [0, ydrift, xdrift]
-                )
+                if np.ndim(xdrift) == 0:
+                    # Domain mean drift: overlap the reference and new clouds through offset windows
+                    # (pixels shifted outside the domain are dropped)
+                    reference_window, new_window = get_drift_windows(
+                        reference_convcold_cloudnumber.shape, ydrift, xdrift
+                    )
+                    reference_convcold_cloudnumber = reference_convcold_cloudnumber[reference_window]
+                    new_overlap_cloudnumber = new_convcold_cloudnumber[new_window]
+                else:
+                    # Drift in each tile: shift the reference cloudnumber and replace the original
+                    reference_convcold_cloudnumber = shift_cloudnumber_tiles(
+                        reference_convcold_cloudnumber, ydrift, xdrift
+                    )
             else:
                 logger.info(
                     "Warning: datetime_drift does NOT match reference_filedatetime! No shifting is applied."
@@ -157,11 +164,11 @@ def trackclouds(
             # Locate where the cloud in the reference file overlaps with any cloud in the new file
             forward_matchindices = np.where(
                 (reference_convcold_cloudnumber == refindex)
-                & (new_convcold_cloudnumber != 0)
+                & (new_overlap_cloudnumber != 0)
             )
 
             # Get the convcold_cloudnumber of the clouds in the new file that overlap the cloud in the reference file
-            forward_newindex = new_convcold_cloudnumber[forward_matchindices]
+            forward_newindex = new_overlap_cloudnumber[forward_matchindices]
             unique_forwardnewindex = np.unique(forward_newindex)
 
             # Calculate size of reference cloud in terms of number of pixels
@@ -210,7 +217,7 @@ def trackclouds(
         for newindex in np.arange(1, nnew + 1):
             # Locate where the cloud in the new file overlaps with any cloud in the reference file
             backward_matchindices = np.where(
-                (new_convcold_cloudnumber == newindex)
+                (new_overlap_cloudnumber == newindex)
                 & (reference_convcold_cloudnumber != 0)
             )
 
@@ -266,11 +273,11 @@ def trackclouds(
         logger.debug("Writing single tracks")
 
         bt_new = np.array(
-                    [pd.to_datetime(new_data["base_time"].data, unit="s")],
+                    [pd.to_datetime(new_data["base_time"], unit="s")],
                     dtype="datetime64[ns]",
                 )[0]
         bt_ref = np.array(
-                    [pd.to_datetime(reference_data["base_time"].data, unit="s")],
+                    [pd.to_datetime(reference_data["base_time"], unit="s")],
                     dtype="datetime64[ns]",
                 )[0]
 
@@ -404,4 +411,114 @@ def trackclouds(
             },
         )
         logger.info(track_outfile)
-    return track_outfile
\ No newline at end of file
+    return track_outfile
+
+def get_drift_windows(shape, ydrift, xdrift):
+    """
+    Get index windows that overlap a reference array shifted by an integer drift with the new array.
+
+    reference[reference_window] lands on new[new_window] after shifting by (ydrift, xdrift),
+    which is the same as ndi.shift(reference, [0, ydrift, xdrift]) for integer drifts.
+
+    Args:
+        shape: tuple
+            Array shape (..., ny, nx).
+        ydrift: int
+            Drift in y-direction [number of grids].
+        xdrift: int
+            Drift in x-direction [number of grids].
+
+    Returns:
+        reference_window: tuple
+            Slices for the reference array.
+        new_window: tuple
+            Slices for the new array.
+    """
+    ny, nx = shape[-2], shape[-1]
+    ydrift = int(np.clip(ydrift, -ny, ny))
+    xdrift = int(np.clip(xdrift, -nx, nx))
+    lead = (slice(None),) * (len(shape) - 2)
+    reference_window = lead + (
+        slice(max(-ydrift, 0), ny - max(ydrift, 0)),
+        slice(max(-xdrift, 0), nx - max(xdrift, 0)),
+    )
+    new_window = lead + (
+        slice(max(ydrift, 0), ny + min(ydrift, 0)),
+        slice(max(xdrift, 0), nx + min(xdrift, 0)),
+    )
+    return reference_window, new_window
+
+
+def shift_cloudnumber_tiles(cloudnumber, ydrift, xdrift):
+    """
+    Shift a cloudnumber array with a different integer drift in each advection tile.
+
+    Tiles are defined the same way as in advection_tiles.movement_of_storm_fft,
+    the remaining rows/columns are assigned to the last tile.
+    Each pixel is shifted with the drift of the tile it is in,
+    where shifted tiles overlap, the later tile (in row-major order) is kept.
+
+    Args:
+        cloudnumber: np.array
+            Cloudnumber array (..., ny, nx).
+        ydrift: np.array
+            Drift in y-direction [tile_y, tile_x] [number of grids].
+        xdrift: np.array
+            Drift in x-direction [tile_y, tile_x] [number of grids].
+
+    Returns:
+        cloudnumber_shift: np.array
+            Shifted cloudnumber array.
+    """
+    ny, nx = cloudnumber.shape[-2], cloudnumber.shape[-1]
+    tiles_y, tiles_x = np.shape(ydrift)
+    row_skip = max(int(ny / tiles_y), 1)
+    col_skip = max(int(nx / tiles_x), 1)
+    cloudnumber_shift = np.zeros_like(cloudnumber)
+    for row in range(0, tiles_y):
+        y0 = min(row * row_skip, ny)
+        y1 = ny if (row == tiles_y - 1) else min((row + 1) * row_skip, ny)
+        for col in range(0, tiles_x):
+            x0 = min(col * col_skip, nx)
+            x1 = nx if (col == tiles_x - 1) else min((col + 1) * col_skip, nx)
+            tile = cloudnumber[..., y0:y1, x0:x1]
+            if tile.size == 0:
+                continue
+            dy = int(ydrift[row, col])
+            dx = int(xdrift[row, col])
+            # Destination window in the full domain, clipped to the domain
+            dst_y0, dst_y1 = max(y0 + dy, 0), min(y1 + dy, ny)
+            dst_x0, dst_x1 = max(x0 + dx, 0), min(x1 + dx, nx)
+            if (dst_y0 >= dst_y1) | (dst_x0 >= dst_x1):
+                continue
+            src = tile[..., dst_y0 - dy - y0:dst_y1 - dy - y0, dst_x0 - dx - x0:dst_x1 - dx - x0]
+            dst = cloudnumber_shift[..., dst_y0:dst_y1, dst_x0:dst_x1]
+            np.copyto(dst, src, where=(src != 0))
+    return cloudnumber_shift
+
+
+def load_cloudid_frame(cloudid_file, config):
+    """
+    Load the variables needed for linking features from a cloudid file.
+
+    Arguments:
+        cloudid_file: string
+            Cloudid file name
+        config: dictionary
+            Dictionary containing config parameters
+
+    Returns:
+        frame: dictionary
+            Dictionary containing feature number, number of features and base time.
+    """
+    feature_varname = config.get("feature_varname", "feature_number")
+    nfeature_varname = config.get("nfeature_varname", "nfeatures")
+
+    ds = xr.open_dataset(cloudid_file, mask_and_scale=False, decode_times=False)
+    frame = {
+        feature_varname: ds[feature_varname].load().data,
+        nfeature_varname: ds[nfeature_varname].load().data,
+        "base_time": ds["base_time"].load().data,
+    }
+    ds.close()
+    return frame
@@ -1,8 +1,6 @@
-import sys
 import logging
-import dask
-from dask.distributed import wait
 from pyflextrkr.ft_utilities import subset_files_timerange, match_drift_times
+from pyflextrkr.ft_executor import run_tasks
 from pyflextrkr.tracksingle_drift import trackclouds
 
 def tracksingle_driver(config):
@@ -24,7 +22,6 @@ def tracksingle_driver(config):
     cloudid_filebase = config["cloudid_filebase"]
     start_basetime = config["start_basetime"]
     end_basetime = config["end_basetime"]
-    run_parallel = config["run_parallel"]
     driftfile = config.get("driftfile", None)
 
     # Identify files to process
@@ -55,45 +52,14 @@ def tracksingle_driver(config):
     cloudid_filepairs = list(zip(cloudidfiles[0:-1], cloudidfiles[1::]))
     cloudid_basetimepairs = list(zip(cloudidfiles_basetime[0:-1], cloudidfiles_basetime[1::]))
 
-    # Serial version
-    if run_parallel == 0:
-        for ifile in range(0, cloudidfilestep - 1):
-            if driftfile is not None:
-                trackclouds(
-                    cloudid_filepairs[ifile],
-                    cloudid_basetimepairs[ifile],
-                    config,
-                    drift_data=drift_data[ifile]
-                )
-            else:
-                trackclouds(
-                    cloudid_filepairs[ifile],
-                    cloudid_basetimepairs[ifile],
-                    config
-                )
-
-    # Parallel version
-    elif run_parallel >= 1:
-        results = []
-        for ifile in range(0, cloudidfilestep - 1):
-            if driftfile is not None:
-                result = dask.delayed(trackclouds)(
-                    cloudid_filepairs[ifile],
-                    cloudid_basetimepairs[ifile],
-                    config,
-                    drift_data=drift_data[ifile],
-                )
-            else:
-                result = dask.delayed(trackclouds)(
-                    cloudid_filepairs[ifile],
-                    cloudid_basetimepairs[ifile],
-                    config,
-                )
-            results.append(result)
-        final_result = dask.compute(*results)
-        wait(final_result)
+    # Track each pair of files with the executor set in config (serial/processes/dask)
+    task_args = list(zip(cloudid_filepairs, cloudid_basetimepairs))
+    if driftfile is not None:
+        task_kwargs = [{"drift_data": drift_data[ifile]} for ifile in range(0, cloudidfilestep - 1)]
     else:
-        sys.exit('Valid parallelization flag not provided.')
+        task_kwargs = None
+    run_tasks(trackclouds, task_args, config, task_kwargs=task_kwargs,
+              static_kwargs={"config": config})
 
     logger.info('Done with tracking sequential pairs of idfeature files')
     return
\ No newline at end of file
@@ -4,11 +4,10 @@ from scipy.sparse import csr_matrix
 import os
 import sys
 import time
-import copy
 import gc
 import logging
-import dask
-from dask.distributed import wait
+from pyflextrkr.ft_executor import run_tasks
+from pyflextrkr.ft_utilities import get_mask_blocks, sparse2dense_blocks, write_netcdf_blocks
 from pyflextrkr.trackstats_func import calc_stats_singlefile, adjust_mergesplit_numbers, get_track_startend_status
 
 def trackstats_driver(config):
@@ -37,7 +36,6 @@ def trackstats_driver(config):
     enddate = config["enddate"]
     stats_path = config["stats_outpath"]
     duration_range = config["duration_range"]
-    run_parallel = config["run_parallel"]
     fillval = config["fillval"]
     tracks_dimname = config["tracks_dimname"]
     times_dimname = config["times_dimname"]
@@ -72,45 +70,14 @@ def trackstats_driver(config):
     logger.debug("Looping over pixel files and calculating feature statistics")
     t0_files = time.time()
 
-    results = []
-
-    # Serial
-    if run_parallel == 0:
-        for nf in range(0, nfiles):
-            result = calc_stats_singlefile(
-                tracknumbers[nf, :],
-                cloudidfiles[nf],
-                trackstatus[nf, :],
-                trackmerge[nf, :],
-                tracksplit[nf, :],
-                trackreset[nf, :],
-                config,
-            )
-            results.append(result)
-
-        # Serial
-        final_result = results
-
-    # Parallel
-    elif run_parallel >= 1:
-        for nf in range(0, nfiles):
-            result = dask.delayed(calc_stats_singlefile)(
-                tracknumbers[nf, :],
-                cloudidfiles[nf],
-                trackstatus[nf, :],
-                trackmerge[nf, :],
-                tracksplit[nf, :],
-                trackreset[nf, :],
-                config,
-            )
-            results.append(result)
-
-        # Trigger dask computation
-        final_result = dask.compute(*results)
-        wait(final_result)
-
-    else:
-        sys.exit('Valid parallelization flag not provided.')
+    # Calculate statistics for each file with the executor set in config (serial/processes/dask)
+    task_args = [
+        (tracknumbers[nf, :], cloudidfiles[nf], trackstatus[nf, :],
+         trackmerge[nf, :], tracksplit[nf, :], trackreset[nf, :])
+        for nf in range(0, nfiles)
+    ]
+    final_result = run_tasks(calc_stats_singlefile, task_args, config,
+                             static_kwargs={"config": config})
 
 
     #########################################################################################
@@ -463,32 +430,26 @@ def write_trackstats_dense(config, fillval, fillval_f,
     if os.path.isfile(trackstats_outfile):
         os.remove(trackstats_outfile)
 
-    # Create a deep copy of the sparse matrix dictionary
-    out_dict_dense = copy.deepcopy(out_dict)
-
-    # Convert the sparse arrays to dense arrays
-    for ivar in out_dict_dense.keys():
-        if out_dict_dense[ivar].ndim == 2:
-            out_dict_dense[ivar] = out_dict_dense[ivar].toarray()
-    # Remove the tracks/times indices variables
-    out_dict_dense.pop(tracks_idx_varname, None)
-    out_dict_dense.pop(times_idx_varname, None)
+    ntracks_per_block = config.get("dense_ntracks_per_block", 10000)
 
-    # Create a dense mask for no feature
-    mask = out_dict_dense['base_time'] == 0
+    # Blocks of the base_time mask, shared by all variables
+    mask_blocks = get_mask_blocks(out_dict['base_time'], ntracks_per_block)
 
     varlist = {}
     # Define output variable dictionary
-    for key, value in out_dict_dense.items():
+    for key, value in out_dict.items():
+        # Skip the tracks/times indices variables
+        if key in [tracks_idx_varname, times_idx_varname]:
+            continue
         if value.ndim == 1:
             varlist[key] = ([tracks_dimname], value, out_dict_attrs[key])
         if value.ndim == 2:
-            # Replace missing values based on variable type
-            if isinstance(value[0, 0], np.floating):
-                value[mask] = fillval_f
-            else:
-                value[mask] = fillval
-            varlist[key] = ([tracks_dimname, times_dimname], value, out_dict_attrs[key])
+            # Convert the sparse arrays to dense arrays in blocks of tracks when writing,
+            # and replace missing values based on variable type
+            dense_array = sparse2dense_blocks(
+                value, mask_blocks, fillval, fillval_f, ntracks_per_block,
+            )
+            varlist[key] = ([tracks_dimname, times_dimname], dense_array, out_dict_attrs[key])
     # Define coordinate list
     coordlist = {
         tracks_dimname: ([tracks_dimname], np.arange(0, numtracks)),
@@ -514,10 +475,6 @@ def write_trackstats_dense(config, fillval, fillval_f,
     comp = dict(zlib=True)
     encoding = {var: comp for var in dsout.data_vars}
     # Write to netcdf file
-    dsout.to_netcdf(path=trackstats_outfile,
-                    mode='w',
-                    format='NETCDF4',
-                    unlimited_dims=tracks_dimname,
-                    encoding=encoding)
+    write_netcdf_blocks(dsout, trackstats_outfile, tracks_dimname, encoding)
     logger.info(trackstats_outfile)
     return
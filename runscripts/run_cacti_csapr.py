@@ -4,6 +4,7 @@ import logging
 import dask
 from dask.distributed import Client, LocalCluster
 from pyflextrkr.ft_utilities import load_config, setup_logging
+from pyflextrkr.ft_profiling import profile_stage, write_profiling_report
 from pyflextrkr.advection_tiles import calc_mean_advection
 from pyflextrkr.idfeature_driver import idfeature_driver
 from pyflextrkr.tracksingle_driver import tracksingle_driver
@@ -41,8 +42,9 @@ if __name__ == '__main__':
 
     # Step 0 - Run advection calculation
     if config['run_advection']:
-        logger.info('Calculating domain mean advection.')
-        driftfile = calc_mean_advection(config)
+        with profile_stage("advection", config):
+            logger.info('Calculating domain mean advection.')
+            driftfile = calc_mean_advection(config)
     else:
         driftfile = f'{config["stats_outpath"]}advection_' + \
                     f'{config["startdate"]}_{config["enddate"]}.nc'
@@ -50,21 +52,28 @@ if __name__ == '__main__':
 
     # Step 1 - Identify features
     if config['run_idfeature']:
-        idfeature_driver(config)
+        with profile_stage("idfeature", config):
+            idfeature_driver(config)
 
     # Step 2 - Link features in time adjacent files
     if config['run_tracksingle']:
-        tracksingle_driver(config)
+        with profile_stage("tracksingle", config):
+            tracksingle_driver(config)
 
     # Step 3 - Track features through the entire dataset
     if config['run_gettracks']:
-        tracknumbers_filename = gettracknumbers(config)
+        with profile_stage("gettracks", config):
+            tracknumbers_filename = gettracknumbers(config)
 
     # Step 4 - Calculate track statistics
     if config['run_trackstats']:
-        trackstats_filename = trackstats_driver(config)
+        with profile_stage("trackstats", config):
+            trackstats_filename = trackstats_driver(config)
 
     # Step 5 - Map tracking to pixel files
     if config['run_mapfeature']:
-        mapfeature_driver(config)
+        with profile_stage("mapfeature", config):
+            mapfeature_driver(config)
 
+    # Write the profiling report (if profiling is enabled)
+    write_profiling_report(config)
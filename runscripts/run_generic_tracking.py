@@ -4,8 +4,10 @@ import logging
 import dask
 from dask.distributed import Client, LocalCluster
 from pyflextrkr.ft_utilities import load_config, setup_logging
+from pyflextrkr.ft_profiling import profile_stage, write_profiling_report
 from pyflextrkr.idfeature_driver import idfeature_driver
 from pyflextrkr.tracksingle_driver import tracksingle_driver
+from pyflextrkr.idfeature_tracksingle_driver import idfeature_tracksingle_driver
 from pyflextrkr.gettracks import gettracknumbers
 from pyflextrkr.trackstats_driver import trackstats_driver
 from pyflextrkr.link_mergesplit_tracks import link_mergesplit_tracks
@@ -46,32 +48,50 @@ if __name__ == '__main__':
     else:
         logger.info(f"Running in serial.")
 
+    # Option to run Step 1 & 2 together in a single streaming pass
+    stream_idfeature_tracksingle = config.get('stream_idfeature_tracksingle', False) & \
+        config['run_idfeature'] & config['run_tracksingle']
+
     # Step 1 - Identify features
-    if config['run_idfeature']:
-        idfeature_driver(config)
+    if config['run_idfeature'] & (not stream_idfeature_tracksingle):
+        with profile_stage("idfeature", config):
+            idfeature_driver(config)
 
     # Step 2 - Link features in time adjacent files
-    if config['run_tracksingle']:
-        tracksingle_driver(config)
+    if config['run_tracksingle'] & (not stream_idfeature_tracksingle):
+        with profile_stage("tracksingle", config):
+            tracksingle_driver(config)
+
+    # Step 1 & 2 - Identify features and link them in time adjacent files
+    if stream_idfeature_tracksingle:
+        with profile_stage("idfeature_tracksingle", config):
+            idfeature_tracksingle_driver(config)
 
     # Step 3 - Track features through the entire dataset
     if config['run_gettracks']:
-        tracknumbers_filename = gettracknumbers(config)
+        with profile_stage("gettracks", config):
+            tracknumbers_filename = gettracknumbers(config)
 
     # Step 4 - Calculate track statistics
     if config['run_trackstats']:
-        trackstats_filename = trackstats_driver(config)
+        with profile_stage("trackstats", config):
+            trackstats_filename = trackstats_driver(config)
 
     # Step 5 - Link merge/split tracks to main tracks
     if config['run_mergesplit']:
-        finaltrackstats_filename = link_mergesplit_tracks(config)
+        with profile_stage("mergesplit", config):
+            finaltrackstats_filename = link_mergesplit_tracks(config)
 
     # Step 6 - Map tracking to pixel files
     if config['run_mapfeature']:
-        mapfeature_driver(config, trackstats_filebase=finalstats_filebase)
+        with profile_stage("mapfeature", config):
+            mapfeature_driver(config, trackstats_filebase=finalstats_filebase)
 
     # If Step 5 (link merge/split tracks) is not desired, it can be skipped (comment it out)
     # In that case, use the following for Step 6 (no need to provide trackstats_filebase argument)
     # # Step 6 - Map tracking to pixel files
     # if config['run_mapfeature']:
-    #     mapfeature_driver(config)
\ No newline at end of file
+    #     mapfeature_driver(config)
+
+    # Write the profiling report (if profiling is enabled)
+    write_profiling_report(config)
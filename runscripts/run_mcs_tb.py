@@ -4,6 +4,7 @@ import logging
 import dask
 from dask.distributed import Client, LocalCluster
 from pyflextrkr.ft_utilities import load_config, setup_logging
+from pyflextrkr.ft_profiling import profile_stage, write_profiling_report
 from pyflextrkr.idfeature_driver import idfeature_driver
 from pyflextrkr.tracksingle_driver import tracksingle_driver
 from pyflextrkr.gettracks import gettracknumbers
@@ -49,32 +50,42 @@ if __name__ == '__main__':
 
     # Step 1 - Identify features
     if config['run_idfeature']:
-        idfeature_driver(config)
+        with profile_stage("idfeature", config):
+            idfeature_driver(config)
 
     # Step 2 - Link features in time adjacent files
     if config['run_tracksingle']:
-        tracksingle_driver(config)
+        with profile_stage("tracksingle", config):
+            tracksingle_driver(config)
 
     # Step 3 - Track features through the entire dataset
     if config['run_gettracks']:
-        tracknumbers_filename = gettracknumbers(config)
+        with profile_stage("gettracks", config):
+            tracknumbers_filename = gettracknumbers(config)
 
     # Step 4 - Calculate track statistics
     if config['run_trackstats']:
-        trackstats_filename = trackstats_driver(config)
+        with profile_stage("trackstats", config):
+            trackstats_filename = trackstats_driver(config)
 
     # Step 5 - Identify MCS using Tb
     if config['run_identifymcs']:
-        mcsstats_filename = identifymcs_tb(config)
+        with profile_stage("identifymcs", config):
+            mcsstats_filename = identifymcs_tb(config)
 
     # Step 6 - Map tracking to pixel files
     if config['run_mapfeature']:
-        # Map Tb-only MCS track numbers to pixel files (provide outpath_basename keyword)
-        mapfeature_driver(config, trackstats_filebase=mcstbstats_filebase, outpath_basename=mcstbmap_outpath)
-        # Map all Tb track numbers to pixel level files (provide outpath_basename keyword)
-        # mapfeature_driver(config, trackstats_filebase=trackstats_filebase, outpath_basename=alltrackmap_outpath)
+        with profile_stage("mapfeature", config):
+            # Map Tb-only MCS track numbers to pixel files (provide outpath_basename keyword)
+            mapfeature_driver(config, trackstats_filebase=mcstbstats_filebase, outpath_basename=mcstbmap_outpath)
+            # Map all Tb track numbers to pixel level files (provide outpath_basename keyword)
+            # mapfeature_driver(config, trackstats_filebase=trackstats_filebase, outpath_basename=alltrackmap_outpath)
 
     # Step 7 - Movement speed calculation
     if config['run_speed']:
-        # For Tb-only MCS tracking, provide trackstats_filebase and pixelpath_basename keywords
-        movement_speed(config, trackstats_filebase=mcstbstats_filebase, pixelpath_basename=mcstbmap_outpath)
\ No newline at end of file
+        with profile_stage("speed", config):
+            # For Tb-only MCS tracking, provide trackstats_filebase and pixelpath_basename keywords
+            movement_speed(config, trackstats_filebase=mcstbstats_filebase, pixelpath_basename=mcstbmap_outpath)
+
+    # Write the profiling report (if profiling is enabled)
+    write_profiling_report(config)
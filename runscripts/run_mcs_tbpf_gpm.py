@@ -4,6 +4,7 @@ import logging
 import dask
 from dask.distributed import Client, LocalCluster
 from pyflextrkr.ft_utilities import load_config, setup_logging
+from pyflextrkr.ft_profiling import profile_stage, write_profiling_report
 from pyflextrkr.idfeature_driver import idfeature_driver
 from pyflextrkr.tracksingle_driver import tracksingle_driver
 from pyflextrkr.gettracks import gettracknumbers
@@ -61,41 +62,53 @@ if __name__ == '__main__':
 
     # Step 1 - Identify features
     if config['run_idfeature']:
-        idfeature_driver(config)
+        with profile_stage("idfeature", config):
+            idfeature_driver(config)
 
     # Step 2 - Link features in time adjacent files
     if config['run_tracksingle']:
-        tracksingle_driver(config)
+        with profile_stage("tracksingle", config):
+            tracksingle_driver(config)
 
     # Step 3 - Track features through the entire dataset
     if config['run_gettracks']:
-        tracknumbers_filename = gettracknumbers(config)
+        with profile_stage("gettracks", config):
+            tracknumbers_filename = gettracknumbers(config)
 
     # Step 4 - Calculate track statistics
     if config['run_trackstats']:
-        trackstats_filename = trackstats_driver(config)
+        with profile_stage("trackstats", config):
+            trackstats_filename = trackstats_driver(config)
 
     # Step 5 - Identify MCS using Tb
     if config['run_identifymcs']:
-        mcsstats_filename = identifymcs_tb(config)
+        with profile_stage("identifymcs", config):
+            mcsstats_filename = identifymcs_tb(config)
 
     # Step 6 - Match PF to MCS
     if config['run_matchpf']:
-        pfstats_filename = match_tbpf_tracks(config)
+        with profile_stage("matchpf", config):
+            pfstats_filename = match_tbpf_tracks(config)
 
     # Step 7 - Identify robust MCS
     if config['run_robustmcs']:
-        robustmcsstats_filename = define_robust_mcs_pf(config)
+        with profile_stage("robustmcs", config):
+            robustmcsstats_filename = define_robust_mcs_pf(config)
 
     # Step 8 - Map tracking to pixel files
     if config['run_mapfeature']:
-        # Map robust MCS track numbers to pixel files (default)
-        mapfeature_driver(config, trackstats_filebase=mcsrobust_filebase)
-        # Map Tb-only MCS track numbers to pixel files (provide outpath_basename keyword)
-        # mapfeature_driver(config, trackstats_filebase=mcstbstats_filebase, outpath_basename=mcstbmap_outpath)
-        # Map all Tb track numbers to pixel level files (provide outpath_basename keyword)
-        # mapfeature_driver(config, trackstats_filebase, outpath_basename=alltrackmap_outpath)
+        with profile_stage("mapfeature", config):
+            # Map robust MCS track numbers to pixel files (default)
+            mapfeature_driver(config, trackstats_filebase=mcsrobust_filebase)
+            # Map Tb-only MCS track numbers to pixel files (provide outpath_basename keyword)
+            # mapfeature_driver(config, trackstats_filebase=mcstbstats_filebase, outpath_basename=mcstbmap_outpath)
+            # Map all Tb track numbers to pixel level files (provide outpath_basename keyword)
+            # mapfeature_driver(config, trackstats_filebase, outpath_basename=alltrackmap_outpath)
 
     # Step 9 - Movement speed calculation
     if config['run_speed']:
-        movement_speed(config)
\ No newline at end of file
+        with profile_stage("speed", config):
+            movement_speed(config)
+
+    # Write the profiling report (if profiling is enabled)
+    write_profiling_report(config)